@@ -0,0 +1,259 @@
+"""
+Defines a result cache, which stores the results of solved formulas on disk keyed by a canonical hash of the formula.
+"""
+from constants import *
+from config import *
+from solver import Solver
+from canonical import get_formula_key, get_formula_hash
+from verifier import is_model
+import json
+import os
+import shutil
+
+class ResultCache:
+    def __init__(self, directory, max_entries=1000, max_bytes=1 << 28, is_renamed=False):
+        """
+        Initializes a cache of results in a directory, where each entry is a json file named by the key of its formula,
+        with the proof of an unsat formula next to it. Entries are evicted least recently used first
+        once there are more than max_entries entries or they take more than max_bytes bytes,
+        using the modification time of an entry as the time it was last used.
+            :param directory: Directory of cache entries, created if missing.
+            :param max_entries: Number of entries kept.
+            :param max_bytes: Number of bytes of entries and proofs kept.
+            :param is_renamed: Whether variables are renamed to a normal form, so formulas that only differ
+                    in variable numbering share an entry.
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.is_renamed = is_renamed
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def get_key(self, formula, n_vars):
+        # returns the key of the formula, and list mapping each variable to its variable in the canonical form
+        return get_formula_key(formula, n_vars, self.is_renamed)
+
+    def get(self, formula, n_vars, key=None, renaming=None):
+        """
+        Looks up the result of the formula. A cached model is checked against the formula before it is returned,
+        and the entry is dropped if it does not satisfy the formula.
+            :param formula: Iterable of clauses.
+            :param n_vars: Number of variables in formula.
+            :param key: Key of the formula from get_key, computed if None.
+            :param renaming: Renaming of the formula from get_key.
+            :returns: Assignments, value and path of the proof file, which is None if there is no proof,
+                    or None if the formula is not cached. The proof refers to the formula as it was solved,
+                    and copy_proof gives it back for this formula.
+        """
+        if key == None:
+            key, renaming = self.get_key(formula, n_vars)
+
+        path = self.get_path(key, ".json")
+
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        assignments = {}
+
+        if entry["value"] == SAT:
+            model = entry["model"] # { canonical variable: value }
+            assignments = { variable: model[renaming[variable]] for variable in range(1, n_vars + 1) }
+
+            if not is_model(formula, n_vars, assignments):
+                self.remove(key)
+                self.misses += 1
+                return None
+
+        # marks the entry as the most recently used
+        os.utime(path)
+        self.hits += 1
+
+        proof_path = self.get_path(key, ".proof") if entry["is_proof"] else None
+
+        return assignments, entry["value"], proof_path
+
+    def copy_proof(self, formula, n_vars, output_path, proof_format, key=None, renaming=None):
+        """
+        Copies the cached proof of an unsat formula to a file, with its variables renamed to those of the formula.
+        Proofs in the lrat and binary drat formats also refer to clauses by their position,
+        so they are only copied for the exact formula they were written for.
+            :param formula: Iterable of clauses.
+            :param n_vars: Number of variables in formula.
+            :param output_path: Path the proof is copied to.
+            :param proof_format: Format the proof must be in.
+            :param key: Key of the formula from get_key, computed if None.
+            :param renaming: Renaming of the formula from get_key.
+            :returns: Whether the proof was copied.
+        """
+        if key == None:
+            key, renaming = self.get_key(formula, n_vars)
+
+        try:
+            with open(self.get_path(key, ".json")) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if not entry["is_proof"] or entry.get("proof_format") != proof_format:
+            return False
+
+        proof_path = self.get_path(key, ".proof")
+
+        if entry.get("formula_hash") == get_formula_hash(formula, n_vars):
+            shutil.copyfile(proof_path, output_path)
+            return True
+
+        if proof_format not in (RESOLUTION, DRAT):
+            return False
+
+        # maps each variable of the solved formula to the variable of this formula with the same canonical variable
+        canonical_variables = { renaming[variable]: variable for variable in range(1, n_vars + 1) }
+        variables = [ 0 ] + [ canonical_variables[canonical] for canonical in entry["renaming"][1:] ]
+
+        with open(proof_path) as source, open(output_path, "w") as f:
+            # resolution proofs list their clauses after the header, then the steps, which only hold clause indexes
+            n_clauses = int(source.readline().split()[1]) if proof_format == RESOLUTION else None
+
+            if n_clauses != None:
+                f.write("v {}\n".format(n_clauses))
+
+            for i, line in enumerate(source):
+                if n_clauses != None and i >= n_clauses:
+                    f.write(line)
+                else:
+                    f.write(rename_line(line, variables))
+
+        return True
+
+    def put(self, formula, n_vars, assignments, value, proof_path=None, key=None, renaming=None, proof_format=None):
+        """
+        Stores the result of the formula, then evicts the least recently used entries over the limits.
+        Results other than SAT and UNSAT are not stored.
+            :param formula: Iterable of clauses.
+            :param n_vars: Number of variables in formula.
+            :param assignments: Dictionary of { variable: value } if SAT.
+            :param value: SAT or UNSAT.
+            :param proof_path: Path of the proof file of an unsat formula, which is copied into the cache.
+                    The proof refers to the formula as it was solved.
+            :param key: Key of the formula from get_key, computed if None.
+            :param renaming: Renaming of the formula from get_key.
+            :param proof_format: Format of the proof, defaults to Config.PROOF_FORMAT.
+            :returns: None.
+        """
+        if value not in (SAT, UNSAT):
+            return
+
+        if key == None:
+            key, renaming = self.get_key(formula, n_vars)
+
+        entry = { "n_vars": n_vars, "value": value, "is_proof": proof_path != None }
+
+        if proof_path != None:
+            # the formula as it was solved is recorded, so the proof can be given back for other formulas with the same key
+            entry["proof_format"] = Config.PROOF_FORMAT if proof_format == None else proof_format
+            entry["formula_hash"] = get_formula_hash(formula, n_vars)
+            entry["renaming"] = renaming
+
+        if value == SAT:
+            model = [ 0 ] * (n_vars + 1)
+
+            for variable in range(1, n_vars + 1):
+                model[renaming[variable]] = assignments[variable]
+
+            entry["model"] = model
+
+        if proof_path != None:
+            shutil.copyfile(proof_path, self.get_path(key, ".proof"))
+
+        # writes to a temporary file first, so readers never see a partial entry
+        path = self.get_path(key, ".json")
+
+        with open(path + ".tmp", "w") as f:
+            json.dump(entry, f)
+
+        os.replace(path + ".tmp", path)
+        self.evict()
+
+    def get_path(self, key, extension):
+        return os.path.join(self.directory, key + extension)
+
+    def remove(self, key):
+        for extension in [ ".json", ".proof" ]:
+            try:
+                os.remove(self.get_path(key, extension))
+            except OSError:
+                pass
+
+    def evict(self):
+        entries = [] # [ ( last used, key, bytes ) ]
+
+        for file in os.scandir(self.directory):
+            if file.name.endswith(".json"):
+                key = file.name[:-len(".json")]
+                size = file.stat().st_size
+
+                if os.path.exists(self.get_path(key, ".proof")):
+                    size += os.path.getsize(self.get_path(key, ".proof"))
+
+                entries.append((file.stat().st_mtime, key, size))
+
+        entries.sort()
+        n_entries = len(entries)
+        total_bytes = sum(size for last_used, key, size in entries)
+
+        for last_used, key, size in entries:
+            if n_entries <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+
+            self.remove(key)
+            n_entries -= 1
+            total_bytes -= size
+
+    def get_stats(self):
+        return { "hits": self.hits, "misses": self.misses }
+
+def rename_line(line, variables):
+    # renames the literals in a line of a text proof, keeping other tokens such as the d of a deleted clause
+    tokens = line.split()
+
+    for i, token in enumerate(tokens):
+        if token.lstrip("-").isdigit() and token != "0":
+            literal = int(token)
+            tokens[i] = str(variables[literal] if literal > 0 else -variables[-literal])
+
+    return " ".join(tokens) + "\n"
+
+def solve_cached(formula, n_vars, cache=None):
+    """
+    Solves the formula, unless its result is cached. If proofs are on, the cached proof of an unsat formula
+    is copied to Config.OUTPUT_PATH, and the formula is solved again if the proof cannot be given back for it.
+        :param formula: Iterable of clauses.
+        :param n_vars: Number of variables in formula.
+        :param cache: Result cache, defaults to a cache with the settings in Config.
+        :returns: Assignments and value.
+    """
+    if cache == None:
+        cache = ResultCache(Config.CACHE_DIR, Config.CACHE_MAX_ENTRIES, Config.CACHE_MAX_BYTES, Config.IS_CACHE_RENAMED)
+
+    key, renaming = cache.get_key(formula, n_vars)
+    result = cache.get(formula, n_vars, key, renaming)
+
+    if result != None:
+        assignments, value, proof_path = result
+
+        if not Config.IS_PROOF or value != UNSAT or cache.copy_proof(formula, n_vars, Config.OUTPUT_PATH,
+                Config.PROOF_FORMAT, key, renaming):
+            return assignments, value
+
+    assignments, value = Solver(formula, n_vars).solve()
+    proof_path = Config.OUTPUT_PATH if Config.IS_PROOF and value == UNSAT else None
+    cache.put(formula, n_vars, assignments, value, proof_path, key, renaming, Config.PROOF_FORMAT)
+
+    return assignments, value
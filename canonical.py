@@ -0,0 +1,80 @@
+"""
+Defines the canonical form of a formula, whose hash keys cached results and checkpoints.
+"""
+from array import array
+import hashlib
+
+def get_formula_key(formula, n_vars, is_renamed=False):
+    """
+    Hashes the canonical form of the formula, where literals and clauses are sorted, and repeated literals,
+    duplicate clauses and tautologies are dropped, so clause order does not change the key.
+        :param formula: Iterable of clauses.
+        :param n_vars: Number of variables in formula.
+        :param is_renamed: Whether variables are renamed to a normal form first.
+        :returns: Key, and list mapping each variable to its variable in the canonical form.
+    """
+    clauses = [ set(clause) for clause in formula ]
+    clauses = [ clause for clause in clauses if not any(-literal in clause for literal in clause) ]
+    renaming = rename_variables(clauses, n_vars) if is_renamed else list(range(n_vars + 1))
+
+    canonical = sorted({ tuple(sorted(renaming[literal] if literal > 0 else -renaming[-literal] for literal in clause))
+            for clause in clauses })
+
+    # each clause ends with 0, as in dimacs
+    literals = array("i", [ n_vars, 0 ])
+
+    for clause in canonical:
+        literals.extend(clause)
+        literals.append(0)
+
+    return hashlib.sha256(literals.tobytes()).hexdigest(), renaming
+
+def get_formula_hash(formula, n_vars):
+    """
+    Hashes the formula as it is written, so formulas that differ in clause order or variable numbering get different hashes.
+        :param formula: Iterable of clauses.
+        :param n_vars: Number of variables in formula.
+        :returns: Hash.
+    """
+    literals = array("i", [ n_vars, 0 ])
+
+    for clause in formula:
+        literals.extend(clause)
+        literals.append(0)
+
+    return hashlib.sha256(literals.tobytes()).hexdigest()
+
+def rename_variables(clauses, n_vars, rounds=3):
+    """
+    Renames variables by a refinement of their occurrences, so formulas that only differ in variable numbering
+    are usually renamed to the same formula. Each round colors a variable by its color and the colors of
+    the clauses it occurs in, where a clause is colored by the colors and signs of its literals.
+    Variables with the same color keep their relative order, so formulas whose variables are not told apart
+    by the refinement get different keys, but different formulas never get the same key.
+        :param clauses: List of sets of literals.
+        :param n_vars: Number of variables in formula.
+        :param rounds: Number of refinement rounds.
+        :returns: List mapping each variable to its new variable.
+    """
+    occurrences = [ [] for variable in range(n_vars + 1) ] # { variable: [ clause index ] }
+
+    for clause_index, clause in enumerate(clauses):
+        for literal in clause:
+            occurrences[abs(literal)].append(clause_index)
+
+    colors = [ 0 ] * (n_vars + 1) # { variable: color }
+
+    for i in range(rounds):
+        clause_colors = [ hash(tuple(sorted((colors[abs(literal)], literal > 0) for literal in clause)))
+                for clause in clauses ]
+        colors = [ hash((colors[variable], tuple(sorted((clause_colors[clause_index], variable in clauses[clause_index])
+                for clause_index in occurrences[variable])))) for variable in range(n_vars + 1) ]
+
+    # unused variables are renamed last
+    order = sorted(range(1, n_vars + 1), key=lambda variable: (occurrences[variable] == [], colors[variable]))
+    renaming = [ 0 ] * (n_vars + 1)
+
+    for new_variable, variable in enumerate(order, 1):
+        renaming[variable] = new_variable
+
+    return renaming
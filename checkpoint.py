@@ -0,0 +1,116 @@
+"""
+Defines solver checkpoints, which keep what a search has learnt so another solver of the same formula can resume from it.
+
+A checkpoint is a header of the magic bytes, the key of the formula, the number of variables, the number of literals
+assigned at decision level 0 and the number of learnt clauses, followed by a zlib compressed payload of
+the literals assigned at decision level 0, the size, lbd and activity of each learnt clause, the literals of
+the learnt clauses, the activity and saved phase of each variable, and the activity increments.
+"""
+from array import array
+import os
+import struct
+import zlib
+
+MAGIC = b"SATCKPT1"
+HEADER = struct.Struct("<8s32sqqq")
+INCREMENTS = struct.Struct("<dd")
+
+class Checkpoint:
+    def __init__(self, formula_key, n_vars, units, learnt_clauses, activity, phases, vsids_increment, clause_increment):
+        """
+        Holds the state of a solver that is kept in a checkpoint.
+        Every clause is implied by the formula, so it can be added to any solver of the formula.
+            :param formula_key: Hex key of the formula, from canonical.get_formula_key.
+            :param n_vars: Number of variables in formula.
+            :param units: List of literals assigned at decision level 0.
+            :param learnt_clauses: List of ( clause, lbd, activity ).
+            :param activity: List of the activity of each variable.
+            :param phases: List of the saved phase of each variable.
+            :param vsids_increment: Amount variables are bumped by.
+            :param clause_increment: Amount clauses are bumped by.
+        """
+        self.formula_key = formula_key
+        self.n_vars = n_vars
+        self.units = units
+        self.learnt_clauses = learnt_clauses
+        self.activity = activity
+        self.phases = phases
+        self.vsids_increment = vsids_increment
+        self.clause_increment = clause_increment
+
+def write_checkpoint(checkpoint, path):
+    # writes to a temporary file first, so a checkpoint is never left half written if the process is stopped
+    sizes = array("i", [ len(clause) for clause, lbd, activity in checkpoint.learnt_clauses ])
+    lbds = array("i", [ lbd for clause, lbd, activity in checkpoint.learnt_clauses ])
+    activities = array("d", [ activity for clause, lbd, activity in checkpoint.learnt_clauses ])
+    literals = array("i")
+
+    for clause, lbd, activity in checkpoint.learnt_clauses:
+        literals.extend(clause)
+
+    payload = b"".join([ array("i", checkpoint.units).tobytes(), sizes.tobytes(), lbds.tobytes(), activities.tobytes(),
+            literals.tobytes(), array("d", checkpoint.activity).tobytes(), array("b", checkpoint.phases).tobytes(),
+            INCREMENTS.pack(checkpoint.vsids_increment, checkpoint.clause_increment) ])
+
+    with open(path + ".tmp", "wb") as f:
+        f.write(HEADER.pack(MAGIC, bytes.fromhex(checkpoint.formula_key), checkpoint.n_vars,
+                len(checkpoint.units), len(checkpoint.learnt_clauses)))
+        f.write(zlib.compress(payload, 1))
+
+    os.replace(path + ".tmp", path)
+
+def read_checkpoint(path):
+    """
+    Reads a checkpoint.
+        :param path: Path of checkpoint file.
+        :raises ValueError: when the file is not a checkpoint
+        :returns: Checkpoint.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if len(data) < HEADER.size:
+        raise ValueError("{} is not a checkpoint".format(path))
+
+    magic, formula_key, n_vars, n_units, n_learnt = HEADER.unpack_from(data)
+
+    if magic != MAGIC:
+        raise ValueError("{} is not a checkpoint".format(path))
+
+    try:
+        payload = zlib.decompress(data[HEADER.size:])
+    except zlib.error:
+        raise ValueError("{} is a damaged checkpoint".format(path))
+
+    position = 0
+
+    def read_array(typecode, count):
+        nonlocal position
+        values = array(typecode)
+        end = position + values.itemsize * count
+        values.frombytes(payload[position:end])
+        position = end
+        return values
+
+    units = read_array("i", n_units)
+    sizes = read_array("i", n_learnt)
+    lbds = read_array("i", n_learnt)
+    activities = read_array("d", n_learnt)
+    literals = read_array("i", sum(sizes))
+    activity = read_array("d", n_vars + 1)
+    phases = read_array("b", n_vars + 1)
+
+    if len(payload) - position != INCREMENTS.size:
+        raise ValueError("{} is a damaged checkpoint".format(path))
+
+    vsids_increment, clause_increment = INCREMENTS.unpack_from(payload, position)
+
+    learnt_clauses = []
+    start = 0
+
+    for size, lbd, clause_activity in zip(sizes, lbds, activities):
+        learnt_clauses.append((literals[start:start + size].tolist(), lbd, clause_activity))
+        start += size
+
+    return Checkpoint(formula_key.hex(), n_vars, units.tolist(), learnt_clauses, activity.tolist(), phases.tolist(),
+            vsids_increment, clause_increment)
@@ -0,0 +1,107 @@
+"""
+Defines a flat clause store, where clauses are referenced by integer ids.
+"""
+from array import array
+
+class ClauseArena:
+    def __init__(self):
+        """
+        Initializes an empty arena.
+        The literals of all clauses are stored back to back in a single integer array,
+        with a header per clause id holding its offset, size, learnt flag, activity and lbd.
+        """
+        self.literals = array("i") # [ literal ]
+        self.starts = array("q") # { clause id: offset of first literal }
+        self.sizes = array("i") # { clause id: number of literals }
+        self.learnt = array("b") # { clause id: 1 if learnt else 0 }
+        self.deleted = array("b") # { clause id: 1 if deleted else 0 }
+        self.activity = array("d") # { clause id: activity }
+        self.lbd = array("i") # { clause id: literal block distance }
+        self.wasted = 0 # number of literals held by deleted clauses
+        self.n_deleted = 0 # number of deleted clauses
+
+    def __len__(self):
+        # number of clause ids handed out since the last collection, including deleted clauses
+        return len(self.sizes)
+
+    def __iter__(self):
+        # iterates over the ids of clauses that are not deleted
+        deleted = self.deleted
+        return (clause_id for clause_id in range(len(self.sizes)) if not deleted[clause_id])
+
+    def add(self, clause, is_learnt=False, lbd=0):
+        """
+        Appends a clause to the arena.
+            :param clause: Iterable of literals.
+            :param is_learnt: Whether the clause was learnt during search.
+            :param lbd: Number of distinct decision levels in the clause when it was learnt.
+            :returns: Clause id.
+        """
+        start = len(self.literals)
+        self.literals.extend(clause)
+
+        self.starts.append(start)
+        self.sizes.append(len(self.literals) - start)
+        self.learnt.append(1 if is_learnt else 0)
+        self.deleted.append(0)
+        self.activity.append(0.0)
+        self.lbd.append(lbd)
+
+        return len(self.sizes) - 1
+
+    def clause(self, clause_id):
+        start = self.starts[clause_id]
+        return self.literals[start:start + self.sizes[clause_id]].tolist()
+
+    def clause_bytes(self, clause_id):
+        # memory taken by the literals and header of a clause
+        header = (self.starts.itemsize + self.sizes.itemsize + self.learnt.itemsize 
+                + self.deleted.itemsize + self.activity.itemsize + self.lbd.itemsize)
+        return self.sizes[clause_id] * self.literals.itemsize + header
+
+    def delete(self, clause_id):
+        # literals stay in the arena until the next collection
+        if not self.deleted[clause_id]:
+            self.deleted[clause_id] = 1
+            self.wasted += self.sizes[clause_id]
+            self.n_deleted += 1
+
+    def collect(self):
+        """
+        Compacts the arena by copying the literals and headers of clauses that are not deleted into new arrays.
+        Clauses are renumbered in the order of their ids, so the caller renumbers every clause id it holds,
+        and the order of literals within each clause is unchanged.
+            :returns: Array of { old clause id: new clause id }, -1 for deleted clauses.
+        """
+        ids = array("q", [ -1 ]) * len(self.sizes)
+        literals = array("i")
+        starts = array("q")
+        sizes = array("i")
+        learnt = array("b")
+        activity = array("d")
+        lbd = array("i")
+
+        for clause_id in range(len(self.sizes)):
+            if self.deleted[clause_id]:
+                continue
+
+            ids[clause_id] = len(sizes)
+            start = self.starts[clause_id]
+            starts.append(len(literals))
+            literals.extend(self.literals[start:start + self.sizes[clause_id]])
+            sizes.append(self.sizes[clause_id])
+            learnt.append(self.learnt[clause_id])
+            activity.append(self.activity[clause_id])
+            lbd.append(self.lbd[clause_id])
+
+        self.literals = literals
+        self.starts = starts
+        self.sizes = sizes
+        self.learnt = learnt
+        self.deleted = array("b", bytes(len(sizes)))
+        self.activity = activity
+        self.lbd = lbd
+        self.wasted = 0
+        self.n_deleted = 0
+
+        return ids
@@ -4,12 +4,108 @@ Contains settings for SAT solver.
 class Config:
     IS_LOG = False
 
+    # statistics - counters are always kept, timing and profiling slow the search down so they are optional
+    IS_TIMED = False # times each phase of the search
+    PROGRESS_INTERVAL = 10000 # conflicts between calls of the progress callback
+    STATS_PATH = None # writes the statistics as json to this path when solving ends
+    TENSORBOARD_DIR = None # writes the statistics to tensorboard in this directory, needs tensorboardX
+    PROFILER = None # None, "cprofile" or "sampling"
+    PROFILE_PATH = "profile.txt"
+    SAMPLE_INTERVAL = 0.005 # sampling - seconds between samples
+
+    # result cache - results are stored on disk, keyed by a hash of the formula with clauses and literals sorted
+    IS_CACHE = False
+    CACHE_DIR = ".cache"
+    CACHE_MAX_ENTRIES = 1000 # least recently used entries are evicted over this
+    CACHE_MAX_BYTES = 1 << 28 # least recently used entries are evicted while entries and proofs take more bytes than this
+    IS_CACHE_RENAMED = False # renames variables to a normal form, so formulas that only differ in variable numbering share an entry
+
+    # checkpoints - learnt clauses, activities and phases are written every interval conflicts and when a solve is stopped
+    CHECKPOINT_PATH = None # writes checkpoints to this path if set
+    CHECKPOINT_INTERVAL = 10000 # conflicts between checkpoints
+    IS_RESUME = False # resumes from the checkpoint at CHECKPOINT_PATH if it exists
+
+    # budgets per solve - solving stops with UNKNOWN once one is used up, None is unlimited
+    CONFLICT_BUDGET = None
+    PROPAGATION_BUDGET = None
+    TIME_BUDGET = None # seconds
+    MEMORY_BUDGET = None # megabytes of peak memory of the process, checked every 1024 conflicts
+
     IS_VSIDS = True
-    VSIDS_INTERVAL = 256
+    VSIDS_MODE = "evsids" # "evsids" or "legacy"
+    VSIDS_DECAY = 0.95 # evsids only
+    VSIDS_INTERVAL = 256 # legacy only
+
+    # decision phase - "fixed" always picks DEFAULT_PHASE, "saved" picks the last value of the variable,
+    # "target" picks the value of the variable in the longest trail without conflict since the last restart
+    PHASE_MODE = "target"
+    DEFAULT_PHASE = 0
+    IS_REPHASE = True
+    REPHASE_INTERVAL = 1000 # conflicts before the first rephase, grows by this after every rephase
+    REPHASE_SCHEDULE = ["original", "best", "inverted", "best", "random", "best"]
+    SEED = 0
+
+    # learnt clauses are periodically reduced to the better half, ranked by lbd then activity
+    IS_REDUCE = True
+    REDUCE_INTERVAL = 2000 # conflicts before the first reduction
+    REDUCE_INCREMENT = 300 # added to the interval after every reduction
+    MAX_LEARNT_CLAUSES = None # also reduces once there are more learnt clauses than this
+    MAX_LEARNT_BYTES = None # also reduces once learnt clauses take more bytes than this
+    GLUE_LBD = 2 # learnt clauses with lbd at most this are never deleted
+    CLAUSE_DECAY = 0.999
 
-    IS_RESTART = False
-    RESTART_INTERVAL = 256
-    RESTART_MULTIPLIER = 2
+    IS_RESTART = True
+    RESTART_STRATEGY = "glucose" # "luby", "geometric" or "glucose"
+    RESTART_INTERVAL = 256 # geometric - conflicts before the first restart
+    RESTART_MULTIPLIER = 2 # geometric - interval multiplier after every restart
+    LUBY_UNIT = 100 # luby - conflicts per unit of the luby sequence
+    GLUCOSE_MIN_CONFLICTS = 50 # glucose - conflicts between restarts
+    GLUCOSE_FAST_ALPHA = 1 / 32 # glucose - smoothing of the recent lbd average
+    GLUCOSE_SLOW_ALPHA = 1 / 4096 # glucose - smoothing of the long term lbd and trail size averages
+    GLUCOSE_MARGIN = 1.25 # glucose - restarts when recent lbd exceeds the long term lbd by this factor
+    GLUCOSE_BLOCK_MARGIN = 1.4 # glucose - blocks restarts when the trail exceeds its long term size by this factor
+    GLUCOSE_BLOCK_CONFLICTS = 10000 # glucose - conflicts before restarts can be blocked
     
+    # simplifies the formula before solving with subsumption, self-subsuming resolution and variable elimination
+    IS_PREPROCESS = True
+    PREPROCESS_TIME_LIMIT = 1.0 # seconds
+    BVE_OCCURRENCE_LIMIT = 10 # variables occurring more often than this with both signs are not eliminated
+    BVE_CLAUSE_LIMIT = 20 # variables are not eliminated if a resolvent would be longer than this
+    BVE_GROWTH = 0 # number of clauses each elimination may add
+
+    # portfolio - solves with diversified solvers in parallel processes, the first answer wins
+    N_WORKERS = 1 # solves with a portfolio when above 1, 0 uses every core
+    IS_SHARING = True # solvers exchange short learnt clauses with low lbd
+    SHARE_LBD = 2 # learnt clauses with lbd at most this are exported, single literal clauses always are
+    SHARE_SIZE = 8 # learnt clauses with more literals than this are not exported
+    SHARE_BUFFER_SIZE = 1 << 16 # integers in the shared clause ring buffer
+
+    # cube and conquer - splits the formula into cubes by lookahead, then solves the cubes in parallel processes
+    IS_CUBE_AND_CONQUER = False
+    CUBE_DEPTH = 6 # splits per cube
+    MAX_CUBES = 64 # splitting stops once there are this many cubes
+    LOOKAHEAD_CANDIDATES = 20 # variables in the most clauses that are scored by lookahead per split
+
+    # local search - walkers flip variables of unsat clauses in parallel, which finds models of satisfiable random formulas fast
+    # "standalone" only searches locally, "hybrid" solves with cdcl from the best assignment found if no model is found
+    LOCAL_SEARCH_MODE = None # None, "standalone" or "hybrid"
+    LOCAL_SEARCH_ALGORITHM = "probsat" # "probsat" or "walksat"
+    N_WALKERS = 32
+    PROBSAT_CB = 2.06 # probsat - variables are picked with weight (eps + break count) ^ -cb, tuned for 3-sat
+    PROBSAT_EPS = 0.9
+    WALKSAT_NOISE = 0.567 # walksat - probability of flipping a random variable when every flip breaks a clause
+    MAX_FLIPS = None # flips per walker, None is unlimited
+    LOCAL_SEARCH_TIME_LIMIT = 10 # seconds, None is unlimited
+
+    # symmetry breaking - adds lex-leader clauses for permutations of variables that map the formula to itself
+    # the proof then refutes the formula with the lex-leader clauses, which are not implied by the formula
+    IS_SYMMETRY_BREAKING = False
+    GENERATORS_PATH = None # reads generators from this file if set, such as the output of saucy or breakid, else finds them
+    MAX_GENERATORS = None # generators after which the search stops
+    SYMMETRY_TIME_LIMIT = 10 # seconds of searching for generators
+    LEX_LEADER_SIZE = None # moved variables compared per generator, None compares every moved variable
+
     IS_PROOF = True
+    PROOF_FORMAT = "resolution" # "resolution", "drat", "binary_drat" or "lrat" - drat and lrat are streamed as clauses are learnt
+    IS_PROOF_TRIMMED = True # resolution only - writes only the clauses and steps the empty clause is derived from
     OUTPUT_PATH = "proof.txt"
\ No newline at end of file
@@ -2,9 +2,48 @@
 Defines constants.
 """
 
-UNASSIGNED = 0.5 # total order on assignments is 0 < UNASSIGNED < 1
+UNASSIGNED = -1 # assignments are 0, 1 or UNASSIGNED
 UNSAT = 0
 SAT = 1
+UNKNOWN = -1 # solving stopped at a budget or an interrupt
 CONFLICT = 0
 UNDECIDED = 0.5
-UNIT = 2
\ No newline at end of file
+UNIT = 2
+
+# vsids modes
+EVSIDS = "evsids"
+LEGACY = "legacy"
+
+# restart strategies
+LUBY = "luby"
+GEOMETRIC = "geometric"
+GLUCOSE = "glucose"
+
+# decision phase modes
+FIXED_PHASE = "fixed"
+SAVED_PHASE = "saved"
+TARGET_PHASE = "target"
+
+# kinds of rephasing
+ORIGINAL = "original"
+INVERTED = "inverted"
+BEST = "best"
+RANDOM = "random"
+
+# proof formats
+RESOLUTION = "resolution"
+DRAT = "drat"
+BINARY_DRAT = "binary_drat"
+LRAT = "lrat"
+
+# profilers
+CPROFILE = "cprofile"
+SAMPLING = "sampling"
+
+# local search algorithms
+PROBSAT = "probsat"
+WALKSAT = "walksat"
+
+# local search modes
+STANDALONE = "standalone"
+HYBRID = "hybrid"
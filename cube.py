@@ -0,0 +1,258 @@
+"""
+Defines cube and conquer solving, which splits a formula into cubes by lookahead and solves the cubes in parallel processes.
+"""
+from constants import *
+from config import *
+from logger import Logger
+from solver import Solver
+from preprocessor import preprocess
+from collections import deque
+import multiprocessing
+import time
+
+class Lookahead:
+    def __init__(self, formula, n_vars):
+        """
+        Initializes unit propagation over occurrence lists, used to score variables for splitting.
+        Unlike the watched literals of the solver, every clause containing a literal = 0 is visited,
+        so the number of clauses a propagation shortens is known.
+            :param formula: Iterable of clauses.
+            :param n_vars: Number of variables in formula.
+        """
+        self.n_vars = n_vars
+        self.clauses = [ list(dict.fromkeys(clause)) for clause in formula ]
+        self.occurrences = {} # { literal: [ clause index ] }
+
+        for literal in range(-n_vars, n_vars + 1):
+            self.occurrences[literal] = []
+
+        for clause_index, clause in enumerate(self.clauses):
+            for literal in clause:
+                self.occurrences[literal].append(clause_index)
+
+        # single literal clauses are assumed by every cube
+        self.units = [ clause[0] for clause in self.clauses if len(clause) == 1 ]
+
+        if any(clause == [] for clause in self.clauses):
+            self.units = None
+
+    def propagate(self, literals):
+        """
+        Assigns the literals 1 and applies unit propagation.
+            :param literals: Literals to assign 1.
+            :returns: Dictionary of { literal: 1 } for every literal assigned 1, and number of clauses shortened,
+                    or None, 0 if a conflict is identified.
+        """
+        assigned = {} # { literal: 1 }
+        queue = []
+
+        for literal in literals:
+            if -literal in assigned:
+                return None, 0
+
+            if literal not in assigned:
+                assigned[literal] = 1
+                queue.append(literal)
+
+        shortened = set()
+        i = 0
+
+        while i < len(queue):
+            false_literal = -queue[i]
+            i += 1
+
+            for clause_index in self.occurrences[false_literal]:
+                unit_literal = None
+                n_unassigned = 0
+
+                for literal in self.clauses[clause_index]:
+                    if literal in assigned:
+                        break
+
+                    if -literal not in assigned:
+                        unit_literal = literal
+                        n_unassigned += 1
+                else:
+                    if n_unassigned == 0:
+                        return None, 0
+
+                    if n_unassigned == 1:
+                        assigned[unit_literal] = 1
+                        queue.append(unit_literal)
+                    else:
+                        shortened.add(clause_index)
+
+        return assigned, len(shortened)
+
+    def split(self, cube, n_candidates):
+        """
+        Picks the variable to split a cube on.
+        Candidates are the unassigned variables in the most clauses, each scored by propagating both of its literals.
+        A literal whose propagation fails is implied false, and added to the cube instead.
+            :param cube: List of literals.
+            :param n_candidates: Number of variables scored.
+            :returns: Variable to split on or None if every variable is assigned, and the cube with implied literals,
+                    or None, None if the cube is refuted.
+        """
+        while True:
+            assigned, score = self.propagate(self.units + cube)
+
+            if assigned == None:
+                return None, None
+
+            candidates = [ variable for variable in range(1, self.n_vars + 1)
+                    if variable not in assigned and -variable not in assigned ]
+
+            if candidates == []:
+                return None, cube
+
+            candidates.sort(key=lambda variable:
+                    -(len(self.occurrences[variable]) + len(self.occurrences[-variable])))
+
+            best_variable = None
+            best_score = -1
+            implied_literal = None
+
+            for variable in candidates[:n_candidates]:
+                positive, positive_score = self.propagate(self.units + cube + [ variable ])
+                negative, negative_score = self.propagate(self.units + cube + [ -variable ])
+
+                if positive == None and negative == None:
+                    return None, None
+
+                # failed literal - the other literal is implied
+                if positive == None or negative == None:
+                    implied_literal = -variable if positive == None else variable
+                    break
+
+                # prefers variables that shorten many clauses on both sides, as in march
+                positive_score += len(positive)
+                negative_score += len(negative)
+                variable_score = 1024 * positive_score * negative_score + positive_score + negative_score
+
+                if variable_score > best_score:
+                    best_variable = variable
+                    best_score = variable_score
+
+            if implied_literal == None:
+                return best_variable, cube
+
+            cube = cube + [ implied_literal ]
+
+def generate_cubes(formula, n_vars, max_depth=None, max_cubes=None, n_candidates=None):
+    """
+    Splits the formula into cubes breadth first, until cubes have max_depth split literals or there are max_cubes cubes.
+    The formula is satisfiable if and only if the formula with the literals of some cube assigned 1 is satisfiable.
+        :param formula: Iterable of clauses.
+        :param n_vars: Number of variables in formula.
+        :param max_depth: Number of splits per cube, defaults to Config.CUBE_DEPTH.
+        :param max_cubes: Number of cubes, defaults to Config.MAX_CUBES.
+        :param n_candidates: Number of variables scored per split, defaults to Config.LOOKAHEAD_CANDIDATES.
+        :returns: List of cubes, number of cubes refuted by lookahead.
+    """
+    max_depth = Config.CUBE_DEPTH if max_depth == None else max_depth
+    max_cubes = Config.MAX_CUBES if max_cubes == None else max_cubes
+    n_candidates = Config.LOOKAHEAD_CANDIDATES if n_candidates == None else n_candidates
+
+    lookahead = Lookahead(formula, n_vars)
+
+    if lookahead.units == None:
+        return [], 1
+
+    queue = deque([ ([], 0) ]) # [ ( cube, depth ) ]
+    cubes = []
+    n_refuted = 0
+
+    while queue:
+        cube, depth = queue.popleft()
+
+        # each split adds 1 cube
+        if depth >= max_depth or len(cubes) + len(queue) + 1 >= max_cubes:
+            cubes.append(cube)
+            continue
+
+        variable, cube = lookahead.split(cube, n_candidates)
+
+        if cube == None:
+            n_refuted += 1
+        elif variable == None:
+            cubes.append(cube)
+        else:
+            queue.append((cube + [ variable ], depth + 1))
+            queue.append((cube + [ -variable ], depth + 1))
+
+    return cubes, n_refuted
+
+def initialize_worker(formula, n_vars):
+    # runs in a worker process, so the formula is only sent once per process
+    # cubes are solved concurrently, so none of them write a proof file
+    # and the formula is preprocessed before it is split, so none of them preprocess it again
+    global worker_solver
+    Config.IS_PROOF = False
+    Config.IS_PREPROCESS = False
+    worker_solver = Solver(formula, n_vars)
+
+def solve_cube(task):
+    # runs in a worker process - each cube is assumed by the solver of the process,
+    # which keeps the clauses it learnt from earlier cubes, since they are implied by the formula alone
+    cube_index, cube = task
+    start_time = time.time()
+    assignments, value = worker_solver.solve(cube)
+
+    return cube_index, assignments, value, time.time() - start_time
+
+def solve_cubes(formula, n_vars, cubes, n_workers=None):
+    """
+    Solves the cubes in a pool of processes, stopping at the first satisfiable cube.
+    The formula is only unsat if every cube is, so a cube stopped by a budget or an interrupt makes the result UNKNOWN.
+    The workers do not preprocess the formula.
+        :param formula: Iterable of clauses.
+        :param n_vars: Number of variables in formula.
+        :param cubes: List of cubes.
+        :param n_workers: Number of processes, defaults to Config.N_WORKERS or the number of cores.
+        :returns: Assignments and value, list of { "cube", "value", "time" } for every cube solved.
+    """
+    n_workers = n_workers or Config.N_WORKERS or multiprocessing.cpu_count()
+    report = []
+    is_unknown = False
+
+    with multiprocessing.get_context().Pool(n_workers, initializer=initialize_worker, initargs=(formula, n_vars)) as pool:
+        for cube_index, assignments, value, solve_time in pool.imap_unordered(solve_cube, enumerate(cubes)):
+            report.append({ "cube": cubes[cube_index], "value": value, "time": solve_time })
+
+            if value == SAT:
+                # leaving the pool terminates the workers solving the other cubes
+                return assignments, SAT, report
+
+            if value == UNKNOWN:
+                is_unknown = True
+
+    return {}, UNKNOWN if is_unknown else UNSAT, report
+
+def cube_and_conquer(formula, n_vars, n_workers=None):
+    """
+    Preprocesses the formula, splits it into cubes by lookahead, then solves the cubes in parallel.
+        :param formula: Iterable of clauses.
+        :param n_vars: Number of variables in formula.
+        :param n_workers: Number of processes, defaults to Config.N_WORKERS or the number of cores.
+        :returns: Assignments and value, list of { "cube", "value", "time" } for every cube solved.
+    """
+    logger = Logger(Config.IS_LOG)
+    preprocessor, formula = preprocess(formula, n_vars)
+
+    start_time = time.time()
+    cubes, n_refuted = generate_cubes(formula, n_vars)
+    logger.log("generated {} cubes in {}s, {} refuted by lookahead".format(len(cubes), time.time() - start_time, n_refuted))
+
+    if cubes == []:
+        return {}, UNSAT, []
+
+    assignments, value, report = solve_cubes(formula, n_vars, cubes, n_workers)
+
+    if value == SAT and preprocessor != None:
+        assignments = preprocessor.extend(assignments)
+
+    for entry in sorted(report, key=lambda entry: -entry["time"]):
+        logger.log("cube {}: value {} in {}s".format(entry["cube"], entry["value"], entry["time"]))
+
+    return assignments, value, report
@@ -1,89 +1,274 @@
 """
-Helper functions for parsing DIMACS CNF file.
+Helper functions for parsing DIMACS CNF files.
 """
 from constants import *
 from exceptions import *
+from array import array
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import os
+
+parse_error_msg = ("Incorrect format. The correct format is as follows: \n" +
+        "An input file may start with comments (each line starts with c). " +
+        "The number of variables and the number of clauses is defined by the line \"p cnf variables clauses\". \n" +
+        "Each of the next lines specifies a clause: a positive variable is denoted by the corresponding number, " +
+        "and a negative variable is denoted by the corresponding negative number. The last number in a clause should be zero.\n" +
+        "For example, \n" +
+        "c A sample .cnf file. \n" +
+        "p cnf 3 2 \n" +
+        "1 -3 0 \n" +
+        "2 3 -1 0 \n")
+
+# magic bytes at the start of compressed files
+compressed_openers = [
+    (b"\x1f\x8b", gzip.open),
+    (b"BZh", bz2.open),
+    (b"\xfd7zXZ\x00", lzma.open),
+]
+
+class CNF:
+    def __init__(self, n_vars, n_clauses):
+        """
+        Initializes an empty CNF formula.
+        The literals of all clauses are stored back to back in a flat integer array,
+        where clause i spans literals[offsets[i]:offsets[i + 1]].
+            :param n_vars: Number of variables declared in the header.
+            :param n_clauses: Number of clauses declared in the header.
+        """
+        self.n_vars = n_vars
+        self.n_clauses = n_clauses
+        self.literals = array("i") # [ literal ]
+        self.offsets = array("q", [ 0 ]) # { clause index: offset of first literal }
+        self.comments = [] # [ comment ]
+
+        # irregularities in the input are reported rather than silently fixed
+        self.duplicate_clauses = [] # [ ( clause index, index of earlier identical clause ) ]
+        self.tautologies = [] # [ clause index ]
+        self.repeated_literals = [] # [ clause index ] - clauses that listed a literal more than once
+        self.is_clause_count_mismatch = False # whether the number of clauses read differs from n_clauses
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.clause(i)
+
+    def __str__(self):
+        return "CNF with {} variables and {} clauses".format(self.n_vars, len(self))
+
+    def clause(self, i):
+        return self.literals[self.offsets[i]:self.offsets[i + 1]].tolist()
 
 def dimacs_parse(dimacs):
     """
-    Reads a DIMACS CNF file, returns clauses.
+    Reads a DIMACS CNF string, returns clauses.
         :param dimacs: string input
         :raises FileFormatError: when file format is wrong
-        :returns: clauses
+        :returns: CNF formula, number of variables
     """
+    formula = dimacs_load(io.BytesIO(dimacs.encode()))
+    return (formula, formula.n_vars)
 
-    parse_error_msg = ("Incorrect format. The correct format is as follows: \n" +
-            "An input file starts with comments (each line starts with c). " + 
-            "The number of variables and the number of clauses is defined by the line \"p cnf variables clauses\". \n" + 
-            "Each of the next lines specifies a clause: a positive variable is denoted by the corresponding number, " + 
-            "and a negative variable is denoted by the corresponding negative number. The last number in a line should be zero.\n" + 
-            "For example, \n" + 
-            "c A sample .cnf file. \n" +  
-            "p cnf 3 2 \n" + 
-            "1 -3 0 \n" + 
-            "2 3 -1 0 \n")
+def dimacs_load(source, use_mmap=False, check_duplicates=True):
+    """
+    Streams a DIMACS CNF file into a CNF formula.
+    Gzip, bzip2 and xz compressed input is decompressed transparently.
+        :param source: Path or binary file object.
+        :param use_mmap: Whether to memory map an uncompressed file and tokenize it in bulk.
+        :param check_duplicates: Whether to report clauses identical to an earlier clause.
+        :raises FileFormatError: when file format is wrong
+        :returns: CNF formula
+    """
+    if isinstance(source, (str, bytes, os.PathLike)):
+        with open(source, "rb") as f:
+            return dimacs_load(f, use_mmap, check_duplicates)
 
-    lines = dimacs.strip().split("\n")
+    stream = open_decompressed(source)
 
-    if not (len(dimacs) >= 2): 
+    if stream == source and use_mmap:
+        try:
+            buffer = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            buffer = None
+
+        if buffer != None:
+            with buffer:
+                return parse_stream(source, check_duplicates, buffer)
+
+    return parse_stream(stream, check_duplicates)
+
+def open_decompressed(stream):
+    # sniffs the magic bytes of a seekable stream, or falls back to the file name
+    try:
+        position = stream.tell()
+        magic = stream.read(6)
+        stream.seek(position)
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        magic = b""
+
+    for prefix, opener in compressed_openers:
+        if magic.startswith(prefix):
+            return opener(stream, "rb")
+
+    name = str(getattr(stream, "name", ""))
+
+    for extension, opener in ((".gz", gzip.open), (".bz2", bz2.open), (".xz", lzma.open)):
+        if name.endswith(extension) and magic == b"":
+            return opener(stream, "rb")
+
+    return stream
+
+def parse_stream(stream, check_duplicates=True, buffer=None):
+    """
+    Parses the header and clauses from a binary stream of lines.
+        :param stream: Binary stream.
+        :param check_duplicates: Whether to report clauses identical to an earlier clause.
+        :param buffer: Memory mapped contents of the stream, tokenized in bulk if it has no comments after the header.
+        :raises FileFormatError: when file format is wrong
+        :returns: CNF formula
+    """
+    formula = None
+    comments = []
+    line_number = 0
+
+    # comments are optional, the header is the first line that is not a comment
+    for line in stream:
+        line_number += 1
+        tokens = line.split()
+
+        if tokens == []:
+            continue
+
+        if tokens[0] == b"c":
+            comments.append(line[1:].strip().decode(errors="replace"))
+            continue
+
+        formula = parse_cnf(tokens, line_number)
+        break
+
+    if formula == None:
         raise FileFormatError(parse_error_msg)
 
-    comments, start = parse_comment(lines)
-    n_vars, n_clauses = parse_cnf(lines, start)
-    formula = parse_formula(lines, n_vars, n_clauses, start + 1)
-    return (formula, n_vars)
+    formula.comments = comments
+    reader = ClauseReader(formula, check_duplicates)
+
+    if buffer != None:
+        body = buffer[stream.tell():]
+
+        # fast path - tokenizes the whole body at once when there is nothing but clauses
+        if b"c" not in body and b"%" not in body:
+            reader.read(body.split(), line_number + 1)
+            reader.finish()
+            return formula
+
+    for line in stream:
+        line_number += 1
+        tokens = line.split()
+
+        if tokens == []:
+            continue
+
+        if tokens[0] == b"c":
+            formula.comments.append(line[1:].strip().decode(errors="replace"))
+            continue
 
-def parse_comment(lines):
-    hasComment = False
-    
-    for i in range(len(lines)):
-        tokens = lines[i].strip().split()
-        
-        if not (tokens[0] == "c"):
-            if not hasComment:
-                raise FileFormatError("Incorrect comment format, should be \"c <COMMENT>\"")
+        # end of formula marker used by SATLIB benchmarks
+        if tokens[0] == b"%":
+            break
 
-            return lines[0:i], i
+        reader.read(tokens, line_number)
 
-        hasComment = True
+    reader.finish()
+    return formula
 
-def parse_cnf(lines, start):
-    cnf_error_msg = "Incorrect format of 2nd line, should be \"p cnf <NUM OF VARIABLES> <NUM OF CLAUSES>\""
-    tokens = lines[start].strip().split()
+def parse_cnf(tokens, line_number):
+    cnf_error_msg = "Incorrect format of line {}, should be \"p cnf <NUM OF VARIABLES> <NUM OF CLAUSES>\"".format(line_number)
 
-    if not (tokens[0] == "p" and tokens[1] == "cnf" and len(tokens) == 4):
+    if not (len(tokens) == 4 and tokens[0] == b"p" and tokens[1] == b"cnf"):
         raise FileFormatError(cnf_error_msg)
 
     try:
         n_vars = int(tokens[2])
         n_clauses = int(tokens[3])
-    except ValueError as e:
-        print(e)
-        print(cnf_error_msg)
+    except ValueError:
+        raise FileFormatError(cnf_error_msg)
 
-    return (n_vars, n_clauses)
+    if n_vars < 0 or n_clauses < 0:
+        raise FileFormatError(cnf_error_msg)
 
-def parse_formula(lines, n_vars, n_clauses, start):
-    formula = set()
+    return CNF(n_vars, n_clauses)
 
-    for i in range(start, start + n_clauses):
-        tokens = lines[i].strip().split()
-        
-        if not (tokens[-1] == "0"):
-            raise FileFormatError("The last number in a clause should be 0.")
-        
-        tokens = tokens[:-1]
+class ClauseReader:
+    def __init__(self, formula, check_duplicates=True):
+        """
+        Appends clauses to a formula from tokens, where clauses may span any number of lines.
+            :param formula: CNF formula with header read.
+            :param check_duplicates: Whether to report clauses identical to an earlier clause.
+        """
+        self.formula = formula
+        self.check_duplicates = check_duplicates
+        self.clause_indices = {} # { sorted clause: index of first clause with those literals }
+        self.clause = [] # literals of the clause being read
+        self.line_number = 0
 
-        try:
-            clause = set()
+    def read(self, tokens, line_number):
+        self.line_number = line_number
+        n_vars = self.formula.n_vars
+        clause = self.clause
 
-            for token in tokens:                
+        for token in tokens:
+            try:
                 literal = int(token)
-                clause.add(literal) # variable is an integer, with a negative integer denoting a negation of the literal
+            except ValueError:
+                raise FileFormatError("Error on line {}, variable should be a nonzero number.".format(line_number))
+
+            if literal == 0:
+                self.end_clause()
+                clause = self.clause
+            elif -n_vars <= literal <= n_vars:
+                clause.append(literal)
+            else:
+                raise FileFormatError("Error on line {}, variable {} exceeds the number of variables {}.".format(
+                        line_number, abs(literal), n_vars))
+
+    def end_clause(self):
+        formula = self.formula
+        index = len(formula)
+        clause = self.clause
+        literals = set(clause)
+
+        if len(literals) != len(clause):
+            # a literal may only appear once, later copies are dropped
+            formula.repeated_literals.append(index)
+            clause = list(dict.fromkeys(clause))
+
+        if any(-literal in literals for literal in clause):
+            formula.tautologies.append(index)
+
+        if self.check_duplicates:
+            # keyed on the literals themselves, so clauses with colliding hashes are still told apart
+            key = tuple(sorted(clause))
+            earlier = self.clause_indices.get(key)
+
+            if earlier == None:
+                self.clause_indices[key] = index
+            else:
+                formula.duplicate_clauses.append((index, earlier))
+
+        formula.literals.extend(clause)
+        formula.offsets.append(len(formula.literals))
+        self.clause = []
+
+    def finish(self):
+        if self.clause != []:
+            raise FileFormatError("Error on line {}, the last number in a clause should be 0.".format(self.line_number))
 
-        except ValueError as e:
-            print("Error, variable should be a nonzero number.")
-            
-        formula.add(frozenset(clause))
+        # a clause count that differs from the header is reported rather than rejected
+        if len(self.formula) != self.formula.n_clauses:
+            self.formula.is_clause_count_mismatch = True
 
-    return formula
\ No newline at end of file
+        self.clause_indices = None
@@ -4,4 +4,12 @@ Defines exceptions.
 
 class FileFormatError(Exception):
     """ Raised when file format is not in DIMACS CNF format """
-    pass
\ No newline at end of file
+    pass
+
+class ProofError(Exception):
+    """ Raised when a proof is malformed or a resolution step is invalid """
+    pass
+
+class ConfigError(Exception):
+    """ Raised when settings in Config conflict """
+    pass
@@ -0,0 +1,317 @@
+"""
+Defines stochastic local search, which flips variables of unsatisfied clauses until every clause is satisfied.
+It cannot show a formula is unsat, but usually finds models of satisfiable random formulas faster than cdcl.
+"""
+from constants import *
+from config import *
+from solver import Solver
+import numpy as np
+import time
+
+class LocalSearch:
+    def __init__(self, formula, n_vars, n_walkers=32, algorithm=PROBSAT, cb=2.06, eps=0.9, noise=0.567, seed=0):
+        """
+        Initializes walkers that each flip one variable per step, where the steps of every walker are taken at once
+        on numpy arrays. Clauses are rows of a matrix of variables padded with variable 0, which is never picked.
+        The break count of a variable is the number of clauses it alone satisfies, which become unsat if it is flipped.
+        Break counts are updated on every flip from the number of literals = 1 in each clause
+        and the xor of their variables, which is the variable that alone satisfies a clause with 1 literal = 1.
+        Each walker keeps a packed list of its unsat clauses with the position of every clause in it,
+        so an unsat clause is sampled without scanning every clause.
+            :param formula: Iterable of clauses.
+            :param n_vars: Number of variables in formula.
+            :param n_walkers: Number of walkers.
+            :param algorithm: PROBSAT picks the variable to flip with weight (eps + break count) ^ -cb,
+                    WALKSAT picks a variable with break count 0 if there is one, else a random variable
+                    with probability noise, else a variable with the least break count.
+            :param cb: Probsat base.
+            :param eps: Probsat offset of break counts.
+            :param noise: Walksat probability of a random flip.
+            :param seed: Seed of initial assignments and flips.
+        """
+        self.n_vars = n_vars
+        self.n_walkers = n_walkers
+        self.algorithm = algorithm
+        self.cb = cb
+        self.eps = eps
+        self.noise = noise
+        self.random = np.random.RandomState(seed)
+
+        # tautologies are always satisfied, so they are left out
+        clauses = []
+
+        for clause in formula:
+            clause = list(dict.fromkeys(clause))
+
+            if not any(-literal in clause for literal in clause):
+                clauses.append(clause)
+
+        self.is_empty_clause = any(clause == [] for clause in clauses)
+        self.n_clauses = len(clauses)
+        width = max([ len(clause) for clause in clauses ] + [ 1 ])
+
+        # { clause index: [ variable ] } and { clause index: [ value satisfying the literal ] }, padded with variable 0
+        self.variables = np.zeros((self.n_clauses, width), dtype=np.int64)
+        self.signs = np.zeros((self.n_clauses, width), dtype=np.int8)
+
+        occurrences = [ [] for variable in range(n_vars + 1) ] # { variable: [ ( clause index, sign ) ] }
+
+        for clause_index, clause in enumerate(clauses):
+            for position, literal in enumerate(clause):
+                self.variables[clause_index, position] = abs(literal)
+                self.signs[clause_index, position] = literal > 0
+                occurrences[abs(literal)].append((clause_index, literal > 0))
+
+        # { variable: [ clause index ] } and { variable: [ sign ] }, padded with clause index n_clauses,
+        # an extra column of the clause state that is never read
+        depth = max([ len(clause_indices) for clause_indices in occurrences ] + [ 1 ])
+        self.occurrences = np.full((n_vars + 1, depth), self.n_clauses, dtype=np.int64)
+        self.occurrence_signs = np.zeros((n_vars + 1, depth), dtype=np.int8)
+
+        for variable, clause_indices in enumerate(occurrences):
+            for position, (clause_index, sign) in enumerate(clause_indices):
+                self.occurrences[variable, position] = clause_index
+                self.occurrence_signs[variable, position] = sign
+
+        self.flips = 0
+        self.steps = 0
+        self.search_time = 0
+        self.solution_time = None # seconds of search until a model is found
+        self.best_unsat = None
+        self.best = None # [ value ], the assignment with the fewest unsat clauses seen
+
+        self.restart()
+
+    def restart(self):
+        # gives every walker a random assignment
+        n_walkers = self.n_walkers
+
+        self.assignments = self.random.randint(0, 2, size=(n_walkers, self.n_vars + 1)).astype(np.int8)
+        self.assignments[:, 0] = 0
+
+        is_true = (self.assignments[:, self.variables] == self.signs) & (self.variables > 0)
+        self.true_counts = np.zeros((n_walkers, self.n_clauses + 1), dtype=np.int64) # { walker: { clause index: count } }
+        self.true_counts[:, :self.n_clauses] = is_true.sum(axis=2)
+        self.critical = np.zeros((n_walkers, self.n_clauses + 1), dtype=np.int64) # { walker: { clause index: xor } }
+        self.critical[:, :self.n_clauses] = np.bitwise_xor.reduce(np.where(is_true, self.variables, 0), axis=2)
+
+        self.breaks = np.zeros((n_walkers, self.n_vars + 1), dtype=np.int64) # { walker: { variable: break count } }
+        walkers, clause_indices = np.nonzero(self.true_counts[:, :self.n_clauses] == 1)
+        np.add.at(self.breaks, (walkers, self.critical[walkers, clause_indices]), 1)
+
+        self.unsat = np.zeros((n_walkers, self.n_clauses), dtype=np.int64) # { walker: [ clause index ] }
+        self.unsat_positions = np.full((n_walkers, self.n_clauses), -1, dtype=np.int64) # { walker: { clause index: position } }
+        self.n_unsat = np.zeros(n_walkers, dtype=np.int64) # { walker: number of unsat clauses }
+        self.add_unsat(*np.nonzero(self.true_counts[:, :self.n_clauses] == 0))
+
+        self.update_best()
+
+    def update_best(self):
+        n_unsat = self.n_unsat
+        walker = int(np.argmin(n_unsat))
+
+        if self.best_unsat == None or n_unsat[walker] < self.best_unsat:
+            self.best_unsat = int(n_unsat[walker])
+            self.best = self.assignments[walker].copy()
+
+    def solve(self, max_flips=None, time_limit=None):
+        """
+        Flips variables until a walker satisfies every clause.
+            :param max_flips: Number of flips per walker, None is unlimited.
+            :param time_limit: Seconds, None is unlimited.
+            :returns: Dictionary of { variable: value } and SAT if a model is found,
+                    or the best assignment found and UNKNOWN.
+        """
+        if self.is_empty_clause:
+            return self.get_assignments(), UNKNOWN
+
+        start_time = time.perf_counter()
+        last_step = None if max_flips == None else self.steps + max_flips
+        value = UNKNOWN
+
+        while self.best_unsat > 0:
+            if last_step != None and self.steps >= last_step:
+                break
+
+            # the clock is read every 256 steps
+            if time_limit != None and self.steps % 256 == 0 and time.perf_counter() - start_time > time_limit:
+                break
+
+            self.step()
+
+        if self.best_unsat == 0:
+            value = SAT
+
+        self.search_time += time.perf_counter() - start_time
+
+        if value == SAT and self.solution_time == None:
+            self.solution_time = self.search_time
+
+        return self.get_assignments(), value
+
+    def step(self):
+        # every walker picks an unsat clause at random, then flips one of its variables
+        n_walkers = self.n_walkers
+        walkers = np.arange(n_walkers)
+        is_flipping = self.n_unsat > 0
+
+        # walkers without unsat clauses read a stale entry, but do not flip
+        ranks = (self.random.random_sample(n_walkers) * self.n_unsat).astype(np.int64)
+        clause_indices = self.unsat[walkers, ranks]
+
+        candidates = self.variables[clause_indices] # { walker: [ variable ] }
+        is_candidate = candidates > 0
+        breaks = self.breaks[walkers[:, None], candidates]
+
+        if self.algorithm == PROBSAT:
+            weights = np.where(is_candidate, (self.eps + breaks) ** -self.cb, 0)
+            totals = np.cumsum(weights, axis=1)
+            positions = np.argmax(totals > self.random.random_sample(n_walkers)[:, None] * totals[:, -1:], axis=1)
+        else:
+            breaks = np.where(is_candidate, breaks, np.iinfo(np.int64).max)
+            least = breaks.min(axis=1)
+            is_random = (least > 0) & (self.random.random_sample(n_walkers) < self.noise)
+            is_picked = np.where(is_random[:, None], is_candidate, breaks == least[:, None])
+            positions = np.argmax(is_picked * self.random.random_sample(candidates.shape), axis=1)
+
+        # walkers that already satisfy every clause do not flip
+        self.flip(walkers[is_flipping], candidates[walkers, positions][is_flipping])
+
+        self.steps += 1
+        self.flips += int(is_flipping.sum())
+        self.update_best()
+
+    def flip(self, walkers, variables):
+        """
+        Flips one variable per walker, and updates the number of literals = 1, xors and break counts of its clauses,
+        and the unsat lists of the walkers.
+            :param walkers: Array of walkers.
+            :param variables: Array of the variable each walker flips.
+            :returns: None.
+        """
+        rows = walkers[:, None]
+        values = 1 - self.assignments[walkers, variables]
+        self.assignments[walkers, variables] = values
+
+        clause_indices = self.occurrences[variables]
+        is_occurrence = clause_indices < self.n_clauses
+        is_true = self.occurrence_signs[variables] == values[:, None] # whether the literal becomes 1
+        counts = self.true_counts[rows, clause_indices]
+        critical = self.critical[rows, clause_indices]
+
+        self.true_counts[rows, clause_indices] = counts + np.where(is_true, 1, -1)
+        self.critical[rows, clause_indices] = critical ^ variables[:, None]
+
+        # a clause the variable alone satisfies is broken if the variable is flipped back
+        is_satisfied = is_occurrence & is_true & (counts == 0)
+        is_broken = is_occurrence & ~is_true & (counts == 1)
+        self.breaks[walkers, variables] += is_satisfied.sum(axis=1) - is_broken.sum(axis=1)
+
+        rows_satisfied, columns_satisfied = np.nonzero(is_satisfied)
+        self.remove_unsat(walkers[rows_satisfied], clause_indices[rows_satisfied, columns_satisfied])
+        rows_broken, columns_broken = np.nonzero(is_broken)
+        self.add_unsat(walkers[rows_broken], clause_indices[rows_broken, columns_broken])
+
+        # the variable that alone satisfied a clause no longer does once another literal = 1,
+        # and the other variable of a clause with 2 literals = 1 alone satisfies it once the literal = 0
+        changes = np.where(is_occurrence & is_true & (counts == 1), -1,
+                np.where(is_occurrence & ~is_true & (counts == 2), 1, 0))
+        others = np.where(is_true, critical, critical ^ variables[:, None])
+        np.add.at(self.breaks, (np.broadcast_to(rows, others.shape), np.where(changes != 0, others, 0)), changes)
+
+    def add_unsat(self, walkers, clause_indices):
+        """
+        Appends clauses to the unsat lists of their walkers.
+            :param walkers: Array of walkers.
+            :param clause_indices: Array of the clause appended to the list of each walker.
+            :returns: None.
+        """
+        order = np.argsort(walkers, kind="stable")
+        walkers = walkers[order]
+        clause_indices = clause_indices[order]
+
+        # clauses of the same walker are appended in order after the end of its list
+        counts = np.bincount(walkers, minlength=self.n_walkers)
+        ranks = np.arange(len(walkers)) - np.repeat(np.cumsum(counts) - counts, counts)
+        positions = self.n_unsat[walkers] + ranks
+
+        self.unsat[walkers, positions] = clause_indices
+        self.unsat_positions[walkers, clause_indices] = positions
+        self.n_unsat = self.n_unsat + counts
+
+    def remove_unsat(self, walkers, clause_indices):
+        """
+        Removes clauses from the unsat lists of their walkers, keeping the lists packed.
+            :param walkers: Array of walkers.
+            :param clause_indices: Array of the clause removed from the list of each walker.
+            :returns: None.
+        """
+        counts = np.bincount(walkers, minlength=self.n_walkers)
+        lengths = self.n_unsat - counts
+        holes = self.unsat_positions[walkers, clause_indices]
+        self.unsat_positions[walkers, clause_indices] = -1
+
+        # removed clauses before the new end of a list leave holes, filled by the clauses after it that stay,
+        # of which each walker has as many as it has holes
+        is_hole = holes < lengths[walkers]
+        hole_walkers = walkers[is_hole]
+        holes = holes[is_hole]
+        order = np.lexsort((holes, hole_walkers))
+        hole_walkers = hole_walkers[order]
+        holes = holes[order]
+
+        tail_walkers = np.repeat(np.arange(self.n_walkers), counts)
+        tail_positions = lengths[tail_walkers] + np.arange(len(tail_walkers)) - np.repeat(np.cumsum(counts) - counts, counts)
+        tail_clauses = self.unsat[tail_walkers, tail_positions]
+        moved_clauses = tail_clauses[self.unsat_positions[tail_walkers, tail_clauses] >= 0]
+
+        self.unsat[hole_walkers, holes] = moved_clauses
+        self.unsat_positions[hole_walkers, moved_clauses] = holes
+        self.n_unsat = lengths
+
+    def get_assignments(self):
+        # returns the best assignment found as { variable: value }
+        return { variable: int(self.best[variable]) for variable in range(1, self.n_vars + 1) }
+
+    def get_stats(self):
+        return { "flips": self.flips, "steps": self.steps, "time": self.search_time,
+                "flips_per_second": self.flips / self.search_time if self.search_time > 0 else 0,
+                "time_to_solution": self.solution_time, "best_unsat": self.best_unsat }
+
+def create_local_search(formula, n_vars):
+    # creates local search with the settings in Config
+    return LocalSearch(formula, n_vars, Config.N_WALKERS, Config.LOCAL_SEARCH_ALGORITHM, Config.PROBSAT_CB,
+            Config.PROBSAT_EPS, Config.WALKSAT_NOISE, Config.SEED)
+
+def solve_local_search(formula, n_vars):
+    """
+    Solves the formula with local search alone, which stops with UNKNOWN at the flip or time limit,
+    and never on an unsat formula without one.
+        :param formula: Iterable of clauses.
+        :param n_vars: Number of variables in formula.
+        :returns: Assignments, value and statistics of the search.
+    """
+    search = create_local_search(formula, n_vars)
+    assignments, value = search.solve(Config.MAX_FLIPS, Config.LOCAL_SEARCH_TIME_LIMIT)
+
+    return assignments, value, search.get_stats()
+
+def solve_hybrid(formula, n_vars):
+    """
+    Solves the formula with local search, then with cdcl from the saved phases of the best assignment found
+    if local search stops without a model.
+        :param formula: Iterable of clauses.
+        :param n_vars: Number of variables in formula.
+        :returns: Assignments, value and statistics of the local search.
+    """
+    search = create_local_search(formula, n_vars)
+    assignments, value = search.solve(Config.MAX_FLIPS, Config.LOCAL_SEARCH_TIME_LIMIT)
+
+    if value == SAT:
+        return assignments, value, search.get_stats()
+
+    solver = Solver(formula, n_vars)
+    solver.set_phases(assignments)
+    assignments, value = solver.solve()
+
+    return assignments, value, search.get_stats()
@@ -1,5 +1,11 @@
 from dimacs_parser import *
 from solver import *
+from portfolio import solve_portfolio
+from cube import cube_and_conquer
+from cache import solve_cached
+from local_search import solve_local_search, solve_hybrid
+from symmetry import solve_symmetry_broken
+from exceptions import *
 import os
 import copy
 import time
@@ -13,7 +19,28 @@ test_case_2 = "c Test case 2.\np cnf 5 3\n1 5 -2 0\n1 -3 0\n 2 3 4 0"
 test_case_3 = "c Test case 3.\np cnf 8 6\n3 2 -8 0\n3 -7 0\n8 7 4 0\n-4 -5 0\n1 -4 -6 0\n5 6 0"
 test_case_4 = "c Test case 4(UNSAT).\np cnf 2 4\n1 2 0\n-1 -2 0\n-1 2 0\n1 -2 0"
 
+def check_modes():
+    """
+    Checks that at most one solving mode is enabled in Config, since each mode solves the formula its own way.
+    N_WORKERS also sets the number of cube and conquer processes, so it only selects the portfolio solver on its own.
+        :raises ConfigError: when more than one mode is enabled
+        :returns: None.
+    """
+    modes = [
+        ("IS_CUBE_AND_CONQUER", Config.IS_CUBE_AND_CONQUER),
+        ("LOCAL_SEARCH_MODE", Config.LOCAL_SEARCH_MODE != None),
+        ("IS_SYMMETRY_BREAKING", Config.IS_SYMMETRY_BREAKING),
+        ("IS_CACHE", Config.IS_CACHE),
+        ("N_WORKERS", Config.N_WORKERS != 1 and not Config.IS_CUBE_AND_CONQUER),
+    ]
+    enabled = [ name for name, is_enabled in modes if is_enabled ]
+
+    if len(enabled) > 1:
+        raise ConfigError("Only one solving mode can be enabled, but {} are set.".format(", ".join(enabled)))
+
 def main():
+    check_modes()
+
     # print("\n".join(sat_paths))    
     # print("\n".join(unsat_paths))
 
@@ -21,15 +48,41 @@ def main():
     # path = sat_paths[4]
     path = r'unsat_cases/pigeon-hole/hole8.cnf'
 
-    with open(os.path.join(os.getcwd(), path)) as f:
-        test_case = f.read()
-
-    formula, n_vars = dimacs_parse(test_case)
+    formula = dimacs_load(os.path.join(os.getcwd(), path))
+    n_vars = formula.n_vars
     print("formula: " + str(formula))
+    print("duplicate clauses: {}, tautologies: {}, clauses with repeated literals: {}".format(
+            len(formula.duplicate_clauses), len(formula.tautologies), len(formula.repeated_literals)))
+
+    if formula.is_clause_count_mismatch:
+        print("warning: header declares {} clauses but {} were read".format(formula.n_clauses, len(formula)))
 
     start_time = time.time()
-    solver = Solver(formula, n_vars)
-    solver.solve()
+
+    if Config.IS_CUBE_AND_CONQUER:
+        assignments, value, report = cube_and_conquer(formula, n_vars)
+        print("solved {} cubes, slowest in {}s".format(len(report), max([ entry["time"] for entry in report ] + [ 0 ])))
+    elif Config.LOCAL_SEARCH_MODE != None:
+        if Config.LOCAL_SEARCH_MODE == HYBRID:
+            assignments, value, stats = solve_hybrid(formula, n_vars)
+        else:
+            assignments, value, stats = solve_local_search(formula, n_vars)
+
+        print("local search: {} flips, {:.0f} flips per second, time to solution {}".format(
+                stats["flips"], stats["flips_per_second"], stats["time_to_solution"]))
+    elif Config.IS_SYMMETRY_BREAKING:
+        assignments, value, generators = solve_symmetry_broken(formula, n_vars)
+        print("broke symmetries of {} generators".format(len(generators)))
+    elif Config.IS_CACHE:
+        assignments, value = solve_cached(formula, n_vars)
+    elif Config.N_WORKERS != 1:
+        assignments, value, solver_id = solve_portfolio(formula, n_vars)
+        print("answered by portfolio solver {}".format(solver_id))
+    else:
+        solver = Solver(formula, n_vars)
+        assignments, value = solver.solve()
+
+    print("value: {}".format(value))
     print("time taken: " + str(time.time() - start_time))
 
 if __name__ == "__main__":
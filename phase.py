@@ -0,0 +1,106 @@
+"""
+Defines the phases used to pick the value of branching variables.
+"""
+from constants import *
+import random
+
+UNSET = -1
+
+class Phases:
+    def __init__(self, n_vars, mode=TARGET_PHASE, default_phase=0, schedule=(), seed=0):
+        """
+        Initializes the phases of every variable.
+        Saved phases hold the last value of each variable before it was unassigned.
+        Target phases hold the values in the longest trail without conflict since the last restart,
+        best phases hold the values in the longest trail without conflict since the last rephase.
+            :param n_vars: Number of variables in formula.
+            :param mode: FIXED_PHASE picks the default phase, SAVED_PHASE picks the saved phase,
+                    TARGET_PHASE picks the target phase if set and the saved phase otherwise.
+            :param default_phase: Value picked in FIXED_PHASE mode, and the initial saved phase.
+            :param schedule: Sequence of ORIGINAL, INVERTED, BEST and RANDOM, cycled through on every rephase.
+            :param seed: Seed of random rephasing.
+        """
+        self.n_vars = n_vars
+        self.mode = mode
+        self.default_phase = default_phase
+        self.schedule = list(schedule)
+        self.random = random.Random(seed)
+
+        self.saved = [ default_phase ] * (n_vars + 1) # { variable: value }
+        self.target = [ UNSET ] * (n_vars + 1) # { variable: value }
+        self.best = [ UNSET ] * (n_vars + 1) # { variable: value }
+        self.target_size = 0
+        self.best_size = 0
+        self.rephases = 0
+
+    def add_variables(self, count):
+        self.n_vars += count
+        self.saved += [ self.default_phase ] * count
+        self.target += [ UNSET ] * count
+        self.best += [ UNSET ] * count
+
+    def pick(self, variable):
+        if self.mode == FIXED_PHASE:
+            return self.default_phase
+
+        if self.mode == TARGET_PHASE and self.target[variable] != UNSET:
+            return self.target[variable]
+
+        return self.saved[variable]
+
+    def save(self, literal):
+        # called when the variable of a literal assigned 1 is unassigned
+        self.saved[abs(literal)] = 1 if literal > 0 else 0
+
+    def update(self, trail, size):
+        """
+        Records the first literals of the trail as target and best phases if they are the longest trail seen.
+            :param trail: Literals assigned 1 in assignment order.
+            :param size: Number of literals at the start of the trail that do not lead to a conflict.
+            :returns: None.
+        """
+        if size > self.target_size:
+            self.target_size = size
+            self.copy_trail(trail, size, self.target)
+
+        if size > self.best_size:
+            self.best_size = size
+            self.copy_trail(trail, size, self.best)
+
+    def copy_trail(self, trail, size, phases):
+        for i in range(size):
+            literal = trail[i]
+            phases[abs(literal)] = 1 if literal > 0 else 0
+
+    def on_restart(self):
+        # target phases are only replaced by a longer trail found after the restart
+        self.target_size = 0
+
+    def rephase(self):
+        """
+        Resets the saved phases to the next kind of phase in the schedule.
+        Target phases are cleared, so the reset saved phases are picked until a new target trail is found.
+            :returns: Kind of phase the saved phases were reset to.
+        """
+        kind = self.schedule[self.rephases % len(self.schedule)]
+        self.rephases += 1
+        saved = self.saved
+
+        for variable in range(1, self.n_vars + 1):
+            if kind == ORIGINAL:
+                saved[variable] = self.default_phase
+            elif kind == INVERTED:
+                saved[variable] = 1 - self.default_phase
+            elif kind == RANDOM:
+                saved[variable] = self.random.randint(0, 1)
+            elif kind == BEST and self.best[variable] != UNSET:
+                saved[variable] = self.best[variable]
+
+            self.target[variable] = UNSET
+
+        if kind == BEST:
+            self.best_size = 0
+
+        self.target_size = 0
+
+        return kind
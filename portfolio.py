@@ -0,0 +1,207 @@
+"""
+Defines a portfolio solver, which runs diversified solvers in parallel processes on the same formula.
+"""
+from constants import *
+from config import *
+from logger import Logger
+from solver import Solver
+from preprocessor import preprocess
+import multiprocessing
+import queue
+
+class ClauseRing:
+    def __init__(self, capacity, context=multiprocessing):
+        """
+        Initializes a ring buffer of integers in shared memory, which solvers append learnt clauses to.
+        Each clause is written as the id of the sending solver + 1, the number of literals, then the literals.
+        Readers that fall more than a full buffer behind skip the clauses that were overwritten.
+            :param capacity: Number of integers in the buffer.
+            :param context: Multiprocessing context the shared memory is created with.
+        """
+        self.capacity = capacity
+        self.buffer = context.Array("i", capacity, lock=False)
+        self.head = context.Value("q", 0, lock=False) # number of integers written since the start
+        self.lock = context.Lock()
+
+class ClauseExchange:
+    def __init__(self, ring, solver_id, max_lbd, max_size):
+        """
+        Exports the short learnt clauses with low lbd of a solver to a clause ring, and imports those of other solvers.
+            :param ring: Clause ring shared by all solvers.
+            :param solver_id: Id of solver, so its own clauses are not imported.
+            :param max_lbd: Learnt clauses with lbd above this are not exported, except single literal clauses.
+            :param max_size: Learnt clauses with more literals than this are not exported.
+        """
+        self.ring = ring
+        self.solver_id = solver_id
+        self.max_lbd = max_lbd
+        self.max_size = max_size
+        self.position = ring.head.value # number of integers read since the start
+        self.exported = 0
+        self.imported = 0
+
+    def export_clause(self, clause, lbd):
+        if len(clause) > self.max_size or (lbd > self.max_lbd and len(clause) > 1):
+            return
+
+        ring = self.ring
+        entry = [ self.solver_id + 1, len(clause) ] + list(clause)
+
+        with ring.lock:
+            head = ring.head.value
+
+            for i, value in enumerate(entry):
+                ring.buffer[(head + i) % ring.capacity] = value
+
+            ring.head.value = head + len(entry)
+
+        self.exported += 1
+
+    def import_clauses(self):
+        """
+        Reads the clauses written by other solvers since the last import.
+            :returns: List of clauses.
+        """
+        ring = self.ring
+
+        with ring.lock:
+            head = ring.head.value
+
+            if head - self.position > ring.capacity:
+                # the unread clauses were overwritten
+                self.position = head
+
+            values = [ ring.buffer[i % ring.capacity] for i in range(self.position, head) ]
+            self.position = head
+
+        clauses = []
+        i = 0
+
+        while i < len(values):
+            sender = values[i] - 1
+            size = values[i + 1]
+
+            if sender != self.solver_id:
+                clauses.append(values[i + 2:i + 2 + size])
+
+            i += 2 + size
+
+        self.imported += len(clauses)
+
+        return clauses
+
+    def get_stats(self):
+        return { "exported": self.exported, "imported": self.imported }
+
+def diversify(solver_id):
+    """
+    Gets the settings a solver in the portfolio overrides in Config, so each solver searches differently.
+    The first solver keeps the default settings.
+        :param solver_id: Id of solver.
+        :returns: Dictionary of { setting: value }.
+    """
+    settings = [
+        {},
+        { "RESTART_STRATEGY": LUBY, "PHASE_MODE": SAVED_PHASE },
+        { "RESTART_STRATEGY": GEOMETRIC, "DEFAULT_PHASE": 1 },
+        { "VSIDS_MODE": LEGACY, "PHASE_MODE": FIXED_PHASE },
+        { "RESTART_STRATEGY": LUBY, "DEFAULT_PHASE": 1 },
+        { "IS_VSIDS": False, "RESTART_STRATEGY": LUBY },
+    ]
+
+    overrides = dict(settings[solver_id % len(settings)])
+
+    # solvers beyond the fixed settings rephase at random with their own seed
+    if solver_id >= len(settings):
+        overrides["REPHASE_SCHEDULE"] = [ RANDOM, BEST ]
+        overrides["REPHASE_INTERVAL"] = Config.REPHASE_INTERVAL // 2
+
+    overrides["SEED"] = Config.SEED + solver_id
+
+    # solvers run concurrently, so none of them write a proof file
+    # and the formula is preprocessed before it is sent to them, so none of them preprocess it again
+    overrides["IS_PROOF"] = False
+    overrides["IS_PREPROCESS"] = False
+
+    return overrides
+
+def run_solver(solver_id, formula, n_vars, overrides, results, ring, max_lbd, max_size):
+    # runs in a worker process
+    for name, value in overrides.items():
+        setattr(Config, name, value)
+
+    solver = Solver(formula, n_vars)
+
+    if ring != None:
+        solver.clause_exchange = ClauseExchange(ring, solver_id, max_lbd, max_size)
+
+    assignments, value = solver.solve()
+    results.put((solver_id, assignments, value))
+
+def solve_portfolio(formula, n_vars, n_workers=None, is_sharing=None):
+    """
+    Preprocesses the formula, then solves it with diversified solvers in parallel processes.
+    The first answer wins, and the other solvers are stopped.
+        :param formula: Iterable of clauses, which is sent to every process.
+        :param n_vars: Number of variables in formula.
+        :param n_workers: Number of processes, defaults to Config.N_WORKERS or the number of cores.
+        :param is_sharing: Whether solvers exchange learnt clauses, defaults to Config.IS_SHARING.
+        :returns: Assignments and value of the winning solver, id of the winning solver,
+                or UNKNOWN and None if every solver was stopped without an answer.
+    """
+    logger = Logger(Config.IS_LOG)
+    n_workers = n_workers or Config.N_WORKERS or multiprocessing.cpu_count()
+    is_sharing = Config.IS_SHARING if is_sharing == None else is_sharing
+    preprocessor, formula = preprocess(formula, n_vars)
+
+    context = multiprocessing.get_context()
+    results = context.Queue()
+    ring = ClauseRing(Config.SHARE_BUFFER_SIZE, context) if is_sharing else None
+
+    processes = [ context.Process(target=run_solver, daemon=True,
+            args=(solver_id, formula, n_vars, diversify(solver_id), results, ring, Config.SHARE_LBD, Config.SHARE_SIZE))
+            for solver_id in range(n_workers) ]
+
+    for process in processes:
+        process.start()
+
+    # solvers stopped by a budget or an interrupt answer UNKNOWN, which only wins once no other solver can answer
+    n_unknown = 0
+
+    try:
+        while True:
+            try:
+                solver_id, assignments, value = results.get(timeout=0.1)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes) and results.empty():
+                    if n_unknown > 0:
+                        solver_id, assignments, value = None, {}, UNKNOWN
+                        break
+
+                    raise RuntimeError("every solver in the portfolio stopped without an answer")
+
+                continue
+
+            if value != UNKNOWN:
+                break
+
+            n_unknown += 1
+
+            if n_unknown == n_workers:
+                solver_id, assignments = None, {}
+                break
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+        for process in processes:
+            process.join()
+
+    if value == SAT and preprocessor != None:
+        assignments = preprocessor.extend(assignments)
+
+    if solver_id != None:
+        logger.log("portfolio solver {} answered with settings {}".format(solver_id, diversify(solver_id)))
+
+    return assignments, value, solver_id
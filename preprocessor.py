@@ -0,0 +1,365 @@
+"""
+Defines a preprocessor, which simplifies a formula before it is solved.
+"""
+from constants import *
+from config import *
+from collections import deque
+import time
+
+def preprocess(formula, n_vars):
+    """
+    Simplifies the formula once, for solvers in other processes that are then started with IS_PREPROCESS off.
+        :param formula: Iterable of clauses.
+        :param n_vars: Number of variables in formula.
+        :returns: Preprocessor, or None if IS_PREPROCESS is off, and the simplified clauses.
+    """
+    if not Config.IS_PREPROCESS:
+        return None, [ list(clause) for clause in formula ]
+
+    preprocessor = Preprocessor(formula, n_vars, Config.PREPROCESS_TIME_LIMIT,
+            Config.BVE_OCCURRENCE_LIMIT, Config.BVE_CLAUSE_LIMIT, Config.BVE_GROWTH)
+
+    return preprocessor, preprocessor.simplify()
+
+class Preprocessor:
+    def __init__(self, formula, n_vars, time_limit=1.0, occurrence_limit=10, clause_limit=20, growth=0, proof=None):
+        """
+        Initializes the preprocessor with the clauses of a formula.
+        Tautologies and repeated literals are dropped, since they do not change the formula.
+            :param formula: Iterable of clauses.
+            :param n_vars: Number of variables in formula.
+            :param time_limit: Seconds spent simplifying before the current formula is returned.
+            :param occurrence_limit: Variables occurring in more clauses than this with both signs are not eliminated.
+            :param clause_limit: Variables are not eliminated if a resolvent would have more literals than this.
+            :param growth: Number of clauses variable elimination may add to the formula.
+            :param proof: Proof the input clauses and the resolution steps that derive the simplified clauses are added to.
+        """
+        self.n_vars = n_vars
+        self.time_limit = time_limit
+        self.occurrence_limit = occurrence_limit
+        self.clause_limit = clause_limit
+        self.growth = growth
+        self.proof = proof
+
+        self.clauses = [] # { clause index: [ literal ] }
+        self.removed = [] # { clause index: True if removed }
+        self.signatures = [] # { clause index: bitmask of the variables in clause }
+        self.occurrences = {} # { literal: set of clause indexes }
+
+        for literal in range(-n_vars, n_vars + 1):
+            self.occurrences[literal] = set()
+
+        # clauses are checked for subsumption in the order they are queued
+        self.queue = deque() # [ clause index ]
+        self.queued = set() # { clause index }
+
+        # eliminated clauses are pushed with the literal that satisfies them,
+        # and are popped in reverse when extending a model to the eliminated variables
+        self.extension_stack = [] # [ ( literal, clause ) ]
+        self.eliminated = [ False ] * (n_vars + 1) # { variable: True if eliminated }
+
+        # used in generating proof file - simplified clauses are derived by resolution from the input clauses
+        # every input clause is added to the proof, so clauses are numbered in the order they appear in the formula
+        self.proof_indexes = [] # { clause index: index in proof }
+        self.empty_clause = None # clause index
+
+        self.subsumed = 0
+        self.strengthened = 0
+        self.eliminated_vars = 0
+
+        for clause in formula:
+            clause = list(dict.fromkeys(clause))
+            proof_index = self.proof.add_input(clause) if proof != None else None
+
+            if not any(-literal in clause for literal in clause):
+                self.add_clause(clause, proof_index)
+
+    def simplify(self):
+        """
+        Runs subsumption and self-subsuming resolution to a fixpoint,
+        then eliminates variables cheapest first until the time limit is reached.
+            :returns: Simplified clauses, which are satisfiable if and only if the formula is satisfiable.
+        """
+        deadline = time.time() + self.time_limit
+
+        for clause_index in sorted(range(len(self.clauses)), key=lambda i: len(self.clauses[i])):
+            self.enqueue(clause_index)
+
+        self.subsume(deadline)
+
+        # variables in few clauses produce few resolvents, so they are tried first
+        variables = sorted(range(1, self.n_vars + 1),
+                key=lambda variable: len(self.occurrences[variable]) + len(self.occurrences[-variable]))
+
+        for variable in variables:
+            if self.empty_clause != None or time.time() > deadline:
+                break
+
+            if self.eliminate(variable):
+                self.subsume(deadline)
+
+        return self.get_clauses()
+
+    def get_clauses(self):
+        # returns the remaining clauses, with their indexes in the proof kept in clause_indexes
+        if self.empty_clause != None:
+            self.clause_indexes = [ self.proof_indexes[self.empty_clause] ]
+            return [ [] ]
+
+        remaining = [ i for i in range(len(self.clauses)) if not self.removed[i] ]
+        self.clause_indexes = [ self.proof_indexes[i] for i in remaining ]
+
+        return [ list(self.clauses[i]) for i in remaining ]
+
+    def extend(self, assignments):
+        """
+        Extends a satisfying assignment of the simplified clauses to one of the formula.
+        Each eliminated clause that is not satisfied is satisfied by flipping the variable it was eliminated on.
+            :param assignments: Dictionary of { variable: value } for every variable.
+            :returns: Dictionary of { variable: value } that satisfies the formula.
+        """
+        for literal, clause in reversed(self.extension_stack):
+            if not any(assignments[abs(other)] == (1 if other > 0 else 0) for other in clause):
+                assignments[abs(literal)] = 1 if literal > 0 else 0
+
+        return assignments
+
+    def restore(self):
+        """
+        Gives back the clauses removed by variable elimination, so the eliminated variables can be constrained again.
+        Models of the formula with the restored clauses need no extension.
+            :returns: List of restored clauses.
+        """
+        clauses = [ clause for literal, clause in self.extension_stack ]
+        self.extension_stack = []
+        self.eliminated = [ False ] * (self.n_vars + 1)
+
+        return clauses
+
+    def add_clause(self, clause, proof_index):
+        clause_index = len(self.clauses)
+        self.clauses.append(clause)
+        self.removed.append(False)
+        self.signatures.append(self.get_signature(clause))
+        self.proof_indexes.append(proof_index)
+
+        for literal in clause:
+            self.occurrences[literal].add(clause_index)
+
+        if clause == []:
+            self.empty_clause = clause_index
+
+        return clause_index
+
+    def remove_clause(self, clause_index):
+        self.removed[clause_index] = True
+
+        for literal in self.clauses[clause_index]:
+            self.occurrences[literal].discard(clause_index)
+
+    def delete_from_proof(self, clause_index):
+        if self.proof != None:
+            self.proof.delete(self.proof_indexes[clause_index], self.clauses[clause_index])
+
+    def get_signature(self, clause):
+        # a clause can only contain another clause if its signature contains the signature of the other clause
+        signature = 0
+
+        for literal in clause:
+            signature |= 1 << (abs(literal) & 63)
+
+        return signature
+
+    def enqueue(self, clause_index):
+        if clause_index not in self.queued:
+            self.queued.add(clause_index)
+            self.queue.append(clause_index)
+
+    def subsume(self, deadline):
+        """
+        Removes the clauses subsumed by a queued clause, and strengthens the clauses it self-subsumes.
+        Strengthened clauses are queued, since they may now subsume other clauses.
+            :param deadline: Time after which the remaining queued clauses are not checked.
+            :returns: None.
+        """
+        while self.queue and self.empty_clause == None:
+            if time.time() > deadline:
+                break
+
+            clause_index = self.queue.popleft()
+            self.queued.discard(clause_index)
+
+            if not self.removed[clause_index]:
+                self.backward_subsume(clause_index)
+
+    def backward_subsume(self, clause_index):
+        # every clause subsumed or self-subsumed by the clause contains the variable of its least occurring literal
+        clause = self.clauses[clause_index]
+
+        if clause == []:
+            return
+
+        literal = min(clause, key=lambda literal: len(self.occurrences[literal]) + len(self.occurrences[-literal]))
+
+        for other_index in list(self.occurrences[literal]) + list(self.occurrences[-literal]):
+            if other_index == clause_index or self.removed[other_index]:
+                continue
+
+            result = self.subsumes(clause_index, other_index)
+
+            if result == 0:
+                self.remove_clause(other_index)
+                self.delete_from_proof(other_index)
+                self.subsumed += 1
+            elif result != None:
+                self.strengthen(other_index, -result, clause_index)
+
+                if self.empty_clause != None:
+                    return
+
+    def subsumes(self, clause_index, other_index):
+        """
+        Checks if a clause subsumes another clause, or does so after one of its literals is negated.
+            :param clause_index: Index of clause.
+            :param other_index: Index of other clause.
+            :returns: None if the clause does not subsume the other clause, 0 if it does,
+                    or the literal of the clause whose negation can be removed from the other clause.
+        """
+        clause = self.clauses[clause_index]
+        other = self.clauses[other_index]
+
+        if len(clause) > len(other) or self.signatures[clause_index] & ~self.signatures[other_index]:
+            return None
+
+        other_literals = set(other)
+        result = 0
+
+        for literal in clause:
+            if literal in other_literals:
+                continue
+
+            if result == 0 and -literal in other_literals:
+                result = literal
+                continue
+
+            return None
+
+        return result
+
+    def strengthen(self, clause_index, literal, reason_index):
+        # resolving the clause with the self-subsuming clause removes the literal
+        clause = [ other for other in self.clauses[clause_index] if other != literal ]
+
+        if self.proof != None:
+            proof_index = self.proof.add_derived(clause, self.proof_indexes[clause_index],
+                    [ (self.proof_indexes[reason_index], clause) ])
+            self.delete_from_proof(clause_index)
+            self.proof_indexes[clause_index] = proof_index
+
+        self.clauses[clause_index] = clause
+        self.signatures[clause_index] = self.get_signature(clause)
+        self.occurrences[literal].discard(clause_index)
+        self.strengthened += 1
+
+        if clause == []:
+            self.empty_clause = clause_index
+        else:
+            self.enqueue(clause_index)
+
+    def is_forward_subsumed(self, clause):
+        # checks if any clause is contained in the clause
+        signature = self.get_signature(clause)
+        literals = set(clause)
+
+        for literal in clause:
+            for other_index in self.occurrences[literal]:
+                other = self.clauses[other_index]
+
+                if (len(other) <= len(clause) and not self.signatures[other_index] & ~signature
+                        and all(other_literal in literals for other_literal in other)):
+                    return True
+
+        return False
+
+    def eliminate(self, variable):
+        """
+        Replaces the clauses containing the variable by all their non tautological resolvents on the variable,
+        if there are at most as many resolvents as clauses replaced, plus the allowed growth.
+            :param variable: Variable to eliminate.
+            :returns: True if the variable was eliminated, else False.
+        """
+        positive = list(self.occurrences[variable])
+        negative = list(self.occurrences[-variable])
+
+        if positive == [] and negative == []:
+            return False
+
+        if len(positive) > self.occurrence_limit and len(negative) > self.occurrence_limit:
+            return False
+
+        limit = len(positive) + len(negative) + self.growth
+        resolvents = [] # [ ( positive clause index, negative clause index, resolvent ) ]
+
+        for positive_index in positive:
+            for negative_index in negative:
+                resolvent = self.resolve(self.clauses[positive_index], self.clauses[negative_index], variable)
+
+                if resolvent == None:
+                    continue
+
+                if len(resolvents) >= limit or len(resolvent) > self.clause_limit:
+                    return False
+
+                resolvents.append((positive_index, negative_index, resolvent))
+
+        for clause_index in positive:
+            self.extension_stack.append((variable, self.clauses[clause_index]))
+            self.remove_clause(clause_index)
+
+        for clause_index in negative:
+            self.extension_stack.append((-variable, self.clauses[clause_index]))
+            self.remove_clause(clause_index)
+
+        self.eliminated[variable] = True
+        self.eliminated_vars += 1
+
+        for positive_index, negative_index, resolvent in resolvents:
+            if self.is_forward_subsumed(resolvent):
+                continue
+
+            proof_index = None
+
+            if self.proof != None:
+                proof_index = self.proof.add_derived(resolvent, self.proof_indexes[negative_index],
+                        [ (self.proof_indexes[positive_index], resolvent) ])
+
+            self.enqueue(self.add_clause(resolvent, proof_index))
+
+            if self.empty_clause != None:
+                break
+
+        # the eliminated clauses are only deleted from the proof once the resolvents derived from them are added
+        for clause_index in positive + negative:
+            self.delete_from_proof(clause_index)
+
+        return True
+
+    def resolve(self, positive_clause, negative_clause, variable):
+        # returns None if the resolvent is a tautology
+        resolvent = [ literal for literal in positive_clause if literal != variable ]
+        literals = set(resolvent)
+
+        for literal in negative_clause:
+            if literal == -variable or literal in literals:
+                continue
+
+            if -literal in literals:
+                return None
+
+            resolvent.append(literal)
+
+        return resolvent
+
+    def get_stats(self):
+        return { "subsumed": self.subsumed, "strengthened": self.strengthened,
+                "eliminated": self.eliminated_vars, "clauses": len(self.clauses) - sum(self.removed) }
@@ -0,0 +1,215 @@
+"""
+Defines proof formats, which record how the solver derives the empty clause from the formula.
+"""
+from constants import *
+from config import *
+
+class ResolutionProof:
+    # resolution proofs list every resolvent, so they need the clause after every resolution step
+    needs_steps = True
+
+    def __init__(self, output_path, is_trimmed=True):
+        """
+        Records every resolution step in memory, and writes the proof in the format read by proof_checker.py on close.
+        The proof starts with "v <number of clauses>", then lists the clauses, then the resolution steps as
+        "<clause index> <clause index> <resolved clause index>".
+        Every derivation gets its own clause index, so the steps form a graph from the input clauses to the empty clause.
+            :param output_path: Path of proof file.
+            :param is_trimmed: Whether to only write the clauses and steps the empty clause is derived from.
+        """
+        self.output_path = output_path
+        self.is_trimmed = is_trimmed
+        self.clauses = [] # [ clause ]
+        self.proof = [] # [ ( clause1, clause2, resolved_clause ) ]
+        self.empty_clause_index = None
+
+    def add_input(self, clause):
+        # assigns a clause index to a clause
+        self.clauses.append(clause)
+        return len(self.clauses) - 1
+
+    def add_derived(self, clause, start_index, steps):
+        """
+        Records a clause derived by resolving a clause with a sequence of antecedents.
+            :param clause: Derived clause.
+            :param start_index: Index of the clause resolution starts from.
+            :param steps: List of ( index of antecedent, clause resolved with antecedent ) in resolution order.
+            :returns: Index of derived clause.
+        """
+        clause_index = start_index
+
+        for antecedent_index, resolved_clause in steps:
+            resolved_clause_index = self.add_input(tuple(resolved_clause))
+            self.proof.append((antecedent_index, clause_index, resolved_clause_index))
+            clause_index = resolved_clause_index
+
+        if len(clause) == 0:
+            self.empty_clause_index = clause_index
+
+        return clause_index
+
+    def delete(self, clause_index, clause):
+        # every clause stays listed, since clauses are referenced by their position in the listing
+        pass
+
+    def close(self):
+        clauses = self.clauses
+        proof = self.proof
+
+        if self.is_trimmed and self.empty_clause_index != None:
+            clauses, proof = self.trim()
+
+        with open(self.output_path, "w") as f:
+            f.write("v {}\n".format(len(clauses)))
+
+            for clause in clauses:
+                f.write(" ".join([ str(literal) for literal in clause ]) + "\n")
+
+            for line in proof:
+                f.write(" ".join([ str(clause_index) for clause_index in line ]) + "\n")
+
+    def trim(self):
+        """
+        Keeps the clauses and steps reachable backwards from the empty clause, renumbered in their original order.
+        A clause that was derived again is replaced by its first occurrence, so only one derivation of it is kept.
+            :returns: Kept clauses, kept resolution steps.
+        """
+        first_occurrences = {} # { clause: index of first occurrence }
+        canonical = [] # { clause index: index of first occurrence of the same clause }
+
+        for clause_index, clause in enumerate(self.clauses):
+            canonical.append(first_occurrences.setdefault(frozenset(clause), clause_index))
+
+        derivations = {} # { resolved clause index: ( clause1 index, clause2 index ) }
+
+        for clause1_index, clause2_index, resolved_clause_index in self.proof:
+            if resolved_clause_index not in derivations and canonical[resolved_clause_index] == resolved_clause_index:
+                derivations[resolved_clause_index] = (canonical[clause1_index], canonical[clause2_index])
+
+        is_needed = [ False ] * len(self.clauses)
+        stack = [ canonical[self.empty_clause_index] ]
+        is_needed[stack[0]] = True
+
+        while stack != []:
+            clause_index = stack.pop()
+
+            for parent_index in derivations.get(clause_index, ()):
+                if not is_needed[parent_index]:
+                    is_needed[parent_index] = True
+                    stack.append(parent_index)
+
+        new_indexes = {} # { clause index: index in trimmed proof }
+        clauses = []
+
+        for clause_index, clause in enumerate(self.clauses):
+            if is_needed[clause_index]:
+                new_indexes[clause_index] = len(clauses)
+                clauses.append(clause)
+
+        proof = [ (new_indexes[clause1_index], new_indexes[clause2_index], new_indexes[resolved_clause_index])
+                for resolved_clause_index, (clause1_index, clause2_index) in sorted(derivations.items())
+                if is_needed[resolved_clause_index] ]
+
+        return clauses, proof
+
+class DratProof:
+    # drat checkers rederive each clause by unit propagation, so only the derived clause is written
+    needs_steps = False
+
+    def __init__(self, output_path, is_binary=False):
+        """
+        Streams added and deleted clauses to a DRAT file through a buffered writer.
+        Binary DRAT writes "a" or "d", then each literal as a variable length integer of 2 * variable + sign, then 0.
+            :param output_path: Path of proof file.
+            :param is_binary: Whether to write binary instead of text DRAT.
+        """
+        self.is_binary = is_binary
+        self.file = open(output_path, "wb", buffering=1 << 16)
+        self.n_clauses = 0
+
+    def add_input(self, clause):
+        self.n_clauses += 1
+        return self.n_clauses
+
+    def add_derived(self, clause, start_index, steps):
+        self.n_clauses += 1
+        self.file.write(self.encode(b"a", b"", clause))
+        return self.n_clauses
+
+    def delete(self, clause_index, clause):
+        self.file.write(self.encode(b"d", b"d ", clause))
+
+    def encode(self, binary_prefix, text_prefix, clause):
+        if not self.is_binary:
+            return text_prefix + " ".join([ str(literal) for literal in clause ] + [ "0\n" ]).encode()
+
+        encoded = bytearray(binary_prefix)
+
+        for literal in clause:
+            value = 2 * abs(literal) + (literal < 0)
+
+            while value > 127:
+                encoded.append(value & 127 | 128)
+                value >>= 7
+
+            encoded.append(value)
+
+        encoded.append(0)
+        return bytes(encoded)
+
+    def close(self):
+        self.file.close()
+
+class LratProof:
+    # lrat hints are the antecedents of every resolution step
+    needs_steps = True
+
+    def __init__(self, output_path):
+        """
+        Streams added clauses with their hints and deleted clauses to an LRAT file through a buffered writer.
+        Input clauses are numbered from 1 in the order they appear in the formula, derived clauses continue from there.
+        Hints list the antecedents of a derived clause in reverse resolution order and then the clause resolution starts from,
+        so each hint is unit or unsat under the negation of the derived clause and the literals implied by earlier hints.
+            :param output_path: Path of proof file.
+        """
+        self.file = open(output_path, "wb", buffering=1 << 16)
+        self.n_clauses = 0
+
+    def add_input(self, clause):
+        self.n_clauses += 1
+        return self.n_clauses
+
+    def add_derived(self, clause, start_index, steps):
+        self.n_clauses += 1
+        hints = [ antecedent_index for antecedent_index, resolved_clause in reversed(steps) ] + [ start_index ]
+        self.file.write("{} {} {} 0\n".format(self.n_clauses,
+                " ".join([ str(literal) for literal in clause ] + [ "0" ]),
+                " ".join([ str(hint) for hint in hints ])).encode())
+        return self.n_clauses
+
+    def delete(self, clause_index, clause):
+        self.file.write("{} d {} 0\n".format(self.n_clauses, clause_index).encode())
+
+    def close(self):
+        self.file.close()
+
+def create_proof(proof_format, output_path):
+    """
+    Creates the proof for a proof format.
+        :param proof_format: One of RESOLUTION, DRAT, BINARY_DRAT or LRAT.
+        :param output_path: Path of proof file.
+        :returns: Proof.
+    """
+    if proof_format == RESOLUTION:
+        return ResolutionProof(output_path, Config.IS_PROOF_TRIMMED)
+
+    if proof_format == DRAT:
+        return DratProof(output_path)
+
+    if proof_format == BINARY_DRAT:
+        return DratProof(output_path, is_binary=True)
+
+    if proof_format == LRAT:
+        return LratProof(output_path)
+
+    raise ValueError("Unknown proof format: {}".format(proof_format))
@@ -1,73 +1,201 @@
 """
 Given a proof file generated by the SAT solver, will verify the proof's correctness.
 
-The solver should print out the proof in a file; where the first line should being with “v <# of clauses>” 
-where <# of clauses> specify the number of clauses in your resolution proof. 
-Then the next <# of clauses> should list down all the clauses that are used in resolution proof. 
-An empty clause is also a clause, you can use the symbol -1 to specify empty clause. 
+The solver should print out the proof in a file; where the first line should being with “v <# of clauses>”
+where <# of clauses> specify the number of clauses in your resolution proof.
+Then the next <# of clauses> should list down all the clauses that are used in resolution proof.
+An empty clause is also a clause, you can use the symbol -1 to specify empty clause.
 Note that this ordering also assigns unique id to every clause.
-Following listing of all the clauses, you should list down the actual proof in the following format. 
-Every line should first list the id two clauses used in resolution and then the clause that was generated. 
-(E.g., “1 2 3” would represent clause 1 and clause 2 were used in resolution and clause 3 was produced). 
+Following listing of all the clauses, you should list down the actual proof in the following format.
+Every line should first list the id two clauses used in resolution and then the clause that was generated.
+(E.g., “1 2 3” would represent clause 1 and clause 2 were used in resolution and clause 3 was produced).
 The last line should end with empty clause being generated (If it is an UNSAT formula).
+
+Usage: python proof_checker.py [path], where path defaults to proof.txt.
+The proof is streamed into a flat clause table, then checked backwards from the empty clause,
+so steps the empty clause is not derived from are skipped.
 """
-import os
+from exceptions import *
+from array import array
+import sys
 
 path = "proof.txt"
 
 def main():
-    with open(os.path.join(os.getcwd(), path)) as f:
-        proof = f.read()
-    
-    lines = proof.strip().split("\n")
-    start, clauses = parse_clauses(lines)
-    check_proof(lines, start, clauses)
-
-    print("Proof verified")
-
-def parse_clauses(lines):
-    tokens = lines[0].strip().split()
-    n_clauses = int(tokens[1])
-    clauses = []
-
-    for line in lines[1: 1 + n_clauses]:
-        tokens = line.strip().split()
-        
+    proof_path = sys.argv[1] if len(sys.argv) > 1 else path
+
+    try:
+        with open(proof_path) as f:
+            table = parse_proof(f)
+
+        n_checked = check_proof(table)
+    except ProofError as e:
+        print("Proof rejected: {}".format(e))
+        sys.exit(1)
+
+    print("Proof verified ({} of {} steps checked)".format(n_checked, len(table.steps) // 3))
+
+class ProofTable:
+    def __init__(self, n_clauses):
+        """
+        Holds the clauses and resolution steps of a proof in flat integer arrays.
+        Clause i spans literals[offsets[i]:offsets[i + 1]], step k is steps[3 * k:3 * k + 3].
+            :param n_clauses: Number of clauses listed in the proof.
+        """
+        self.n_clauses = n_clauses
+        self.literals = array("i") # [ literal ]
+        self.offsets = array("q", [ 0 ]) # { clause index: offset of first literal }
+        self.steps = array("q") # [ clause1, clause2, resolved_clause, ... ]
+        self.derivations = array("q", [ -1 ]) * n_clauses # { clause index: step that resolved it, or -1 }
+        self.empty_clause = None # index of the first empty clause derived by a step
+
+    def clause(self, clause_index):
+        return frozenset(self.literals[self.offsets[clause_index]:self.offsets[clause_index + 1]])
+
+    def is_empty(self, clause_index):
+        return self.offsets[clause_index] == self.offsets[clause_index + 1]
+
+def parse_proof(lines):
+    """
+    Streams the clauses and resolution steps of a proof into a proof table.
+        :param lines: Iterable of lines.
+        :raises ProofError: when the proof is not in the expected format
+        :returns: Proof table.
+    """
+    lines = iter(lines)
+    tokens = next(lines, "").split()
+
+    if len(tokens) != 2 or tokens[0] != "v" or not tokens[1].isdigit():
+        raise ProofError("line 1: expected \"v <number of clauses>\"")
+
+    table = ProofTable(int(tokens[1]))
+    line_number = 1
+
+    for clause_index in range(table.n_clauses):
+        line = next(lines, None)
+        line_number += 1
+
+        if line == None:
+            raise ProofError("expected {} clauses but found {}".format(table.n_clauses, clause_index))
+
+        try:
+            table.literals.extend(map(int, line.split()))
+        except ValueError:
+            raise ProofError("line {}: variable should be a nonzero number".format(line_number))
+
+        table.offsets.append(len(table.literals))
+
+    for line in lines:
+        line_number += 1
+        tokens = line.split()
+
+        if tokens == []:
+            continue
+
+        step = len(table.steps) // 3 + 1
+
         try:
-            clause = set()
+            clause1, clause2, resolved_clause = map(int, tokens)
+        except ValueError:
+            raise ProofError("step {} (line {}): expected 3 clause indexes".format(step, line_number))
+
+        if not (0 <= clause1 < table.n_clauses and 0 <= clause2 < table.n_clauses and 0 <= resolved_clause < table.n_clauses):
+            raise ProofError("step {} (line {}): clause index out of range".format(step, line_number))
+
+        # ensures that the newly derived clause comes after the current clauses in derivation order
+        if not (resolved_clause > clause1 and resolved_clause > clause2):
+            raise ProofError("step {} (line {}): clause {} is derived from a later clause".format(
+                    step, line_number, resolved_clause))
+
+        if table.derivations[resolved_clause] != -1:
+            raise ProofError("step {} (line {}): clause {} is already derived in step {}".format(
+                    step, line_number, resolved_clause, table.derivations[resolved_clause] + 1))
+
+        table.derivations[resolved_clause] = step - 1
+        table.steps.extend((clause1, clause2, resolved_clause))
 
-            for token in tokens:                
-                literal = int(token)
-                clause.add(literal) # variable is an integer, with a negative integer denoting a negation of the variable
+        if table.empty_clause == None and table.is_empty(resolved_clause):
+            table.empty_clause = resolved_clause
 
-        except ValueError as e:
-            print("Error, variable should be a nonzero number.")
-            
-        clauses.append(frozenset(clause))
+    return table
 
-    return 1 + n_clauses, clauses
+def check_proof(table):
+    """
+    Checks the resolution steps the empty clause is derived from.
+    Clauses are only built while a step that uses them remains, and freed afterwards.
+        :param table: Proof table.
+        :raises ProofError: when a step is not a valid resolution, or the empty clause is not derived
+        :returns: Number of steps checked.
+    """
+    if table.empty_clause == None:
+        # a formula that contains the empty clause needs no resolution steps
+        if len(table.steps) == 0 and any(table.is_empty(i) for i in range(table.n_clauses)):
+            return 0
 
-def check_proof(lines, start, clauses):
-    for line in lines[start:]:
-        tokens = line.strip().split()
-        clause_indexes = [int(token) for token in tokens]
-        check_resolution(clause_indexes, clauses)
+        raise ProofError("the empty clause is not derived")
 
-def check_resolution(clause_indexes, clauses):
-    # ensures that the newly derived clause comes after the current clauses in derivation order
-    assert clause_indexes[2] > clause_indexes[0] and clause_indexes[2] > clause_indexes[1]
+    steps = table.steps
+    derivations = table.derivations
 
-    resolution_clauses = [clauses[clause_index] for clause_index in clause_indexes]
-    pivot = get_pivot(resolution_clauses[0], resolution_clauses[1])
-    resolved_clause = resolution(resolution_clauses[0], resolution_clauses[1], pivot)
-    
-    # ensures the clause3 is the resolved clause of clause1 and clause2
-    assert resolution_clauses[2] == resolved_clause
+    # marks the steps reachable backwards from the empty clause
+    is_needed = array("b", [ 0 ]) * (len(steps) // 3)
+    consumers = array("i", [ 0 ]) * table.n_clauses # { clause index: number of needed steps using the clause }
+    stack = [ derivations[table.empty_clause] ]
+    is_needed[stack[0]] = 1
 
-def get_pivot(clause1, clause2):
-    for literal in clause1:
-        if -literal in clause2:
-            return literal
+    while stack != []:
+        step = stack.pop()
+
+        for clause_index in steps[3 * step:3 * step + 3]:
+            consumers[clause_index] += 1
+            parent_step = derivations[clause_index]
+
+            if parent_step != -1 and not is_needed[parent_step]:
+                is_needed[parent_step] = 1
+                stack.append(parent_step)
+
+    clauses = {} # { clause index: clause } - clauses with remaining consumers
+    n_checked = 0
+
+    for step in range(len(is_needed)):
+        if not is_needed[step]:
+            continue
+
+        clause_indexes = steps[3 * step:3 * step + 3]
+        resolution_clauses = []
+
+        for clause_index in clause_indexes:
+            if clause_index not in clauses:
+                clauses[clause_index] = table.clause(clause_index)
+
+            resolution_clauses.append(clauses[clause_index])
+
+        check_resolution(step + 1, clause_indexes, resolution_clauses)
+        n_checked += 1
+
+        for clause_index in clause_indexes:
+            consumers[clause_index] -= 1
+
+            if consumers[clause_index] == 0:
+                del clauses[clause_index]
+
+    return n_checked
+
+def check_resolution(step, clause_indexes, resolution_clauses):
+    clause1, clause2, resolved_clause = resolution_clauses
+
+    # the pivot is the only literal of clause1 left out of the resolved clause
+    pivots = clause1 - resolved_clause
+
+    if len(pivots) == 1:
+        pivot = next(iter(pivots))
+
+        # ensures the clause3 is the resolved clause of clause1 and clause2
+        if -pivot in clause2 and resolution(clause1, clause2, pivot) == resolved_clause:
+            return
+
+    raise ProofError("step {}: clause {} is not the resolved clause of clauses {} and {}".format(
+            step, clause_indexes[2], clause_indexes[0], clause_indexes[1]))
 
 def resolution(clause1, clause2, pivot):
         """
@@ -77,10 +205,7 @@ def resolution(clause1, clause2, pivot):
             :param pivot: Literal in clause1 whose negation is in clause2.
             :returns: Resolved clause containing all literals in both clauses except pivot and its negation.
         """
-        resolved_clause = { literal for literal in clause1 if literal != pivot }
-        resolved_clause |= { literal for literal in clause2 if literal != -pivot }
-
-        return frozenset(resolved_clause)
+        return (clause1 - { pivot }) | (clause2 - { -pivot })
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
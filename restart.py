@@ -0,0 +1,152 @@
+"""
+Defines restart strategies, which decide when the search process restarts from decision level 0.
+"""
+from constants import *
+from config import *
+
+class GeometricRestart:
+    def __init__(self, interval, multiplier):
+        """
+        Restarts after a number of conflicts, which is multiplied after every restart.
+            :param interval: Conflicts before the first restart.
+            :param multiplier: Factor the interval is multiplied by after every restart.
+        """
+        self.interval = interval
+        self.multiplier = multiplier
+        self.countdown = interval
+        self.conflicts = 0
+        self.restarts = 0
+
+    def on_conflict(self, lbd, trail_size):
+        self.conflicts += 1
+        self.countdown -= 1
+
+    def should_restart(self):
+        return self.countdown <= 0
+
+    def on_restart(self):
+        self.restarts += 1
+        self.interval *= self.multiplier
+        self.countdown = self.interval
+
+    def get_stats(self):
+        return { "strategy": GEOMETRIC, "restarts": self.restarts, "conflicts": self.conflicts,
+                "interval": self.interval }
+
+class LubyRestart:
+    def __init__(self, unit):
+        """
+        Restarts after unit * luby(i) conflicts for the i-th restart, where luby is 1, 1, 2, 1, 1, 2, 4, 1, ...
+            :param unit: Number of conflicts per unit of the sequence.
+        """
+        self.unit = unit
+        self.countdown = unit * luby(0)
+        self.conflicts = 0
+        self.restarts = 0
+
+    def on_conflict(self, lbd, trail_size):
+        self.conflicts += 1
+        self.countdown -= 1
+
+    def should_restart(self):
+        return self.countdown <= 0
+
+    def on_restart(self):
+        self.restarts += 1
+        self.countdown = self.unit * luby(self.restarts)
+
+    def get_stats(self):
+        return { "strategy": LUBY, "restarts": self.restarts, "conflicts": self.conflicts,
+                "interval": self.unit * luby(self.restarts) }
+
+class GlucoseRestart:
+    def __init__(self, min_conflicts, fast_alpha, slow_alpha, margin, block_margin, block_conflicts):
+        """
+        Restarts when the lbd of recent learnt clauses is high compared to the lbd of all learnt clauses, as in Glucose.
+        Both are tracked as exponential moving averages, with a fast and a slow decay.
+        A pending restart is blocked when the trail is much longer than usual,
+        since the search may be close to a satisfying assignment.
+            :param min_conflicts: Conflicts since the last restart before another restart is considered.
+            :param fast_alpha: Smoothing factor of the recent lbd average.
+            :param slow_alpha: Smoothing factor of the long term lbd and trail size averages.
+            :param margin: Restarts when the recent lbd average exceeds the long term average by this factor.
+            :param block_margin: Blocks restarts when the trail exceeds the long term trail size average by this factor.
+            :param block_conflicts: Conflicts before restarts may be blocked.
+        """
+        self.min_conflicts = min_conflicts
+        self.fast_alpha = fast_alpha
+        self.slow_alpha = slow_alpha
+        self.margin = margin
+        self.block_margin = block_margin
+        self.block_conflicts = block_conflicts
+
+        self.fast_lbd = 0.0
+        self.slow_lbd = 0.0
+        self.trail_size = 0.0
+        self.conflicts = 0
+        self.conflicts_since_restart = 0
+        self.restarts = 0
+        self.blocked = 0
+
+    def on_conflict(self, lbd, trail_size):
+        self.conflicts += 1
+        self.conflicts_since_restart += 1
+
+        # the first averages are plain means, so they do not start biased towards 0
+        fast_alpha = max(self.fast_alpha, 1 / self.conflicts)
+        slow_alpha = max(self.slow_alpha, 1 / self.conflicts)
+        self.fast_lbd += fast_alpha * (lbd - self.fast_lbd)
+        self.slow_lbd += slow_alpha * (lbd - self.slow_lbd)
+        self.trail_size += slow_alpha * (trail_size - self.trail_size)
+
+        if (self.conflicts > self.block_conflicts
+                and self.conflicts_since_restart >= self.min_conflicts
+                and trail_size > self.block_margin * self.trail_size):
+            self.blocked += 1
+            self.conflicts_since_restart = 0
+
+    def should_restart(self):
+        return (self.conflicts_since_restart >= self.min_conflicts
+                and self.fast_lbd > self.margin * self.slow_lbd)
+
+    def on_restart(self):
+        self.restarts += 1
+        self.conflicts_since_restart = 0
+
+    def get_stats(self):
+        return { "strategy": GLUCOSE, "restarts": self.restarts, "conflicts": self.conflicts,
+                "blocked": self.blocked, "fast_lbd": self.fast_lbd, "slow_lbd": self.slow_lbd }
+
+def luby(i):
+    # returns the i-th element of the luby sequence, starting from 0
+    size = 1
+    exponent = 0
+
+    while size < i + 1:
+        exponent += 1
+        size = 2 * size + 1
+
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        exponent -= 1
+        i = i % size
+
+    return 2 ** exponent
+
+def create_restart_policy(strategy):
+    """
+    Creates the restart strategy with its settings from Config.
+        :param strategy: One of LUBY, GEOMETRIC or GLUCOSE.
+        :returns: Restart strategy.
+    """
+    if strategy == LUBY:
+        return LubyRestart(Config.LUBY_UNIT)
+
+    if strategy == GEOMETRIC:
+        return GeometricRestart(Config.RESTART_INTERVAL, Config.RESTART_MULTIPLIER)
+
+    if strategy == GLUCOSE:
+        return GlucoseRestart(Config.GLUCOSE_MIN_CONFLICTS, Config.GLUCOSE_FAST_ALPHA, Config.GLUCOSE_SLOW_ALPHA,
+                Config.GLUCOSE_MARGIN, Config.GLUCOSE_BLOCK_MARGIN, Config.GLUCOSE_BLOCK_CONFLICTS)
+
+    raise ValueError("Unknown restart strategy: {}".format(strategy))
@@ -3,203 +3,534 @@ Defines SAT solver.
 """
 from constants import *
 from logger import Logger
-import copy
 from config import *
-from collections import defaultdict
+from variable_order import VariableOrder
+from clause_arena import ClauseArena
+from restart import create_restart_policy
+from phase import Phases
+from preprocessor import Preprocessor
+from proof import create_proof
+from stats import Stats, TensorboardWriter, create_profiler, get_peak_memory
+from canonical import get_formula_key
+from checkpoint import Checkpoint, read_checkpoint, write_checkpoint
+import asyncio
+import os
+import threading
+import time
 
 class Solver:
     def __init__(self, formula, n_vars):
         """
-        Initializes solver. 
+        Initializes solver.
             :param formula: SAT formula.
             :param n_vars: Number of variables in formula.
         """
-        # a formula is a set of clauses
-        # a clause is a set of variables
+        # a formula is an iterable of clauses
+        # a clause is an iterable of literals
         # a variable is represented by an integer. -variable denotes the negation literal
         # range of literals is [-n: n], where n is the number of variables
+        # clauses are stored in a clause arena and referenced by their integer clause id
 
-        self.formula = copy.deepcopy(formula)
+        self.arena = ClauseArena()
         self.n_vars = n_vars
-        self.trail = defaultdict(lambda: [], {}) # { decision_level: [ literal ] } - contains the list of literals each decision level in lifo assignment order
-        self.unassigned = [ i for i in range(1, self.n_vars + 1) ] # { variable }
-        self.assignments = defaultdict(lambda: UNASSIGNED, {}) # { variable: value }
-        self.antecedents = defaultdict(lambda: None, {}) # { variable: clause }
-        self.decision_levels = defaultdict(lambda: 0, {}) # { variable: decision_level }
+
+        # search state is held in preallocated lists
+        # literal-indexed lists have 2n + 1 entries, so a negative literal indexes from the end of the list
+        # and both literals of a variable can be looked up without any arithmetic
+        self.assignments = [ UNASSIGNED ] * (2 * self.n_vars + 1) # { literal: value }
+        self.antecedents = [ None ] * (self.n_vars + 1) # { variable: clause id }
+        self.decision_levels = [ 0 ] * (self.n_vars + 1) # { variable: decision_level }
+
+        # the trail contains the literals assigned 1 in assignment order, 
+        # with the position where each decision level starts kept in trail_limits
+        # so backtracking truncates the trail
+        self.trail = [] # [ literal ]
+        self.trail_limits = [] # { decision_level - 1: start of decision level in trail }
         self.decision_level = 0
-        self.logger = Logger(Config.IS_LOG)
+
+        # log messages are only built if logging is on, since the hot loop logs every assignment
+        self.is_log = Config.IS_LOG
+        self.logger = Logger(self.is_log)
+
+        # statistics count what the search does, and are reported to the progress callback every progress interval conflicts
+        # the progress callback is called with the dictionary returned by Stats.get_stats
+        self.stats = Stats(Config.IS_TIMED)
+        self.is_timed = Config.IS_TIMED
+        self.progress_callback = None
+        self.progress_interval = Config.PROGRESS_INTERVAL
+        self.tensorboard = TensorboardWriter(Config.TENSORBOARD_DIR) if Config.TENSORBOARD_DIR != None else None
+
+        # budgets bound each solve, which returns UNKNOWN once one is used up or the solver is interrupted
+        # both are checked after every conflict, so a solve stops within one conflict of being interrupted
+        # the interrupt event can be set from any thread, and stays set until cleared
+        self.budgets = { "conflicts": Config.CONFLICT_BUDGET, "propagations": Config.PROPAGATION_BUDGET,
+                "time": Config.TIME_BUDGET, "memory": Config.MEMORY_BUDGET } # { budget: limit per solve }
+        self.limits = {} # { budget: value at which the current solve stops }
+        self.interrupt_event = threading.Event()
+        self.stop_reason = None # budget used up or "interrupt" if the last solve returned UNKNOWN
 
         # tracks all single literal clauses
-        self.single_literal_clauses = set() # {} clause }
-        for clause in self.formula:
-            if len(clause) == 1:
-                self.single_literal_clauses.add(clause)
-
-        # recommended by MiniSat - keeps a queue of unit literals
-        # invariant: contains all unit literals, clauses thus far
-        self.propagation_queue = [] # [ ( literal, antecedent ) ]
-        
+        self.single_literal_clauses = [] # [ clause id ]
+
+        # an empty input clause cannot be satisfied, so the formula is unsat without search
+        self.empty_clause = None # clause id
+
+        # a conflict at decision level 0 makes the formula unsat under any assumptions, so later solves return at once
+        self.is_unsat = False
+
+        # assumptions are decided in order before any other variable, assumption i at decision level i + 1
+        # so learnt clauses do not depend on them, and are kept between solves
+        # when solving under assumptions is unsat, the assumptions responsible are kept in failed_assumptions
+        self.assumptions = [] # [ literal ]
+        self.failed_assumptions = [] # [ literal ]
+
+        # recommended by MiniSat - literals on the trail after the queue head have not had their watched clauses visited
+        # the trail is consumed as a queue by moving the head index
+        self.queue_head = 0
+
         # the watched literals heuristic has each clause watching 2 literals, maintaining the following invariant:
-        # if watched literals eval to UNIT/UNSAT, all other literals in clause are 0
-        # this means that the last 2 assigned literals of a UNIT/UNSAT clause are always watched
-        # speeds up finding unit clauses for propagation and unsat clause for conflict analysis
-        self.clause_literal_watchlist = defaultdict(lambda: [], {}) # { clause: [ literal ] }
-        self.literal_clause_watchlist = defaultdict(lambda: [], {}) # { literal: [ clause ] } 
-        
+        # a watched literal is only 0 if the other watched literal is 1, or if all other literals in clause are 0
+        # so a clause only needs to be visited when one of its watched literals is assigned 0
+        # the watched literals of a clause are the first 2 literals of the clause in the arena
+        # each watch also caches a blocker literal of the clause - if the blocker is 1, the clause is skipped unvisited
+        self.literal_clause_watchlist = {} # { literal: [ clause id, blocker, clause id, blocker, ... ] }
+
+        # binary clauses are not watched, instead each of their literals keeps the other literal inline
+        # so the implied literal is assigned without reading the clause from the arena
+        self.literal_binary_implications = {} # { literal: [ implied literal, clause id, implied literal, clause id, ... ] }
+
         for literal in range(-self.n_vars, self.n_vars + 1):
             self.literal_clause_watchlist[literal] = []
-            
+            self.literal_binary_implications[literal] = []
+
+        # conflict analysis marks the variables it has seen instead of building sets of literals
+        self.seen = [ 0 ] * (self.n_vars + 1) # { variable: 1 if seen }
+        self.marked = [] # [ variable ] - variables marked as seen while minimizing a learnt clause
+
+        # used in generating proof file
+        # the proof is told about every input clause, derived clause and deleted clause
+        # resolution proofs are kept in memory and written when solving ends, drat and lrat proofs are streamed
+        # deleting clauses keeps the resolution proof valid, since the proof lists every clause it uses
+        # and clauses that are antecedents of assignments at decision level 0 are never deleted
+        self.is_proof = Config.IS_PROOF
+        self.proof = create_proof(Config.PROOF_FORMAT, Config.OUTPUT_PATH) if self.is_proof else None
+        self.clause_index_map = {} # { clause id: index in proof }
+        self.learnt_clause_index = None # index of the clause returned by the last conflict analysis
+
+        # checkpoints keep the learnt clauses, activities and phases of the search, keyed by the formula they are learnt from
+        # they are written every checkpoint interval conflicts and when a solve is stopped
+        # the formula is only hashed if checkpoints are written, and adding clauses stops them
+        # since clauses learnt afterwards may not be implied by the formula
+        self.checkpoint_path = Config.CHECKPOINT_PATH
+        self.checkpoint_interval = Config.CHECKPOINT_INTERVAL
+        self.formula_key = get_formula_key(formula, n_vars)[0] if self.checkpoint_path != None else None
+
+        # the preprocessor simplifies the formula before it is watched
+        # it keeps the clauses removed by variable elimination, to extend models to the eliminated variables
+        self.is_preprocess = Config.IS_PREPROCESS
+        self.preprocessor = None
+
+        if self.is_preprocess:
+            self.preprocessor = Preprocessor(formula, self.n_vars, Config.PREPROCESS_TIME_LIMIT,
+                    Config.BVE_OCCURRENCE_LIMIT, Config.BVE_CLAUSE_LIMIT, Config.BVE_GROWTH, self.proof)
+            start_time = time.perf_counter()
+            formula = self.preprocessor.simplify()
+            self.stats.add_time("preprocess", start_time)
+            self.logger.log("Preprocessing: {}".format(self.preprocessor.get_stats()))
+
         for clause in formula:
-            self.add_watched_literal(clause)
-            self.add_watched_literal(clause)
-        
-        # vsids heuristic dynamically tracks the number of times a variable appears in a formula
-        # an unassigned variable with the highest number of appearances is chosen and 
+            self.insert_clause(clause)
+
+        # vsids heuristic dynamically tracks the activity of each variable, starting from its number of appearances
+        # an unassigned variable with the highest activity is chosen and
         # assigned a value at the start of each decision level
-        # the count for each variable decays after a set interval
+        # evsids mode bumps every variable seen during conflict analysis by an increment that grows after each conflict
+        # legacy mode bumps the variables of each learnt clause by 1 and halves every count after a set interval
+        # variables are kept in a heap ordered by activity, assigned variables are skipped when popped
+        # and reinserted when unassigned
         self.is_vsids = Config.IS_VSIDS
-        self.vsids_counter = defaultdict(lambda: 0, {}) # { literal: count }
+        self.vsids_mode = Config.VSIDS_MODE
+        self.order = VariableOrder(self.n_vars, self.vsids_mode, Config.VSIDS_DECAY)
+        self.vsids_counter = self.order.activity # { variable: count }
         self.vsids_interval = Config.VSIDS_INTERVAL
         self.vsids_countdown = self.vsids_interval
 
         # NOTE: implements a variable counter like MiniSat but the ZChaff paper mentions a literal counter
         if self.is_vsids:
-            for clause in formula:
-                for literal in clause:
-                    self.vsids_counter[abs(literal)] += 1
-
-        # after set intervals, the search process will restart by clearing all assignments without deleting learnt clauses
-        # the restart interval is extended after every restart
+            for literal in self.arena.literals:
+                self.vsids_counter[abs(literal)] += 1
+        else:
+            # static order - lower variables are picked first
+            for variable in range(1, self.n_vars + 1):
+                self.vsids_counter[variable] = self.n_vars - variable + 1
+
+        self.order.build(range(1, self.n_vars + 1))
+
+        # the value of a branching variable is picked from its phases
+        # saved phases keep the last value of each variable, so backtracking and restarts return to the same assignments
+        # target and best phases keep the values in the longest trails without conflict
+        # periodically, saved phases are reset according to the rephase schedule to diversify the search
+        self.phases = Phases(self.n_vars, Config.PHASE_MODE, Config.DEFAULT_PHASE, Config.REPHASE_SCHEDULE, Config.SEED)
+        self.is_rephase = Config.IS_REPHASE
+        self.rephase_interval = Config.REPHASE_INTERVAL
+        self.rephase_countdown = self.rephase_interval
+
+        # the search process will restart by clearing all decisions without deleting learnt clauses
+        # the restart strategy is told about every conflict and decides when to restart
         self.is_restart = Config.IS_RESTART
-        self.restart_interval = Config.RESTART_INTERVAL
-        self.restart_interval_multiplier = Config.RESTART_MULTIPLIER
-        self.restart_countdown = self.restart_interval
+        self.restart_policy = create_restart_policy(Config.RESTART_STRATEGY)
+
+        # solvers in a portfolio exchange short learnt clauses, which are imported on restarts at decision level 0
+        self.clause_exchange = None
+
+        # learnt clauses are ranked by their lbd, the number of distinct decision levels in the clause,
+        # and by their activity, which is bumped whenever the clause is used in conflict analysis
+        # periodically, the worse half of the learnt clauses is deleted, except for glue clauses 
+        # and clauses that are the antecedent of an assignment
+        # single literal learnt clauses are never deleted
+        self.is_reduce = Config.IS_REDUCE
+        self.learnt_clauses = [] # [ clause id ]
+        self.learnt_bytes = 0
+        self.max_learnt_clauses = Config.MAX_LEARNT_CLAUSES
+        self.max_learnt_bytes = Config.MAX_LEARNT_BYTES
+        self.glue_lbd = Config.GLUE_LBD
+        self.reduce_interval = Config.REDUCE_INTERVAL
+        self.reduce_increment = Config.REDUCE_INCREMENT
+        self.reduce_countdown = self.reduce_interval
+        self.clause_increment = 1.0
+        self.clause_decay_factor = 1 / Config.CLAUSE_DECAY
+
+        if self.is_proof and self.preprocessor != None:
+            # the proof starts with the resolution steps that derived the simplified clauses
+            for clause_id in self.arena:
+                self.clause_index_map[clause_id] = self.preprocessor.clause_indexes[clause_id]
+        elif self.is_proof:
+            for clause_id in self.arena:
+                self.clause_index_map[clause_id] = self.proof.add_input(self.arena.clause(clause_id))
+
+        if self.checkpoint_path != None and Config.IS_RESUME and os.path.exists(self.checkpoint_path):
+            self.load_checkpoint()
+
+    def solve(self, assumptions=()):
+        """
+        Solves the formula under the assumptions. Can be called again after adding clauses and variables,
+        keeping the learnt clauses, activities and phases of earlier solves.
+            :param assumptions: Iterable of literals assumed 1.
+            :returns: Assignments and value. If unsat, failed_assumptions holds the assumptions
+                    that cannot all be 1 in any model, which is empty if the formula is unsat.
+                    If UNKNOWN, stop_reason holds the budget used up or "interrupt".
+        """
+        self.assumptions = list(assumptions)
+        self.failed_assumptions = []
+        self.stop_reason = None
+        self.backtrack(0)
+        self.prepare_literals(self.assumptions)
+        self.start_budgets()
 
-        # used in generating proof file
-        self.is_proof = Config.IS_PROOF
-        self.clauses = [] # [ clause ]
-        self.proof = [] # [ ( clause1, clause2, resolved_clause ) ]
-        self.clause_index_map = defaultdict(lambda: None, {}) # { clause: index }
-        self.output_path = Config.OUTPUT_PATH
+        profiler = create_profiler(Config.PROFILER, Config.SAMPLE_INTERVAL)
 
-        if self.is_proof:
-            for clause in formula:
-                self.track_clause(clause)
+        if profiler != None:
+            profiler.start()
 
-        self.pick_branch_calls = 0
+        assignments, value = self.cdcl()
 
-    def solve(self):
-        assignments, value = self.cdcl(copy.deepcopy(self.formula))
+        if profiler != None:
+            profiler.stop()
+            profiler.write(Config.PROFILE_PATH)
 
-        if self.is_proof:
-            self.generate_proof()
+        if value == SAT and self.preprocessor != None:
+            assignments = self.preprocessor.extend(assignments)
+
+        self.stop_proof()
+        stats = self.stats.get_stats()
+
+        if Config.STATS_PATH != None:
+            self.stats.write_json(Config.STATS_PATH, { "value": value, "restart_policy": self.restart_policy.get_stats() })
 
-        self.logger.log("Number of pick branch calls: {}".format(self.pick_branch_calls))
+        if self.tensorboard != None:
+            self.tensorboard.finish(stats)
+
+        self.logger.log("Statistics: {}".format(stats))
+        self.logger.log("Restarts: {}".format(self.restart_policy.get_stats()))
+
+        if self.clause_exchange != None:
+            self.logger.log("Clause exchange: {}".format(self.clause_exchange.get_stats()))
         self.logger.log("Value: {}".format(value))
+
+        if value == UNKNOWN:
+            self.logger.log("Stopped by: {}".format(self.stop_reason))
+
         self.logger.log("Assignments: {}".format(assignments))
 
         return assignments, value
 
-    def cdcl(self, formula):
+    def cdcl(self):
         """
-        Implements CDCL algorithm. 
-            :param formula: SAT formula.
+        Implements CDCL algorithm.
             :returns: truth assignment that satisfies the formula
         """
-        while True:
-            self.unit_propagation(formula)
+        if self.empty_clause != None:
+            if self.is_proof:
+                self.proof.add_derived([], self.clause_index_map[self.empty_clause], [])
+
+            return {}, UNSAT
 
-            if self.eval_formula(formula) == SAT:   
-                return self.assignments, self.eval_formula(self.formula)
+        if self.is_unsat:
+            return {}, UNSAT
 
-            if (self.eval_formula(formula) == UNSAT):
-                learnt_clause, stage = self.conflict_analysis(formula) 
+        while True:
+            conflict = self.unit_propagation()
 
-                if self.decision_level == 0:            
+            if conflict != None:
+                self.stats.conflicts += 1
+
+                if self.decision_level == 0:
                     if self.is_proof:
-                        self.derive_empty_clause(formula, learnt_clause)
+                        self.derive_empty_clause(conflict)
 
+                    self.is_unsat = True
                     return {}, UNSAT
 
+                if self.is_timed:
+                    start_time = time.perf_counter()
+
+                learnt_clause, stage = self.conflict_analysis(conflict)
+
+                if self.is_timed:
+                    self.stats.add_time("analyze", start_time)
+
+                lbd = self.get_lbd(learnt_clause)
+                self.stats.on_learnt_clause(len(learnt_clause), lbd)
+                self.restart_policy.on_conflict(lbd, len(self.trail))
+                self.phases.update(self.trail, self.trail_limits[-1])
                 self.backtrack(stage)
-                self.decision_level = stage
 
                 # adds the learnt clause to the formula after backtracking
-                formula.add(learnt_clause)
-                self.initialize_learnt_clause(learnt_clause)
-                
-                if not self.is_restart:
-                    # clause is always unit after backtracking
-                    assert self.eval_clause(learnt_clause) == UNIT
-                    self.propagation_queue.append((self.get_unit_literal(learnt_clause), learnt_clause))
+                learnt_clause_id = self.insert_clause(learnt_clause, is_learnt=True, lbd=lbd)
+                self.initialize_learnt_clause(learnt_clause_id)
+
+                if self.clause_exchange != None:
+                    self.clause_exchange.export_clause(learnt_clause, lbd)
+
+                # clause is always unit after backtracking
+                unit_literal = self.get_unit_literal(learnt_clause)
+                assert unit_literal != None
+                self.assign_variable(unit_literal, 1, self.decision_level, learnt_clause_id)
+
+                if self.stats.conflicts % self.progress_interval == 0:
+                    self.report_progress()
+
+                if self.formula_key != None and self.stats.conflicts % self.checkpoint_interval == 0:
+                    self.save_checkpoint()
+
+                self.stop_reason = self.get_stop_reason()
+
+                if self.stop_reason != None:
+                    if self.formula_key != None:
+                        self.save_checkpoint()
+
+                    return {}, UNKNOWN
 
                 # continue with unit propagation
                 continue
 
-            if (self.eval_formula(formula) == UNDECIDED):
-                # increments decision level after choosing a variable
+            # propagation reports every unsat clause, so a full assignment without conflict satisfies the formula
+            # once every assumption is decided, since an assumption may be 0
+            if len(self.trail) == self.n_vars and self.decision_level >= len(self.assumptions):
+                return self.get_assignments(), SAT
+
+            # restarts only once propagation is done, so the last learnt clause has asserted its literal
+            # if the clause is a single literal clause, the literal stays assigned at decision level 0
+            if self.is_restart and self.restart_policy.should_restart():
+                self.restart()
+
+                # imported clauses may be unit at decision level 0, so they are propagated before the next decision
+                if self.clause_exchange != None:
+                    if not self.import_clauses():
+                        self.is_unsat = True
+                        return {}, UNSAT
+
+                    continue
+
+            if self.is_rephase and self.rephase_countdown <= 0:
+                self.rephase()
+
+            if self.is_reduce and self.should_reduce():
+                self.reduce_learnt_clauses()
+
+            literal = None
+
+            while self.decision_level < len(self.assumptions):
+                assumption = self.assumptions[self.decision_level]
+
+                if self.assignments[assumption] == UNASSIGNED:
+                    literal = assumption
+                    break
+
+                if self.assignments[assumption] == 0:
+                    self.failed_assumptions = self.analyze_final(assumption)
+                    return {}, UNSAT
+
+                # an assumption that is already 1 gets an empty decision level, so assumption i stays at decision level i + 1
+                self.trail_limits.append(len(self.trail))
+                self.decision_level += 1
+
+            if literal == None:
+                if len(self.trail) == self.n_vars:
+                    return self.get_assignments(), SAT
+
                 variable, value = self.pick_branching_variable()
-                self.decision_level += 1 
-                self.assign_variable(variable, value, self.decision_level)
+                literal = variable if value == 1 else -variable
+
+            # increments decision level after choosing a literal
+            self.trail_limits.append(len(self.trail))
+            self.decision_level += 1
+            self.assign_variable(literal, 1, self.decision_level)
 
     def pick_branching_variable(self):
-        # tracks number of pick branch calls
-        self.pick_branch_calls += 1
+        self.stats.decisions += 1
 
-        # uses vsids heuristic - takes the variable with the highest count
-        if self.is_vsids:
-            variable = max(self.unassigned, key=lambda variable: self.vsids_counter[variable])
-        else:
-            variable = self.unassigned[0]
-        
-        return variable, 0
+        # uses vsids heuristic - takes the unassigned variable with the highest count
+        # variables assigned since they were last inserted are discarded lazily
+        variable = self.order.pop()
+
+        while variable != None and self.assignments[variable] != UNASSIGNED:
+            variable = self.order.pop()
 
-    def unit_propagation(self, formula):
+        return variable, self.phases.pick(variable)
+
+    def unit_propagation(self):
         """
         Applies unit propagation rules until there are no more unit clauses, or if a conflict is identified.
-            :param formula: SAT formula.
-            :returns: None.
-        """        
-        # adds single literal clauses to propagation queue
-        clauses = [(self.get_unit_literal(clause), clause) 
-                for clause in self.single_literal_clauses
-                if self.eval_clause(clause) == UNIT]
-
-        self.propagation_queue = clauses + self.propagation_queue
-
-        # checks the propagation queue for unit literals
-        while self.propagation_queue != []:
-            if self.eval_formula(formula) == UNSAT:
-                self.logger.log("conflict")
-                return
+            :returns: Id of unsat clause if a conflict is identified, else None.
+        """
+        if self.is_timed:
+            start_time = time.perf_counter()
 
-            unit_literal, antecedent = self.propagation_queue.pop(0)
-            
-            if self.eval_clause(antecedent) == UNIT:
-                # unit implication rule: if all other literals in the clause have value 0, then the last literal must have value 1
-                self.assign_variable(unit_literal, 1, self.decision_level, antecedent)
-            else:
-                # clauses in the propagation queue might not be unit
-                # due to backtracking or other clauses being visited first
-                unit_literal = None
-                antecedent = None
-
-    def update_propagation_queue(self, assigned_literal):
-        # updates propagation queue after every assignment
-        # claim: new unit clauses watch the last assigned literal
-        # adds all new unit literals and clauses to propagation queue
-        last_assigned_literal = assigned_literal
-
-        # only checks clauses where the last assigned literal has value 0
-        literal = (last_assigned_literal
-                if self.eval_literal(last_assigned_literal) == 0 
-                else -last_assigned_literal)
-        
-        for clause in self.literal_clause_watchlist[literal]:
-            if self.eval_clause(clause) == UNIT:
-                unit_literal = self.get_unit_literal(clause)
-                antecedent = clause
-                self.propagation_queue.append((unit_literal, antecedent))
+        n_assigned = len(self.trail)
+
+        # single literal clauses cannot be watched, so they are assigned directly at decision level 0
+        if self.decision_level == 0:
+            for clause_id in self.single_literal_clauses:
+                literal = self.arena.literals[self.arena.starts[clause_id]]
+                value = self.eval_literal(literal)
+
+                if value == UNASSIGNED:
+                    self.assign_variable(literal, 1, 0, clause_id)
+                elif value == 0:
+                    if self.is_log:
+                        self.logger.log("conflict")
+
+                    return clause_id
+
+        conflict = self.propagate()
+        self.stats.propagations += len(self.trail) - n_assigned
+
+        if self.is_timed:
+            self.stats.add_time("propagate", start_time)
+
+        if conflict != None and self.is_log:
+            self.logger.log("conflict")
+
+        return conflict
+
+    def propagate(self):
+        """
+        Visits the clauses watching the negation of each queued literal.
+        Watches are moved off literals = 0 where possible, and the other watched literal of a clause that became unit is assigned.
+        Watch lists are compacted in place as they are traversed.
+            :returns: Id of unsat clause if a conflict is identified, else None.
+        """
+        queue = self.trail
+        watchlists = self.literal_clause_watchlist
+        binary_implications = self.literal_binary_implications
+        literals = self.arena.literals
+        starts = self.arena.starts
+        sizes = self.arena.sizes
+        assignments = self.assignments
+        conflict = None
+
+        while self.queue_head < len(queue) and conflict == None:
+            false_literal = -queue[self.queue_head]
+            self.queue_head += 1
+
+            # binary clauses are visited first, since they imply their other literal without any search
+            implications = binary_implications[false_literal]
+
+            for k in range(0, len(implications), 2):
+                implied_literal = implications[k]
+                value = assignments[implied_literal]
+
+                if value == 0:
+                    conflict = implications[k + 1]
+                    break
+
+                if value == UNASSIGNED:
+                    self.assign_variable(implied_literal, 1, self.decision_level, implications[k + 1])
+
+            if conflict != None:
+                break
+
+            watchlist = watchlists[false_literal]
+            size = len(watchlist)
+            i = 0 # read position
+            j = 0 # write position
+
+            while i < size:
+                clause_id = watchlist[i]
+                blocker = watchlist[i + 1]
+                i += 2
+
+                if assignments[blocker] == 1:
+                    watchlist[j] = clause_id
+                    watchlist[j + 1] = blocker
+                    j += 2
+                    continue
+
+                # keeps the false literal as the second watched literal
+                start = starts[clause_id]
+
+                if literals[start] == false_literal:
+                    literals[start] = literals[start + 1]
+                    literals[start + 1] = false_literal
+
+                first = literals[start]
+
+                # clause is satisfied by the other watched literal, which becomes the blocker
+                if first != blocker and assignments[first] == 1:
+                    watchlist[j] = clause_id
+                    watchlist[j + 1] = first
+                    j += 2
+                    continue
+
+                # moves the watch to a literal != 0, the clause leaves this watch list
+                for k in range(start + 2, start + sizes[clause_id]):
+                    literal = literals[k]
+
+                    if assignments[literal] != 0:
+                        literals[start + 1] = literal
+                        literals[k] = false_literal
+                        watchlists[literal] += (clause_id, first)
+                        break
+                else:
+                    watchlist[j] = clause_id
+                    watchlist[j + 1] = first
+                    j += 2
+
+                    if assignments[first] == 0:
+                        conflict = clause_id
+                        break
+
+                    # unit implication rule: if all other literals in the clause have value 0, then the last literal must have value 1
+                    self.assign_variable(first, 1, self.decision_level, clause_id)
+
+            # drops the watches that were moved, keeping any watches not visited because of a conflict
+            del watchlist[j:i]
+
+        if conflict != None:
+            self.queue_head = len(queue)
+
+        return conflict
 
     def resolution(self, clause1, clause2, pivot):
         """
@@ -212,83 +543,225 @@ class Solver:
         resolved_clause = { literal for literal in clause1 if literal != pivot }
         resolved_clause |= { literal for literal in clause2 if literal != -pivot }
 
-        if self.is_proof:
-            self.add_resolution_to_proof(clause1, clause2, frozenset(resolved_clause))
-        
-        return frozenset(resolved_clause)
+        return resolved_clause
 
-    def get_uip(self, learnt_clause):
+    def conflict_analysis(self, conflict):
         """
-        Gets the UIP of the learnt clause if it exists.
-        There is a unique implication point if the learnt clause only has 1 variable at the current decision level.
-            :param learnt_clause: Target clause.
-            :returns: Returns the UIP variable if found, else returns None.
+        "Backtracks" in the implication graph via resolution until the initial assignments leading to the conflict have been learnt.
+        Uses 1-UIP heuristic, then removes the literals implied by the other literals of the learnt clause.
+        Variables are marked as seen instead of resolving sets of literals, so the trail is traversed once.
+            :param conflict: Id of unsat clause found by unit propagation.
+            :returns: Learnt clause with the uip literal first, stage to backtrack to.
         """
-        literals = [ literal 
-                for literal in learnt_clause 
-                if self.get_decision_level(literal) == self.decision_level ]
+        arena = self.arena
+        trail = self.trail
+        seen = self.seen
+        decision_levels = self.decision_levels
+        antecedents = self.antecedents
+
+        # the uip literal is put in front once found
+        learnt_clause = [ None ]
+        seen_variables = [] # [ variable ]
+        pending = 0 # number of seen literals at the current decision level that are not yet resolved
+        index = len(trail)
+        pivot = None
+        clause_id = conflict
+
+        # resolution steps are only tracked for proofs that list them
+        is_tracked = self.is_proof and self.proof.needs_steps
+
+        if is_tracked:
+            proof_clause = set(arena.clause(conflict))
+            steps = [] # [ ( index of antecedent in proof, resolved clause ) ]
+
+        if self.is_log:
+            self.logger.log("unsat clause: " + str(arena.clause(conflict)))
+
+        # performs resolution in a lifo order of assignment of literals
+        # the seen literal at the current decision level last assigned is used as pivot,
+        # until it is the only seen literal left at the current decision level
+        while True:
+            self.bump_clause(clause_id)
 
-        if len(literals) == 1:
-            return literals[0]
-        else:
-            return None
+            for literal in arena.clause(clause_id):
+                variable = abs(literal)
 
-    def conflict_analysis(self, formula, is_first_uip=True):
-        """
-        "Backtracks" in the implication graph via resolution until the initial assignments leading to the conflict have been learnt.
-        Uses 1-UIP heuristic.
-            :param formula: SAT formula.
-            :returns: Learnt clause, stage to backtrack to.
-        """
-        # invariant: unsat clause watches last assigned literal
-        # conflict analysis starts with the unsat clause
-        last_assigned_literal = self.trail[self.decision_level][-1]
-
-        # only checks clauses where the last assigned literal has value 0
-        literal = (last_assigned_literal 
-                if self.eval_literal(last_assigned_literal) == 0 
-                else -last_assigned_literal)
-        
-        for clause in self.literal_clause_watchlist[literal]:
-            if self.eval_clause(clause) == UNSAT:
-                learnt_clause = clause
+                # literals at decision level 0 are always 0, so they are left out of the learnt clause
+                if seen[variable] or literal == pivot or decision_levels[variable] == 0:
+                    continue
+
+                seen[variable] = 1
+                seen_variables.append(variable)
+
+                if decision_levels[variable] == self.decision_level:
+                    pending += 1
+                else:
+                    learnt_clause.append(literal)
+
+            index -= 1
+
+            while not seen[abs(trail[index])]:
+                index -= 1
+
+            pivot = trail[index]
+            seen[abs(pivot)] = 0
+            pending -= 1
+
+            if pending == 0:
                 break
 
-        self.logger.log("unsat clause: " + str(learnt_clause))
-        
-        # performs resolution on the learnt clause in a lifo order of assignment of literals
-        for i in range(len(self.trail[self.decision_level]) + 1):
-            # guarantee: there is a uip at the first assignment of any decision level
-            uip_literal = self.get_uip(learnt_clause)
+            clause_id = antecedents[abs(pivot)]
 
-            if is_first_uip:
-                # terminates at the 1st uip
-                if uip_literal != None:
-                    break
+            if self.is_log:
+                self.logger.log("pivot literal: {}, antecedent: {}".format(str(pivot), str(clause_id)))
 
-            # finds target literal at the current decision level to use as pivot in resolution
-            pivot = self.trail[self.decision_level][-i]
+            if is_tracked:
+                proof_clause = self.resolution(arena.clause(clause_id), proof_clause, pivot)
+                steps.append((self.clause_index_map[clause_id], proof_clause))
 
-            # edge case: pivot's negation may not be in learnt clause - skips over the literal
-            if -pivot not in learnt_clause:
-                continue
+        learnt_clause[0] = -pivot
+        learnt_clause = self.minimize(learnt_clause)
+
+        if is_tracked:
+            # removed literals and literals at decision level 0 are resolved away with their antecedents
+            self.resolve_away(proof_clause, steps, learnt_clause)
+            self.learnt_clause_index = self.proof.add_derived(learnt_clause, self.clause_index_map[conflict], steps)
+        elif self.is_proof:
+            self.learnt_clause_index = self.proof.add_derived(learnt_clause, None, None)
+
+        for variable in seen_variables:
+            seen[variable] = 0
 
-            self.logger.log("resolved clause: {}, pivot literal: {}, antecedent: {}".format(
-                    str(learnt_clause), str(pivot), str(self.get_antecedent(pivot))))
-            
-            learnt_clause = self.resolution(self.get_antecedent(pivot), learnt_clause, pivot)
-            
         # backtracks to highest decision level other than the uip literal
         # if clause only contains uip literal, will return 0
         # this ensures learnt clause is always unit after backtracking
-        stage = max({ self.get_decision_level(literal) 
-                for literal in learnt_clause 
-                if literal != uip_literal }, 
-                default=0)
+        stage = max((decision_levels[abs(literal)] for literal in learnt_clause[1:]), default=0)
+
+        if self.is_log:
+            self.logger.log("learnt clause: {}, stage: {}, uip literal: {}".format(str(learnt_clause), str(stage), str(-pivot)))
 
-        self.logger.log("learnt clause: {}, stage: {}, uip literal: {}".format(str(learnt_clause), str(stage), str(uip_literal)))
+        if self.is_vsids and self.vsids_mode == EVSIDS:
+            for variable in seen_variables:
+                self.order.bump(variable)
 
-        return frozenset(learnt_clause), stage
+            self.vsids_decay()
+
+        self.clause_increment *= self.clause_decay_factor
+
+        return learnt_clause, stage
+
+    def minimize(self, learnt_clause):
+        """
+        Removes the literals of the learnt clause whose negation is implied by the other literals of the learnt clause,
+        following the antecedents recursively as in MiniSat.
+        The decision levels of the learnt clause are kept as a bitmask, so searches through other decision levels fail early.
+            :param learnt_clause: Learnt clause with the uip literal first, whose variables are marked as seen.
+            :returns: Minimized learnt clause with the uip literal first.
+        """
+        levels = 0
+
+        for literal in learnt_clause[1:]:
+            levels |= 1 << (self.decision_levels[abs(literal)] & 63)
+
+        minimized_clause = learnt_clause[:1]
+
+        for literal in learnt_clause[1:]:
+            if self.antecedents[abs(literal)] == None or not self.is_redundant(literal, levels):
+                minimized_clause.append(literal)
+
+        for variable in self.marked:
+            self.seen[variable] = 0
+
+        del self.marked[:]
+
+        return minimized_clause
+
+    def is_redundant(self, literal, levels):
+        # checks if every path from the literal back through antecedents reaches a seen literal or decision level 0
+        seen = self.seen
+        decision_levels = self.decision_levels
+        antecedents = self.antecedents
+        marked = self.marked
+        top = len(marked)
+        stack = [ literal ]
+
+        while stack != []:
+            variable = abs(stack.pop())
+
+            for other in self.arena.clause(antecedents[variable]):
+                other_variable = abs(other)
+
+                if other_variable == variable or seen[other_variable] or decision_levels[other_variable] == 0:
+                    continue
+
+                if antecedents[other_variable] != None and (1 << (decision_levels[other_variable] & 63)) & levels:
+                    seen[other_variable] = 1
+                    marked.append(other_variable)
+                    stack.append(other)
+                else:
+                    # clears the marks of this search only, since the variables marked by earlier searches are redundant
+                    for marked_variable in marked[top:]:
+                        seen[marked_variable] = 0
+
+                    del marked[top:]
+                    return False
+
+        return True
+
+    def analyze_final(self, assumption):
+        """
+        Finds the assumptions the negation of a failed assumption is implied by, following antecedents back from it.
+        While assumptions remain, every decision is an assumption, so the decisions reached are the assumptions responsible.
+            :param assumption: Assumption = 0.
+            :returns: List of failed assumptions, which cannot all be 1 in any model of the formula.
+        """
+        failed_assumptions = [ assumption ]
+
+        if self.decision_level == 0:
+            return failed_assumptions
+
+        seen = self.seen
+        seen[abs(assumption)] = 1
+
+        for literal in reversed(self.trail[self.trail_limits[0]:]):
+            variable = abs(literal)
+
+            if not seen[variable]:
+                continue
+
+            clause_id = self.antecedents[variable]
+
+            if clause_id == None:
+                failed_assumptions.append(literal)
+            else:
+                for other in self.arena.clause(clause_id):
+                    if abs(other) != variable and self.decision_levels[abs(other)] > 0:
+                        seen[abs(other)] = 1
+
+            seen[variable] = 0
+
+        seen[abs(assumption)] = 0
+
+        return failed_assumptions
+
+    def resolve_away(self, clause, steps, kept_literals):
+        """
+        Resolves every literal not kept out of a clause whose literals are all 0, with the antecedent of its variable.
+        Literals are resolved in a lifo order of assignment, since the antecedent of a literal only has literals assigned before it.
+            :param clause: Set of literals.
+            :param steps: List of resolution steps the steps taken are appended to.
+            :param kept_literals: Literals that are not resolved away.
+            :returns: Resolved clause.
+        """
+        kept_literals = set(kept_literals)
+
+        for pivot in reversed(self.trail):
+            if -pivot in clause and -pivot not in kept_literals:
+                antecedent = self.get_antecedent(pivot)
+                clause = self.resolution(self.arena.clause(antecedent), clause, pivot)
+                steps.append((self.clause_index_map[antecedent], clause))
+
+        return clause
 
     def backtrack(self, stage):
         """
@@ -296,41 +769,50 @@ class Solver:
             :param stage: Chosen decision level.
             :returns: None.
         """
-        self.logger.log("backtracking to level " + str(stage))
+        if self.is_log:
+            self.logger.log("backtracking to level " + str(stage))
+
+        if stage >= self.decision_level:
+            return
 
         # removes assignments from all decision levels after stage
-        for level in range(stage + 1, self.decision_level + 1):
-            for literal in self.trail[level]:
-                self.unassign_variable(literal)
+        start = self.trail_limits[stage]
+
+        for literal in self.trail[start:]:
+            self.unassign_variable(literal)
 
-            self.trail[level] = []
+        del self.trail[start:]
+        del self.trail_limits[stage:]
+        self.decision_level = stage
+
+        # assignments at the remaining decision levels have all been propagated
+        self.queue_head = start
 
     def assign_variable(self, literal, value, decision_level, antecedent=None):
         variable = abs(literal)
-        value = (value 
-                if literal > 0 
+        value = (value
+                if literal > 0
                 else 1 - value)
-        
-        self.logger.log("assign {} = {} @ {} with antecedent {}".format(variable, value, decision_level, str(antecedent)))
 
-        self.trail[decision_level].append(literal)
-        self.unassigned.remove(variable)        
-        self.assignments[variable] = value
+        if self.is_log:
+            self.logger.log("assign {} = {} @ {} with antecedent {}".format(variable, value, decision_level, str(antecedent)))
+
+        # the trail holds the literal assigned 1
+        # clauses watching its negation are visited when it reaches the queue head
+        literal = variable if value == 1 else -variable
+        self.trail.append(literal)
+        self.assignments[literal] = 1
+        self.assignments[-literal] = 0
         self.antecedents[variable] = antecedent
         self.decision_levels[variable] = decision_level
 
-        # updates clauses watching literal of value 0
-        self.update_watched_literals(literal)
-
-        # updates propagation queue after every assignment
-        self.update_propagation_queue(literal)
-        
     def unassign_variable(self, literal):
         variable = abs(literal)
-        self.unassigned.append(variable)
-        self.assignments[variable] = UNASSIGNED
+        self.order.insert(variable)
+        self.phases.save(literal)
+        self.assignments[literal] = UNASSIGNED
+        self.assignments[-literal] = UNASSIGNED
         self.antecedents[variable] = None
-        self.decision_levels[variable] = None
 
     def get_decision_level(self, literal):
         variable = abs(literal)
@@ -338,234 +820,570 @@ class Solver:
 
     def get_antecedent(self, literal):
         variable = abs(literal)
-        return self.antecedents[variable] 
-          
-    def eval_formula(self, formula):
-        # lazy implementation
-        # invariant: unsat clause always watches last assigned variable
-        if self.decision_level in self.trail and self.trail[self.decision_level] != []:
-            last_assigned_literal = self.trail[self.decision_level][-1]
-
-            # only checks clauses where the last assigned literal has value 0
-            literal = (last_assigned_literal 
-                    if self.eval_literal(last_assigned_literal) == 0 
-                    else -last_assigned_literal)
-            
-            for clause in self.literal_clause_watchlist[literal]:
-                if self.eval_clause(clause) == UNSAT:
-                    return UNSAT
-            
-        for clause in formula:
-            value = self.eval_clause(clause)
-
-            if value == UNIT or value == UNDECIDED:
-                return UNDECIDED
-        
-        return SAT
-    
-    def eval_clause(self, clause):        
-        # lazy implementation
-        # NOTE: the eval can return UNDECIDED even when the clause is SAT
-        # because of the nature of lazy implementation but this is intended
-        # since watched literals do not change when another literal is set to 1
-        # invariant: if clause evals to UNIT/UNSAT, all unwatched literals in clause are assigned 0
-        watched_literals = self.clause_literal_watchlist[clause]
-        a = watched_literals[0]
-        b = watched_literals[-1]
-
-        if self.eval_literal(a) == 1 or self.eval_literal(b) == 1:
-            value = SAT
-        elif self.eval_literal(a) == 0 and self.eval_literal(b) == 0:
-            value = UNSAT
-        # if only one literal is unassigned and the other == 0
-        elif self.eval_literal(a) + self.eval_literal(b) == UNASSIGNED:
-            value = UNIT
-        # if clause contains only 1 literal
-        elif self.eval_literal(a) == UNASSIGNED and self.eval_literal(b) == UNASSIGNED and a == b:
-            value = UNIT
-        else:
-            value = UNDECIDED
-                        
-        return value
+        return self.antecedents[variable]
 
     def eval_literal(self, literal):
-        is_negated = literal < 0
-        variable = abs(literal)
-        value = self.assignments[variable]
-        return (value 
-                if not is_negated 
-                else 1 - value)
+        return self.assignments[literal]
+
+    def get_assignments(self):
+        # { variable: value }
+        return { variable: self.assignments[variable] for variable in range(1, self.n_vars + 1) }
 
     def get_unit_literal(self, clause):
-        # lazy implementation
         # returns None if clause is not UNIT
-        if self.eval_clause(clause) != UNIT:
-            return None
-        
-        watched_literals = self.clause_literal_watchlist[clause]
-        a = watched_literals[0]
-        b = watched_literals[-1]
+        unit_literal = None
+
+        for literal in clause:
+            value = self.eval_literal(literal)
 
-        if self.eval_literal(a) == UNASSIGNED:
-            return a
-        else: 
-            return b
+            if value == 1:
+                return None
 
-    def add_watched_literal_ref(self, literal, clause):
-        self.literal_clause_watchlist[literal].append(clause)
-        self.clause_literal_watchlist[clause].append(literal)
+            if value == UNASSIGNED:
+                if unit_literal != None:
+                    return None
 
-    def remove_watched_literal_ref(self, literal, clause):
-        self.literal_clause_watchlist[literal].remove(clause)
-        self.clause_literal_watchlist[clause].remove(literal)
+                unit_literal = literal
 
-    def add_watched_literal(self, clause):
+        return unit_literal
+
+    def add_clause(self, clause):
         """
-        Adds 1 new watched literal of value != 0 to the clause if found, else adds new literal of value == 0
-            :param clause: Clause to add watched literal to.
-            :returns: New watched literal.
+        Adds a clause to the formula between solves. Learnt clauses are kept, since they are implied by the formula without it.
+        Literals = 0 at decision level 0 are left out, and clauses that are 1 at decision level 0 are not added.
+            :param clause: Iterable of literals. Variables above the number of variables are created.
+            :returns: None.
         """
-        if len(clause) == 1 and len(self.clause_literal_watchlist[clause]) == 1:
-            # if clause is unit clause
-            return 
+        clause = list(dict.fromkeys(clause))
+
+        # the proof and checkpoints only cover the formula the solver was created with
+        self.stop_proof()
+        self.formula_key = None
+        self.backtrack(0)
+        self.prepare_literals(clause)
 
-        if len(self.clause_literal_watchlist[clause]) == 2:
-            # to avoid more than 2 references when duplicate clauses are learnt
+        if any(-literal in clause for literal in clause):
             return
 
-        for literal in clause:
-            if self.eval_literal(literal) != 0 and literal not in self.clause_literal_watchlist[clause]:
-                self.add_watched_literal_ref(literal, clause)
-                return literal
-        
-        # if watched literal = 0, ensures it has the highest decision level in the clause among literals = 0
-        # this ensures unwatched literals are not unassigned before watched literals during backtracking
-        # avoids edge case: initial status: UNSAT, status after backtracking: UNDECIDED, lazy eval status: UNIT/UNSAT
-        # thereby keeping watched literals invariant for learnt clauses
-        highest = None
-        chosen_literal = None
+        literals = []
 
         for literal in clause:
-            if self.eval_literal(literal) == 0 and literal not in self.clause_literal_watchlist[clause]:
-                if highest == None or highest < self.decision_levels[abs(literal)]:
-                    highest = self.decision_levels[abs(literal)]
-                    chosen_literal = literal
+            value = self.assignments[literal]
 
-        self.add_watched_literal_ref(chosen_literal, clause)
-        return chosen_literal
+            if value == 1:
+                return
 
-    def update_watched_literals(self, literal):
+            if value == UNASSIGNED:
+                literals.append(literal)
+
+        self.insert_clause(literals)
+
+    def new_variable(self):
+        # returns the created variable
+        self.add_variables(1)
+        return self.n_vars
+
+    def prepare_literals(self, literals):
         """
-        Called when a literal is assigned. Updates watched literals in clauses where the literal's value is 0.
-            :param literal: Literal that has been assigned.
+        Creates the variables of the literals above the number of variables, and restores the clauses
+        removed by variable elimination if a literal has an eliminated variable, so the variable can be constrained again.
+            :param literals: List of literals added to the formula or assumed.
             :returns: None.
         """
-        # removes all clauses watching literal where literal = 0
-        literal = literal if self.eval_literal(literal) == 0 else -literal
-        clauses = self.literal_clause_watchlist[literal][:]
-        
-        for clause in clauses:
-            # no need to change reference since clause status will not change
-            if self.eval_clause(clause) == UNSAT or self.eval_clause(clause) == SAT:
-                continue
+        max_variable = max((abs(literal) for literal in literals), default=0)
 
-            self.remove_watched_literal_ref(literal, clause)
-            new_literal = self.add_watched_literal(clause)
+        if max_variable > self.n_vars:
+            self.add_variables(max_variable - self.n_vars)
 
-            # if new reference is assigned 0, then restore initial reference
-            # keeps the invariants: 
-            # 1. if watched literals eval to UNIT/UNSAT, all other literals in clause are 0
-            # 2. UNSAT clause always watches last assigned variable
-            if self.eval_literal(new_literal) == 0:
-                self.remove_watched_literal_ref(new_literal, clause)
-                self.add_watched_literal_ref(literal, clause)
+        if self.preprocessor == None:
+            return
 
-    def initialize_learnt_clause(self, learnt_clause):
-        # adds watched literals for learnt clause and keeps watched literals invariant
-        self.add_watched_literal(learnt_clause)
-        self.add_watched_literal(learnt_clause)
+        eliminated = self.preprocessor.eliminated
 
-        # if the clause contains only 1 literal, add to single literal clause set
-        if len(learnt_clause) == 1:
-            self.single_literal_clauses.add(learnt_clause)
+        if any(abs(literal) < len(eliminated) and eliminated[abs(literal)] for literal in literals):
+            for clause in self.preprocessor.restore():
+                self.add_clause(clause)
 
-        if self.is_vsids:
+    def add_variables(self, count):
+        """
+        Adds variables numbered after the current variables, between solves.
+        Negative literals index literal-indexed lists from the end, so the entries of the new literals are inserted
+        between the entries of the positive and negative literals.
+            :param count: Number of variables to add.
+            :returns: None.
+        """
+        n_vars = self.n_vars + count
+        self.assignments[self.n_vars + 1:self.n_vars + 1] = [ UNASSIGNED ] * (2 * count)
+        self.antecedents += [ None ] * count
+        self.decision_levels += [ 0 ] * count
+        self.seen += [ 0 ] * count
+
+        for variable in range(self.n_vars + 1, n_vars + 1):
+            for literal in (variable, -variable):
+                self.literal_clause_watchlist[literal] = []
+                self.literal_binary_implications[literal] = []
+
+        self.order.add_variables(count)
+        self.phases.add_variables(count)
+        self.n_vars = n_vars
+
+    def stop_proof(self):
+        # writes the proof, and stops recording it
+        if self.is_proof:
+            self.proof.close()
+            self.is_proof = False
+
+    def insert_clause(self, clause, is_learnt=False, lbd=0):
+        """
+        Stores the clause in the arena, and watches it if it has at least 2 literals.
+            :param clause: Iterable of literals.
+            :param is_learnt: Whether the clause was learnt during search.
+            :param lbd: Literal block distance of a learnt clause.
+            :returns: Clause id.
+        """
+        clause_id = self.arena.add(clause, is_learnt, lbd)
+
+        if self.arena.sizes[clause_id] == 0:
+            self.empty_clause = clause_id
+        elif self.arena.sizes[clause_id] == 1:
+            self.single_literal_clauses.append(clause_id)
+        elif self.arena.sizes[clause_id] == 2:
+            self.attach_binary_clause(clause_id)
+
+            if is_learnt:
+                self.learnt_clauses.append(clause_id)
+                self.learnt_bytes += self.arena.clause_bytes(clause_id)
+        elif self.arena.sizes[clause_id] > 2:
+            self.attach_clause(clause_id)
+
+            if is_learnt:
+                self.learnt_clauses.append(clause_id)
+                self.learnt_bytes += self.arena.clause_bytes(clause_id)
+
+        return clause_id
+
+    def attach_clause(self, clause_id):
+        """
+        Watches 2 literals of the clause, choosing literals != 0 first, then literals = 0 with the highest decision level.
+        This ensures unwatched literals are not unassigned before watched literals during backtracking,
+        keeping the watched literals invariant for learnt clauses.
+            :param clause_id: Id of clause with at least 2 literals.
+            :returns: None.
+        """
+        start = self.arena.starts[clause_id]
+        literals = sorted(self.arena.clause(clause_id), key=lambda literal:
+                (1, -self.get_decision_level(literal))
+                if self.eval_literal(literal) == 0
+                else (0, 0))
+        for k, literal in enumerate(literals):
+            self.arena.literals[start + k] = literal
+
+        a = literals[0]
+        b = literals[1]
+        self.literal_clause_watchlist[a] += (clause_id, b)
+        self.literal_clause_watchlist[b] += (clause_id, a)
+
+    def attach_binary_clause(self, clause_id):
+        a, b = self.arena.clause(clause_id)
+        self.literal_binary_implications[a] += (b, clause_id)
+        self.literal_binary_implications[b] += (a, clause_id)
+
+    def initialize_learnt_clause(self, learnt_clause_id):
+        if self.is_proof:
+            self.clause_index_map[learnt_clause_id] = self.learnt_clause_index
+
+        if self.is_vsids and self.vsids_mode == LEGACY:
             # increments vsids counter for all variables in clause
-            for literal in learnt_clause:
-                self.vsids_counter[abs(literal)] += 1
-        
+            for literal in self.arena.clause(learnt_clause_id):
+                self.order.bump(abs(literal))
+
             # periodically, all counts are right binary shifted as per vsids heuristic
             self.vsids_countdown -= 1
             if self.vsids_countdown == 0:
                 self.vsids_countdown = self.vsids_interval
                 self.vsids_decay()
-        
-        # restarts search process by clearing all decisions and assignments made
-        # does not delete clauses learnt thus far
-        if self.is_restart:
-            self.restart_countdown -= 1
-            if self.restart_countdown <= 0:
-                # the restart period is extended after each restart
-                self.restart_countdown = self.restart_interval
-                self.restart_interval *= self.restart_interval_multiplier
-                self.restart()
+
+        self.reduce_countdown -= 1
+        self.rephase_countdown -= 1
 
     def vsids_decay(self):
-        for variable in self.vsids_counter.keys():
-            self.vsids_counter[variable] = self.vsids_counter[variable] >> 1
+        self.order.decay()
+
+    def get_lbd(self, clause):
+        # number of distinct decision levels among the literals of the clause
+        return len({ self.decision_levels[abs(literal)] for literal in clause })
+
+    def bump_clause(self, clause_id):
+        arena = self.arena
+
+        if not arena.learnt[clause_id]:
+            return
+
+        arena.activity[clause_id] += self.clause_increment
+
+        if arena.activity[clause_id] > 1e20:
+            # rescales all activities, keeping their relative order
+            for learnt_clause_id in self.learnt_clauses:
+                arena.activity[learnt_clause_id] *= 1e-20
+
+            self.clause_increment *= 1e-20
+
+        # keeps the lowest lbd seen for the clause
+        lbd = self.get_lbd(arena.clause(clause_id))
+
+        if lbd < arena.lbd[clause_id]:
+            arena.lbd[clause_id] = lbd
+
+    def should_reduce(self):
+        if self.reduce_countdown <= 0:
+            return True
+
+        # ceilings are only enforced once a clause has been learnt since the last reduction
+        if self.reduce_countdown >= self.reduce_interval:
+            return False
+
+        if self.max_learnt_clauses != None and len(self.learnt_clauses) > self.max_learnt_clauses:
+            return True
+
+        return self.max_learnt_bytes != None and self.learnt_bytes > self.max_learnt_bytes
+
+    def is_locked(self, clause_id):
+        # a clause is locked if it is the antecedent of the literal it implied
+        # which is the first literal of a watched clause, and either literal of a binary clause
+        start = self.arena.starts[clause_id]
+        end = start + (2 if self.arena.sizes[clause_id] == 2 else 1)
+
+        for literal in self.arena.literals[start:end]:
+            if self.assignments[literal] == 1 and self.antecedents[abs(literal)] == clause_id:
+                return True
+
+        return False
+
+    def reduce_learnt_clauses(self):
+        """
+        Deletes the worse half of the learnt clauses, ranked by lbd and then activity.
+        Glue clauses and locked clauses are kept.
+            :returns: None.
+        """
+        arena = self.arena
+        self.learnt_clauses.sort(key=lambda clause_id: (-arena.lbd[clause_id], arena.activity[clause_id]))
+
+        if self.is_timed:
+            start_time = time.perf_counter()
+
+        limit = len(self.learnt_clauses) // 2
+        kept_clauses = []
+
+        for i, clause_id in enumerate(self.learnt_clauses):
+            if i < limit and arena.lbd[clause_id] > self.glue_lbd and not self.is_locked(clause_id):
+                self.delete_clause(clause_id)
+            else:
+                kept_clauses.append(clause_id)
+
+        self.logger.log("reduced learnt clauses from {} to {}".format(len(self.learnt_clauses), len(kept_clauses)))
+
+        self.learnt_clauses = kept_clauses
+        self.detach_deleted_clauses()
+
+        # compacts the arena once most of its literals or clauses are deleted
+        if arena.wasted * 2 > len(arena.literals) or arena.n_deleted * 2 > len(arena):
+            self.collect_garbage()
+
+        self.reduce_interval += self.reduce_increment
+        self.reduce_countdown = self.reduce_interval
+        self.stats.reductions += 1
+
+        if self.is_timed:
+            self.stats.add_time("reduce", start_time)
+
+    def delete_clause(self, clause_id):
+        self.learnt_bytes -= self.arena.clause_bytes(clause_id)
+        self.arena.delete(clause_id)
+
+        if self.is_proof:
+            self.proof.delete(self.clause_index_map.pop(clause_id), self.arena.clause(clause_id))
+
+    def detach_deleted_clauses(self):
+        # removes the watches of deleted clauses in a single pass over all watch lists
+        deleted = self.arena.deleted
+
+        for watchlist in self.literal_clause_watchlist.values():
+            j = 0
+
+            for i in range(0, len(watchlist), 2):
+                if not deleted[watchlist[i]]:
+                    watchlist[j] = watchlist[i]
+                    watchlist[j + 1] = watchlist[i + 1]
+                    j += 2
+
+            del watchlist[j:]
+
+        for implications in self.literal_binary_implications.values():
+            j = 0
+
+            for i in range(0, len(implications), 2):
+                if not deleted[implications[i + 1]]:
+                    implications[j] = implications[i]
+                    implications[j + 1] = implications[i + 1]
+                    j += 2
+
+            del implications[j:]
+
+    def collect_garbage(self):
+        """
+        Compacts the arena, and renumbers the clause ids held in watch lists, binary implications, antecedents,
+        learnt clauses, single literal clauses and the proof. Called after deleted clauses are detached,
+        and between decisions, when no other clause id is held.
+            :returns: None.
+        """
+        ids = self.arena.collect() # { old clause id: new clause id }
+
+        for watchlist in self.literal_clause_watchlist.values():
+            for i in range(0, len(watchlist), 2):
+                watchlist[i] = ids[watchlist[i]]
+
+        for implications in self.literal_binary_implications.values():
+            for i in range(1, len(implications), 2):
+                implications[i] = ids[implications[i]]
+
+        antecedents = self.antecedents
+
+        # antecedents are locked, so they are never deleted
+        for variable in range(1, len(antecedents)):
+            if antecedents[variable] != None:
+                antecedents[variable] = ids[antecedents[variable]]
+
+        self.learnt_clauses = [ ids[clause_id] for clause_id in self.learnt_clauses ]
+        self.single_literal_clauses = [ ids[clause_id] for clause_id in self.single_literal_clauses ]
+
+        if self.empty_clause != None:
+            self.empty_clause = ids[self.empty_clause]
+
+        self.clause_index_map = { ids[clause_id]: index for clause_id, index in self.clause_index_map.items() }
 
     def restart(self):
-        self.trail = defaultdict(lambda: [], {})
-        self.unassigned = [ i for i in range(1, self.n_vars + 1) ] # { variable }
-        self.assignments = defaultdict(lambda: UNASSIGNED, {}) # { variable: value }
-        self.antecedents = defaultdict(lambda: None, {}) # { variable: clause }
-        self.decision_levels = defaultdict(lambda: 0, {}) # { variable: decision_level }
-        self.decision_level = 0
-        self.propagation_queue = []
+        # restarts search process by clearing all decisions and assignments made
+        # does not delete clauses learnt thus far
+        # assignments at decision level 0 are implied by the formula and are kept
+        self.logger.log("restarting")
+        self.backtrack(0)
+        self.restart_policy.on_restart()
+        self.phases.on_restart()
+        self.stats.restarts += 1
+
+    async def solve_async(self, assumptions=(), executor=None):
+        """
+        Solves in an executor, so an event loop can await many solves and bound them with asyncio.wait_for.
+        Cancelling the awaiting task interrupts the solve, which returns UNKNOWN at its next conflict.
+            :param assumptions: Iterable of literals assumed 1.
+            :param executor: Executor the solve runs in, defaults to the default executor of the event loop.
+            :returns: Assignments and value.
+        """
+        self.clear_interrupt()
+        future = asyncio.get_running_loop().run_in_executor(executor, self.solve, assumptions)
+
+        try:
+            return await future
+        except asyncio.CancelledError:
+            self.interrupt()
+            raise
+
+    def set_budget(self, conflicts=None, propagations=None, time=None, memory=None):
+        """
+        Sets the budgets of the following solves.
+            :param conflicts: Number of conflicts per solve.
+            :param propagations: Number of literals assigned by unit propagation per solve.
+            :param time: Seconds per solve.
+            :param memory: Megabytes of peak memory of the process.
+            :returns: None.
+        """
+        self.budgets = { "conflicts": conflicts, "propagations": propagations, "time": time, "memory": memory }
+
+    def interrupt(self):
+        # can be called from any thread
+        self.interrupt_event.set()
+
+    def clear_interrupt(self):
+        self.interrupt_event.clear()
+
+    def start_budgets(self):
+        # budgets count from the start of each solve
+        budgets = self.budgets
+        self.limits = {}
+
+        if budgets["conflicts"] != None:
+            self.limits["conflicts"] = self.stats.conflicts + budgets["conflicts"]
+
+        if budgets["propagations"] != None:
+            self.limits["propagations"] = self.stats.propagations + budgets["propagations"]
+
+        if budgets["time"] != None:
+            self.limits["time"] = time.perf_counter() + budgets["time"]
+
+        if budgets["memory"] != None:
+            self.limits["memory"] = budgets["memory"]
+
+    def get_stop_reason(self):
+        # returns the budget used up or "interrupt", or None if the solve goes on
+        if self.interrupt_event.is_set():
+            return "interrupt"
+
+        limits = self.limits
+
+        if not limits:
+            return None
+
+        if "conflicts" in limits and self.stats.conflicts >= limits["conflicts"]:
+            return "conflicts"
+
+        if "propagations" in limits and self.stats.propagations >= limits["propagations"]:
+            return "propagations"
+
+        if "time" in limits and time.perf_counter() >= limits["time"]:
+            return "time"
+
+        # reading memory usage is a system call, so it is only read every 1024 conflicts
+        if "memory" in limits and self.stats.conflicts % 1024 == 0:
+            peak_memory = get_peak_memory()
+
+            if peak_memory != None and peak_memory >= limits["memory"]:
+                return "memory"
+
+        return None
+
+    def report_progress(self):
+        if self.progress_callback == None and self.tensorboard == None:
+            return
 
-    def track_clause(self, clause):
-        # assigns a clause index to a clause
-        self.clauses.append(clause)
-        self.clause_index_map[clause] = len(self.clauses) - 1
+        stats = self.stats.get_stats()
 
-    def add_resolution_to_proof(self, clause1, clause2, resolved_clause):
-        self.track_clause(resolved_clause)
+        if self.progress_callback != None:
+            self.progress_callback(stats)
 
-        resolution = (self.clause_index_map[clause1], 
-                self.clause_index_map[clause2], 
-                self.clause_index_map[resolved_clause])
+        if self.tensorboard != None:
+            self.tensorboard.write(stats)
 
-        self.proof.append(resolution)
+    def import_clauses(self):
+        """
+        Adds the clauses learnt by other solvers as learnt clauses, without their literals = 0 at decision level 0.
+        Imported clauses are implied by the formula, so they do not change whether it is satisfiable.
+            :returns: False if an imported clause has every literal = 0, else True.
+        """
+        for clause in self.clause_exchange.import_clauses():
+            self.add_learnt_clause(clause, len(clause))
+
+            if self.is_unsat:
+                return False
+
+        return True
+
+    def add_learnt_clause(self, clause, lbd):
+        """
+        Adds a clause implied by the formula as a learnt clause at decision level 0, without its literals = 0.
+        If every literal is 0, the formula is unsat.
+            :param clause: Iterable of literals.
+            :param lbd: Literal block distance of the clause.
+            :returns: Clause id, or None if the clause is 1 or every literal is 0.
+        """
+        literals = []
+
+        for literal in clause:
+            value = self.assignments[literal]
+
+            if value == 1:
+                return None
+
+            if value == UNASSIGNED:
+                literals.append(literal)
+
+        if literals == []:
+            self.is_unsat = True
+            return None
+
+        return self.insert_clause(literals, is_learnt=True, lbd=lbd)
+
+    def save_checkpoint(self, path=None):
+        """
+        Writes the literals assigned at decision level 0, the learnt clauses, activities and phases to a checkpoint.
+            :param path: Path of checkpoint file, defaults to Config.CHECKPOINT_PATH.
+            :raises ValueError: when Config.CHECKPOINT_PATH was not set when the solver was created, or clauses were added
+            :returns: None.
+        """
+        if self.formula_key == None:
+            raise ValueError("checkpoints need Config.CHECKPOINT_PATH set when the solver is created, and no added clauses")
+
+        arena = self.arena
+        units = self.trail[:self.trail_limits[0]] if self.trail_limits else list(self.trail)
+        learnt_clauses = [ (arena.clause(clause_id), arena.lbd[clause_id], arena.activity[clause_id])
+                for clause_id in self.learnt_clauses ]
+
+        checkpoint = Checkpoint(self.formula_key, self.n_vars, units, learnt_clauses, self.order.activity,
+                self.phases.saved, self.order.increment, self.clause_increment)
+        write_checkpoint(checkpoint, path or self.checkpoint_path)
 
-    def generate_proof(self):
-        with open(self.output_path, "w") as f:
-            f.write("v {}\n".format(len(self.clauses)))
+    def load_checkpoint(self, path=None):
+        """
+        Resumes from a checkpoint of the same formula, adding its clauses as learnt clauses and taking its activities and phases.
+            :param path: Path of checkpoint file, defaults to Config.CHECKPOINT_PATH.
+            :raises ValueError: when the checkpoint is not of the formula of the solver
+            :returns: None.
+        """
+        checkpoint = read_checkpoint(path or self.checkpoint_path)
+
+        if self.formula_key == None or checkpoint.formula_key != self.formula_key:
+            raise ValueError("checkpoint is not of the formula of the solver")
+
+        # the clauses of a checkpoint are not derived in the proof
+        self.stop_proof()
+        self.backtrack(0)
+
+        if checkpoint.n_vars > self.n_vars:
+            self.add_variables(checkpoint.n_vars - self.n_vars)
+
+        for literal in checkpoint.units:
+            self.add_learnt_clause([ literal ], 1)
+
+        for clause, lbd, activity in checkpoint.learnt_clauses:
+            clause_id = self.add_learnt_clause(clause, lbd)
+
+            if clause_id != None:
+                self.arena.activity[clause_id] = activity
+
+        if self.is_vsids:
+            for variable in range(1, checkpoint.n_vars + 1):
+                activity = checkpoint.activity[variable]
+                self.vsids_counter[variable] = activity if self.vsids_mode == EVSIDS else int(activity)
+
+            self.order.increment = checkpoint.vsids_increment
+            self.order.build(range(1, self.n_vars + 1))
+
+        self.phases.saved[1:checkpoint.n_vars + 1] = checkpoint.phases[1:]
+        self.clause_increment = checkpoint.clause_increment
+
+    def set_phases(self, assignments):
+        """
+        Sets the saved phases, which are picked for variables without a target phase until they are next unassigned.
+            :param assignments: Dictionary of { variable: value }, such as the best assignment found by local search.
+            :returns: None.
+        """
+        for variable, value in assignments.items():
+            self.phases.saved[variable] = value
+
+    def rephase(self):
+        kind = self.phases.rephase()
+        self.logger.log("rephasing to {} phases".format(kind))
 
-            for clause in self.clauses:
-                f.write(" ".join([ str(literal) for literal in clause ]) + "\n")
-            
-            for line in self.proof:
-                f.write(" ".join([ str(clause_index) for clause_index in line ]) + "\n")
+        self.rephase_interval += Config.REPHASE_INTERVAL
+        self.rephase_countdown = self.rephase_interval
 
-    def derive_empty_clause(self, formula, learnt_clause):
+    def derive_empty_clause(self, conflict):
         # derives empty clause - used in proof of unsatisfiability
-        self.restart() # restarts search process - clears search history
-
-        # adds the learnt clause to the formula after backtracking
-        formula.add(learnt_clause)
-        self.initialize_learnt_clause(learnt_clause)
-
-        # the conflict clause/learnt clause contains only the uip literal 
-        # since there are no other decision levels with literals to contribute to the conflict
-        unit_clause_1 = learnt_clause
-        unit_literal = list(unit_clause_1)[0]
-        assert len(learnt_clause) == 1
-
-        # starts unit propagation from conflict clause
-        self.propagation_queue.append((unit_literal, unit_clause_1))
-        self.unit_propagation(formula)
-        assert self.eval_formula(formula) == UNSAT
-
-        # resolves all the way to the start of the implication graph to derive the empty clause
-        empty_clause, stage = self.conflict_analysis(formula, is_first_uip=False)
-        assert empty_clause == set()
+        # every literal in the conflict clause is assigned at decision level 0 with an antecedent
+        # so resolving all the way to the start of the implication graph derives the empty clause
+        steps = [] if self.proof.needs_steps else None
+
+        if steps != None:
+            empty_clause = self.resolve_away(set(self.arena.clause(conflict)), steps, ())
+            assert empty_clause == set()
+
+        self.proof.add_derived([], self.clause_index_map[conflict], steps)
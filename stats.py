@@ -0,0 +1,205 @@
+"""
+Defines search statistics, and the profilers and writers they are exported with.
+"""
+from constants import *
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+
+# tensorboard output is optional, so tensorboardX is only needed when it is written
+try:
+    from tensorboardX import SummaryWriter
+except ImportError:
+    SummaryWriter = None
+
+# memory usage is only read where the resource module exists
+try:
+    import resource
+except ImportError:
+    resource = None
+
+class Stats:
+    def __init__(self, is_timed=False):
+        """
+        Counts decisions, propagations, conflicts, restarts and reductions, with histograms of the size and lbd of learnt clauses.
+        Counters are updated once per decision, propagation pass or conflict, so they are always kept.
+        Timing reads the clock twice per propagation pass and conflict analysis, so phases are only timed if is_timed.
+            :param is_timed: Whether to time each phase of the search.
+        """
+        self.is_timed = is_timed
+        self.start_time = time.perf_counter()
+        self.decisions = 0
+        self.propagations = 0 # number of literals assigned by unit propagation
+        self.conflicts = 0
+        self.restarts = 0
+        self.reductions = 0
+        self.learnt_literals = 0
+        self.learnt_sizes = {} # { size: number of learnt clauses }
+        self.lbds = {} # { lbd: number of learnt clauses }
+        self.times = {} # { phase: seconds }
+
+    def on_learnt_clause(self, size, lbd):
+        self.learnt_literals += size
+        self.learnt_sizes[size] = self.learnt_sizes.get(size, 0) + 1
+        self.lbds[lbd] = self.lbds.get(lbd, 0) + 1
+
+    def add_time(self, phase, start_time):
+        # adds the time since start_time, read from time.perf_counter, to the phase
+        self.times[phase] = self.times.get(phase, 0) + time.perf_counter() - start_time
+
+    def get_stats(self):
+        elapsed = time.perf_counter() - self.start_time
+        n_learnt = sum(self.learnt_sizes.values())
+
+        return { "time": elapsed, "decisions": self.decisions, "propagations": self.propagations,
+                "conflicts": self.conflicts, "restarts": self.restarts, "reductions": self.reductions,
+                "conflicts_per_second": self.conflicts / elapsed if elapsed > 0 else 0,
+                "propagations_per_second": self.propagations / elapsed if elapsed > 0 else 0,
+                "average_learnt_size": self.learnt_literals / n_learnt if n_learnt > 0 else 0,
+                "learnt_sizes": dict(sorted(self.learnt_sizes.items())), "lbds": dict(sorted(self.lbds.items())),
+                "times": dict(self.times) }
+
+    def write_json(self, path, extra=None):
+        """
+        Writes the statistics as json.
+            :param path: Path of json file.
+            :param extra: Dictionary of other statistics to include, such as those of the restart policy.
+        """
+        stats = self.get_stats()
+        stats.update(extra or {})
+
+        with open(path, "w") as f:
+            json.dump(stats, f, indent=2)
+
+class TensorboardWriter:
+    def __init__(self, log_dir):
+        """
+        Writes statistics to tensorboard with tensorboardX, using the number of conflicts as the step.
+            :param log_dir: Directory of tensorboard event files.
+        """
+        if SummaryWriter == None:
+            raise ImportError("tensorboardX is needed to write statistics to tensorboard")
+
+        self.writer = SummaryWriter(log_dir)
+
+    def write(self, stats):
+        step = stats["conflicts"]
+
+        for name in [ "decisions", "propagations", "restarts", "reductions", "conflicts_per_second",
+                "propagations_per_second", "average_learnt_size" ]:
+            self.writer.add_scalar("search/" + name, stats[name], step)
+
+        for phase, seconds in stats["times"].items():
+            self.writer.add_scalar("time/" + phase, seconds, step)
+
+    def finish(self, stats):
+        # writes the statistics at the end of a solve, with the histograms of learnt clauses
+        self.write(stats)
+
+        for name in [ "learnt_sizes", "lbds" ]:
+            histogram = stats[name] # { value: count }
+
+            if histogram == {}:
+                continue
+
+            values = list(histogram)
+            counts = list(histogram.values())
+            self.writer.add_histogram_raw(name, min=values[0], max=values[-1], num=sum(counts),
+                    sum=sum(value * count for value, count in histogram.items()),
+                    sum_squares=sum(value * value * count for value, count in histogram.items()),
+                    bucket_limits=values, bucket_counts=counts, global_step=stats["conflicts"])
+
+        self.writer.flush()
+
+class CProfileProfiler:
+    def __init__(self):
+        # profiles every function call, which slows the search down several times
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def write(self, path):
+        output = io.StringIO()
+        pstats.Stats(self.profile, stream=output).sort_stats("cumulative").print_stats(50)
+
+        with open(path, "w") as f:
+            f.write(output.getvalue())
+
+class SamplingProfiler:
+    def __init__(self, interval):
+        """
+        Samples the function the solving thread is running from a background thread, which slows the search down little.
+        The background thread needs the interpreter lock to sample, so samples are at most sys.getswitchinterval() apart.
+            :param interval: Seconds between samples.
+        """
+        self.interval = interval
+        self.samples = {} # { function: number of samples }
+        self.thread_id = None
+        self.thread = None
+        self.is_running = False
+
+    def start(self):
+        self.thread_id = threading.get_ident()
+        self.is_running = True
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+        self.thread.start()
+
+    def sample(self):
+        while self.is_running:
+            time.sleep(self.interval)
+            frame = sys._current_frames().get(self.thread_id)
+
+            if frame != None:
+                code = frame.f_code
+                function = "{}:{}({})".format(os.path.basename(code.co_filename), code.co_firstlineno, code.co_name)
+                self.samples[function] = self.samples.get(function, 0) + 1
+
+    def stop(self):
+        self.is_running = False
+        self.thread.join()
+
+    def write(self, path):
+        total = sum(self.samples.values())
+
+        with open(path, "w") as f:
+            f.write("{} samples\n".format(total))
+
+            for function, count in sorted(self.samples.items(), key=lambda item: -item[1]):
+                f.write("{:6.2f}% {:8} {}\n".format(100 * count / total, count, function))
+
+def get_peak_memory():
+    # returns megabytes of peak memory of the process, or None if it cannot be read
+    if resource == None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # kilobytes on linux, bytes on macos
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / (1 << 10)
+
+def create_profiler(profiler, sample_interval):
+    """
+    Creates the profiler of a kind.
+        :param profiler: None, CPROFILE or SAMPLING.
+        :param sample_interval: Seconds between samples of a sampling profiler.
+        :returns: Profiler, or None.
+    """
+    if profiler == None:
+        return None
+
+    if profiler == CPROFILE:
+        return CProfileProfiler()
+
+    if profiler == SAMPLING:
+        return SamplingProfiler(sample_interval)
+
+    raise ValueError("Unknown profiler: {}".format(profiler))
@@ -0,0 +1,363 @@
+"""
+Defines symmetry breaking, which finds permutations of variables that map the formula to itself
+and adds lex-leader clauses, so the solver searches one assignment of each class of symmetric assignments.
+"""
+from constants import *
+from config import *
+from logger import Logger
+from solver import Solver
+import numpy as np
+import re
+import time
+
+class SymmetryFinder:
+    def __init__(self, formula, n_vars, seed=0):
+        """
+        Initializes the graph of the formula, whose automorphisms are the permutations of variables mapping the formula to itself.
+        Every literal and every clause is a vertex, each clause is joined to its literals and each literal to its negation.
+        Positive literals, negative literals and clauses are colored apart, so automorphisms only permute variables.
+        Vertex 2 * (variable - 1) is the positive literal of the variable, the next vertex its negative literal,
+        and clause vertices follow the literal vertices.
+            :param formula: Iterable of clauses.
+            :param n_vars: Number of variables in formula.
+            :param seed: Seed of the random values colors are hashed with.
+        """
+        self.n_vars = n_vars
+        self.clauses = []
+
+        for clause in formula:
+            clause = list(dict.fromkeys(clause))
+
+            if not any(-literal in clause for literal in clause):
+                self.clauses.append(clause)
+
+        self.clause_set = { frozenset(clause) for clause in self.clauses }
+        self.n_vertices = 2 * n_vars + len(self.clauses)
+
+        sources = [] # [ vertex ]
+        targets = [] # [ vertex ]
+
+        for variable in range(1, n_vars + 1):
+            sources += [ self.get_vertex(variable), self.get_vertex(-variable) ]
+            targets += [ self.get_vertex(-variable), self.get_vertex(variable) ]
+
+        for clause_index, clause in enumerate(self.clauses):
+            for literal in clause:
+                sources += [ 2 * n_vars + clause_index, self.get_vertex(literal) ]
+                targets += [ self.get_vertex(literal), 2 * n_vars + clause_index ]
+
+        # edges are sorted by source, so the neighbours of every vertex are summed with one reduceat
+        order = np.argsort(np.array(sources, dtype=np.int64), kind="stable")
+        self.sources = np.array(sources, dtype=np.int64)[order]
+        self.targets = np.array(targets, dtype=np.int64)[order]
+        self.has_edges = np.bincount(self.sources, minlength=self.n_vertices) > 0
+        self.starts = np.searchsorted(self.sources, np.arange(self.n_vertices))[self.has_edges]
+
+        # colors are hashed to random values, and wrapping sums of them do not depend on the order they are added in
+        self.weights = np.random.RandomState(seed).randint(0, 1 << 62, size=self.n_vertices + 1, dtype=np.int64).astype(np.uint64)
+
+        self.colors = np.full(self.n_vertices, 2, dtype=np.int64)
+        self.colors[0:2 * n_vars:2] = 0
+        self.colors[1:2 * n_vars:2] = 1
+        self.colors = self.refine(self.colors)
+
+    def get_vertex(self, literal):
+        return 2 * (abs(literal) - 1) + (literal < 0)
+
+    def refine(self, colors):
+        """
+        Refines a coloring until vertices of the same color have the same number of neighbours of every color.
+        Colors are numbered by the sorted hashes of the old color and the colors of the neighbours of each vertex,
+        so two colorings refined in parallel get the same numbers wherever they match.
+            :param colors: Array of { vertex: color }.
+            :returns: Array of { vertex: color }.
+        """
+        n_colors = len(np.unique(colors))
+
+        while True:
+            sums = np.zeros(self.n_vertices, dtype=np.uint64)
+
+            if len(self.starts) > 0:
+                sums[self.has_edges] = np.add.reduceat(self.weights[colors[self.targets]], self.starts)
+
+            keys, colors = np.unique(np.stack([ colors.astype(np.uint64), sums ]), axis=1, return_inverse=True)
+            colors = colors.reshape(-1)
+
+            if keys.shape[1] == n_colors:
+                return colors
+
+            n_colors = keys.shape[1]
+
+    def individualize(self, colors, vertex):
+        # gives the vertex a color of its own
+        colors = colors.copy()
+        colors[vertex] = self.n_vertices
+        return colors
+
+    def is_matching(self, colors, other_colors):
+        # checks that the colorings have the same number of vertices of every color
+        return (np.bincount(colors, minlength=self.n_vertices) == np.bincount(other_colors, minlength=self.n_vertices)).all()
+
+    def find_automorphism(self, colors, vertex, image):
+        """
+        Searches for an automorphism mapping the vertex to the image, which both have the same color.
+        Both colorings are individualized and refined in parallel, each time mapping the first vertex of a cell to itself
+        if it is in the matching cell and to the first vertex of that cell otherwise, so sparse automorphisms are found first.
+        Once every cell of several vertices holds the same vertices in both colorings, those vertices are mapped to themselves.
+        Mappings are never undone, so an automorphism may be missed, but every automorphism returned is checked against the formula.
+            :param colors: Array of { vertex: color } of a refined coloring.
+            :param vertex: Vertex.
+            :param image: Vertex to map the vertex to.
+            :returns: List mapping each variable to its image, or None if no automorphism is found.
+        """
+        other_colors = self.refine(self.individualize(colors, image))
+        colors = self.refine(self.individualize(colors, vertex))
+
+        while self.is_matching(colors, other_colors):
+            is_shared = np.bincount(colors, minlength=self.n_vertices)[colors] > 1
+
+            if (colors[is_shared] == other_colors[is_shared]).all():
+                # vertices of a color of their own are mapped to the vertex of that color in the other coloring
+                vertices = np.zeros(self.n_vertices, dtype=np.int64) # { color: vertex }
+                vertices[other_colors] = np.arange(self.n_vertices)
+                permutation = np.arange(self.n_vertices)
+                permutation[~is_shared] = vertices[colors[~is_shared]]
+
+                variable_permutation = [ 0 ] + [ int(permutation[2 * (variable - 1)]) // 2 + 1
+                        for variable in range(1, self.n_vars + 1) ]
+
+                if self.is_automorphism(variable_permutation):
+                    return variable_permutation
+
+                if not is_shared.any():
+                    return None
+
+            vertex = int(np.argmax(is_shared))
+            cell = colors[vertex]
+            image = vertex if other_colors[vertex] == cell else int(np.argmax(other_colors == cell))
+
+            colors = self.refine(self.individualize(colors, vertex))
+            other_colors = self.refine(self.individualize(other_colors, image))
+
+        return None
+
+    def is_automorphism(self, permutation):
+        """
+        Checks that a permutation of variables maps every clause of the formula to a clause of the formula.
+            :param permutation: List mapping each variable to its image.
+            :returns: True if the permutation is an automorphism of the formula.
+        """
+        if sorted(permutation) != list(range(self.n_vars + 1)):
+            return False
+
+        for clause in self.clauses:
+            image = frozenset(permutation[literal] if literal > 0 else -permutation[-literal] for literal in clause)
+
+            if image not in self.clause_set:
+                return False
+
+        return True
+
+    def find_generators(self, max_generators=None, time_limit=None):
+        """
+        Finds generators of the symmetries of the formula. The first variable of a cell of several variables is fixed
+        at each level, after searching for an automorphism to every other variable of its cell.
+        Variables already in the same orbit under the generators found are not searched,
+        since a product of the generators maps one to the other.
+            :param max_generators: Number of generators after which the search stops, None is unlimited.
+            :param time_limit: Seconds after which the search stops, None is unlimited.
+            :returns: List of generators, each a list mapping each variable to its image.
+        """
+        start_time = time.perf_counter()
+        generators = []
+        orbits = list(range(self.n_vars + 1)) # { variable: variable in the same orbit }, a union find forest
+        colors = self.colors
+        is_stopped = False
+
+        def find(variable):
+            while orbits[variable] != variable:
+                orbits[variable] = orbits[orbits[variable]]
+                variable = orbits[variable]
+
+            return variable
+
+        while not is_stopped:
+            literal_colors = colors[0:2 * self.n_vars:2]
+            is_shared = np.bincount(literal_colors, minlength=self.n_vertices + 1)[literal_colors] > 1
+
+            if not is_shared.any():
+                break
+
+            variable = int(np.argmax(is_shared)) + 1
+            cell = np.nonzero(literal_colors == literal_colors[variable - 1])[0] + 1
+            level_generators = [] # [ generator ], in increasing order of the image of the fixed variable
+
+            for image in cell:
+                if find(variable) == find(image):
+                    continue
+
+                if max_generators != None and len(generators) + len(level_generators) >= max_generators:
+                    is_stopped = True
+                    break
+
+                if time_limit != None and time.perf_counter() - start_time > time_limit:
+                    is_stopped = True
+                    break
+
+                permutation = self.find_automorphism(colors, self.get_vertex(variable), self.get_vertex(image))
+
+                if permutation != None:
+                    level_generators.append(permutation)
+
+                    for other in range(1, self.n_vars + 1):
+                        orbits[find(other)] = find(permutation[other])
+
+            generators += chain_involutions(level_generators)
+            colors = self.refine(self.individualize(colors, self.get_vertex(variable)))
+
+        return generators
+
+def chain_involutions(generators):
+    """
+    Replaces each involution after the first by its conjugate by the one before it, which generate the same group.
+    The generators of a level swap the fixed variable with increasing images, so when they are involutions,
+    such as swaps of interchangeable rows of variables, the conjugates swap consecutive images instead.
+    Lex-leader clauses of swaps of consecutive rows order every row, while those of swaps with the first row
+    only put the first row first, so far fewer symmetric assignments are left to search.
+        :param generators: List of generators, each a list mapping each variable to its image.
+        :returns: List of generators.
+    """
+    if not all(permutation[permutation[variable]] == variable for permutation in generators
+            for variable in range(len(permutation))):
+        return generators
+
+    chained = generators[:1]
+
+    for previous, permutation in zip(generators, generators[1:]):
+        chained.append([ previous[permutation[previous[variable]]] for variable in range(len(permutation)) ])
+
+    return chained
+
+def read_generators(path, n_vars):
+    """
+    Reads generators written one per line as cycles of variables, such as (1 2 3)(4 5), as output by saucy or breakid.
+    Cycles of negative literals are taken as the negation of a cycle of variables. Lines starting with c are comments.
+        :param path: Path of generator file.
+        :param n_vars: Number of variables in formula.
+        :raises ValueError: when a cycle maps a positive literal to a negative literal, or a variable exceeds n_vars
+        :returns: List of generators, each a list mapping each variable to its image.
+    """
+    generators = []
+
+    with open(path) as f:
+        for line in f:
+            if line.strip() == "" or line.startswith("c"):
+                continue
+
+            permutation = list(range(n_vars + 1))
+
+            for cycle in re.findall(r"\(([^)]*)\)", line):
+                literals = [ int(literal) for literal in re.split(r"[\s,]+", cycle.strip()) if literal != "" ]
+
+                if any(abs(literal) > n_vars or literal == 0 for literal in literals):
+                    raise ValueError("cycle {} has a variable that is not in the formula".format(cycle))
+
+                if any((literal > 0) != (literals[0] > 0) for literal in literals):
+                    raise ValueError("cycle {} maps a literal to a negative literal, only permutations of variables are broken".format(cycle))
+
+                for i, literal in enumerate(literals):
+                    permutation[abs(literal)] = abs(literals[(i + 1) % len(literals)])
+
+            generators.append(permutation)
+
+    return generators
+
+def get_lex_leader_clauses(generators, n_vars, max_size=None):
+    """
+    Encodes the lex-leader constraints of the generators, which keep only the assignments that are not greater than
+    their image under any generator, comparing variables in increasing order. The least assignment of each class
+    of symmetric assignments is kept, so the formula stays satisfiable if it was.
+    Each constraint takes 3 clauses per variable moved by the generator, with a new variable per moved variable
+    that is 1 if every variable up to it equals its image.
+        :param generators: List of generators, each a list mapping each variable to its image.
+        :param n_vars: Number of variables in formula.
+        :param max_size: Number of moved variables compared per generator, None compares every variable.
+                Comparing fewer variables breaks fewer symmetric assignments with fewer clauses.
+        :returns: List of clauses, and number of variables including the new variables.
+    """
+    clauses = []
+    last_variable = n_vars
+
+    for permutation in generators:
+        moved = [ variable for variable in range(1, n_vars + 1) if permutation[variable] != variable ][:max_size]
+        equal = None # new variable that is 1 if every variable compared so far equals its image
+
+        for position, variable in enumerate(moved):
+            image = permutation[variable]
+            prefix = [] if equal == None else [ -equal ]
+
+            # variable <= image if every earlier variable equals its image
+            clauses.append(prefix + [ -variable, image ])
+
+            if position == len(moved) - 1:
+                break
+
+            last_variable += 1
+            clauses.append(prefix + [ -variable, last_variable ])
+            clauses.append(prefix + [ image, last_variable ])
+            equal = last_variable
+
+    return clauses, last_variable
+
+def break_symmetries(formula, n_vars, generators_path=None):
+    """
+    Adds lex-leader clauses for the symmetries of the formula, read from a generator file or found by SymmetryFinder.
+        :param formula: Iterable of clauses.
+        :param n_vars: Number of variables in formula.
+        :param generators_path: Path of generator file, None finds the generators.
+        :raises ValueError: when a generator read from the file is not a symmetry of the formula
+        :returns: List of clauses, number of variables including the new variables, and list of generators.
+    """
+    clauses = [ list(clause) for clause in formula ]
+
+    if generators_path != None:
+        generators = read_generators(generators_path, n_vars)
+        finder = SymmetryFinder(clauses, n_vars)
+
+        for index, permutation in enumerate(generators):
+            if not finder.is_automorphism(permutation):
+                raise ValueError("generator {} of {} is not a symmetry of the formula".format(index + 1, generators_path))
+    else:
+        finder = SymmetryFinder(clauses, n_vars, Config.SEED)
+        generators = finder.find_generators(Config.MAX_GENERATORS, Config.SYMMETRY_TIME_LIMIT)
+
+    lex_leader_clauses, new_n_vars = get_lex_leader_clauses(generators, n_vars, Config.LEX_LEADER_SIZE)
+
+    return clauses + lex_leader_clauses, new_n_vars, generators
+
+def solve_symmetry_broken(formula, n_vars):
+    """
+    Solves the formula with lex-leader clauses for its symmetries. The lex-leader clauses are not implied by the formula,
+    so a refutation of the formula with them is not a proof for the formula, and no proof is written.
+        :param formula: Iterable of clauses.
+        :param n_vars: Number of variables in formula.
+        :returns: Assignments of the variables of the formula, value and list of generators.
+    """
+    logger = Logger(Config.IS_LOG)
+    start_time = time.time()
+
+    clauses, new_n_vars, generators = break_symmetries(formula, n_vars, Config.GENERATORS_PATH)
+    logger.log("found {} generators in {}s, added {} lex-leader clauses".format(
+            len(generators), time.time() - start_time, len(clauses) - len(formula)))
+
+    is_proof = Config.IS_PROOF
+    Config.IS_PROOF = False
+
+    try:
+        assignments, value = Solver(clauses, new_n_vars).solve()
+    finally:
+        Config.IS_PROOF = is_proof
+
+    assignments = { variable: value for variable, value in assignments.items() if variable <= n_vars }
+
+    return assignments, value, generators
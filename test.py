@@ -1,48 +1,312 @@
 """
-Tests SAT solver on SAT and UNSAT benchmarks.
-"""
+Benchmarks the SAT solver on the SAT and UNSAT instance families.
 
-import os
+Every instance is solved in its own process, a pool of which run in parallel, so a hard instance
+is stopped at the time limit instead of blocking the run. Models are checked against the formula,
+and resolution proofs against the formula with proof_checker.py when proofs are enabled.
+Results are written as CSV and JSON with PAR-2 scores, where an unsolved instance scores twice the time limit,
+and can be compared against a baseline JSON from an earlier run to flag regressions.
+
+Usage: python test.py [--families uf20-91 pigeon-hole ...] [--limit N] [--workers N] [--timeout S] [--memory MB]
+        [--proof] [--output results] [--baseline baseline.json] [--save-baseline baseline.json]
+"""
+from constants import *
+from config import *
 from dimacs_parser import *
-from solver import *
-import time
+from proof_checker import parse_proof, check_proof
+from exceptions import *
+from solver import Solver
+from verifier import Verifier
+from collections import deque
+import argparse
+import csv
 import glob
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
 
-# sat_paths = glob.glob(r'./sat_cases/uf50-218' + '/**/*.cnf', recursive=True)
-# unsat_paths = glob.glob(r'./unsat_cases/UUF50.218.1000' + '/**/*.cnf', recursive=True)
-sat_paths = glob.glob(r'./sat_cases/' + '/**/*.cnf', recursive=True)
-unsat_paths = glob.glob(r'./unsat_cases/' + '/**/*.cnf', recursive=True)
+families = { "sat_cases": SAT, "unsat_cases": UNSAT } # { directory: expected value }
 
-if True:
-    for sat_path in sat_paths:
-        with open(sat_path) as f:
-            test_case = f.read()
+# result statuses, the first 2 count as solved
+SOLVED = "solved"
+UNVERIFIED = "unverified" # solved, but a proof was not checked
+WRONG = "wrong"
+TIMEOUT = "timeout"
+MEMOUT = "memout"
+ERROR = "error"
 
-        formula, n_vars = dimacs_parse(test_case)
-        solver = Solver(formula, n_vars)
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the SAT solver on the SAT and UNSAT instance families.")
+    parser.add_argument("--families", nargs="*", help="family directories to run, defaults to every family")
+    parser.add_argument("--limit", type=int, default=None, help="instances per family")
+    parser.add_argument("--workers", type=int, default=0, help="parallel processes, defaults to the number of cores")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds per instance")
+    parser.add_argument("--memory", type=int, default=None, help="megabytes of memory per instance")
+    parser.add_argument("--proof", action="store_true", help="writes and checks a proof for UNSAT instances")
+    parser.add_argument("--output", default="results", help="path of the CSV and JSON results, without extension")
+    parser.add_argument("--baseline", default=None, help="JSON results to compare against")
+    parser.add_argument("--save-baseline", default=None, help="path to also write the JSON results to")
+    parser.add_argument("--threshold", type=float, default=1.5, help="slowdown factor flagged as a regression")
+    args = parser.parse_args()
 
-        start_time = time.time()
-        assignments, value = solver.solve()
-        end_time = time.time()
+    tasks = find_instances(args.families, args.limit)
+    print("running {} instances".format(len(tasks)))
+
+    start_time = time.time()
+    results = run_benchmark(tasks, args.workers or multiprocessing.cpu_count(), args.timeout, args.memory, args.proof)
+    report = summarize(results, args.timeout)
+    report["wall_time"] = time.time() - start_time
+
+    write_results(report, args.output)
+
+    if args.save_baseline != None:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+
+    for family, summary in sorted(report["families"].items()):
+        print("{}: {}/{} solved, PAR-2 {:.2f}".format(family, summary["solved"], summary["instances"], summary["par2"]))
+
+    failures = [ result for result in results if result["status"] in (WRONG, ERROR) ]
+
+    for result in failures:
+        print("{} {}: {}".format(result["status"], result["instance"], result["message"]))
 
-        assert value == SAT
+    regressions = []
 
-        print("{} passed in {}s".format(sat_path, str(end_time - start_time)))
+    if args.baseline != None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
 
-if True:
-    for unsat_path in unsat_paths:
-        with open(unsat_path) as f:
-            test_case = f.read()
+        regressions = compare(report, baseline, args.threshold)
 
-        formula, n_vars = dimacs_parse(test_case)
-        solver = Solver(formula, n_vars)
+        for regression in regressions:
+            print("regression: " + regression)
+
+        print("{} regressions against {} (commit {})".format(len(regressions), args.baseline, baseline.get("commit")))
+
+    if failures or regressions:
+        sys.exit(1)
+
+def find_instances(family_names=None, limit=None):
+    """
+    Finds the instances of the families, in sorted order. Each subdirectory of an instance directory is a family,
+    and the instances directly in an instance directory, such as sat_cases/sat_test_case_1.cnf, are the family sat_cases.
+        :param family_names: Names of family directories, or None for every family.
+        :param limit: Number of instances per family, or None for every instance.
+        :returns: List of ( path, family, expected value ).
+    """
+    tasks = []
+
+    for directory, expected in sorted(families.items()):
+        # instances directly in the directory form a family named after the directory
+        family_paths = { directory: sorted(glob.glob(os.path.join(directory, "*.cnf"))) } # { family: [ path ] }
+
+        for family_path in sorted(glob.glob(os.path.join(directory, "*"))):
+            if os.path.isdir(family_path):
+                family_paths[os.path.basename(family_path)] = sorted(glob.glob(os.path.join(family_path, "**", "*.cnf"), recursive=True))
+
+        for family, paths in sorted(family_paths.items()):
+            if family_names and family not in family_names:
+                continue
+
+            for path in paths[:limit]:
+                tasks.append((path, family, expected))
+
+    return tasks
+
+def run_instance(path, expected, timeout, memory_limit, proof_path, connection):
+    # runs in a worker process, and sends ( status, solve time, message )
+    try:
+        if memory_limit != None:
+            import resource
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit << 20, memory_limit << 20))
+
+        Config.IS_LOG = False
+
+        # the solver stops itself at the time limit, the process is only stopped if it does not
+        Config.TIME_BUDGET = timeout
+        Config.IS_PROOF = proof_path != None
+        Config.PROOF_FORMAT = RESOLUTION
+        Config.OUTPUT_PATH = proof_path
+
+        formula = dimacs_load(path)
 
         start_time = time.time()
-        assignments, value = solver.solve()
-        end_time = time.time()
+        assignments, value = Solver(formula, formula.n_vars).solve()
+        solve_time = time.time() - start_time
+
+        status = SOLVED
+        message = ""
+        unsat_clauses = Verifier(formula, formula.n_vars).get_unsat_clauses(assignments) if value == SAT else []
+
+        if value == UNKNOWN:
+            status = TIMEOUT
+        elif value != expected:
+            status, message = WRONG, "answered {}, expected {}".format(value, expected)
+        elif len(unsat_clauses) > 0:
+            status, message = WRONG, "assignments do not satisfy {} clauses, first {}".format(len(unsat_clauses), unsat_clauses[0])
+        elif Config.IS_PROOF:
+            try:
+                with open(proof_path) as f:
+                    check_proof(parse_proof(f))
+            except ProofError as e:
+                status, message = WRONG, "proof rejected: {}".format(e)
+        elif value == UNSAT:
+            status = UNVERIFIED
+
+        connection.send((status, solve_time, message))
+    except MemoryError:
+        connection.send((MEMOUT, None, "memory limit exceeded"))
+    except Exception as e:
+        connection.send((ERROR, None, "{}: {}".format(type(e).__name__, e)))
+
+def run_benchmark(tasks, n_workers, timeout, memory_limit=None, is_proof=False):
+    """
+    Solves every instance in its own process, with at most n_workers processes running at once.
+    Solvers stop themselves at the timeout, and a process is stopped when it runs for a second longer than that.
+        :param tasks: List of ( path, family, expected value ).
+        :param n_workers: Number of processes.
+        :param timeout: Seconds per instance.
+        :param memory_limit: Megabytes of memory per instance, or None for no limit.
+        :param is_proof: Whether to write and check a proof for UNSAT instances.
+        :returns: List of results, in the order of tasks.
+    """
+    context = multiprocessing.get_context()
+    pending = deque(enumerate(tasks))
+    running = {} # { process: ( task index, connection, start time, proof path ) }
+    results = [ None ] * len(tasks)
+
+    def finish(task_index, status, solve_time, message):
+        path, family, expected = tasks[task_index]
+        results[task_index] = { "instance": path, "family": family, "expected": expected,
+                "status": status, "time": solve_time, "message": message }
+        print("{} {} {}".format(path, status, "" if solve_time == None else "in {:.3f}s".format(solve_time)))
+
+    while pending or running:
+        while pending and len(running) < n_workers:
+            task_index, (path, family, expected) = pending.popleft()
+            proof_path = None
+
+            if is_proof and expected == UNSAT:
+                # created here, so the proof of a stopped process is removed too
+                proof_file, proof_path = tempfile.mkstemp(suffix=".txt")
+                os.close(proof_file)
+
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=run_instance, daemon=True,
+                    args=(path, expected, timeout, memory_limit, proof_path, sender))
+            process.start()
+            sender.close()
+            running[process] = (task_index, receiver, time.time(), proof_path)
+
+        time.sleep(0.01)
+
+        for process, (task_index, receiver, start_time, proof_path) in list(running.items()):
+            if receiver.poll():
+                try:
+                    finish(task_index, *receiver.recv())
+                except EOFError:
+                    finish(task_index, ERROR, None, "process exited with code {}".format(process.exitcode))
+            elif time.time() - start_time > timeout + 1:
+                process.terminate()
+                finish(task_index, TIMEOUT, None, "")
+            elif not process.is_alive() and not receiver.poll():
+                finish(task_index, ERROR, None, "process exited with code {}".format(process.exitcode))
+            else:
+                continue
+
+            process.join()
+            receiver.close()
+            del running[process]
+
+            if proof_path != None:
+                os.remove(proof_path)
+
+    return results
+
+def par2(result, timeout):
+    # an unsolved or wrongly solved instance scores twice the time limit
+    if result["status"] in (SOLVED, UNVERIFIED) and result["time"] <= timeout:
+        return result["time"]
+
+    return 2 * timeout
+
+def summarize(results, timeout):
+    """
+    Scores the results, and sums them per family.
+        :param results: List of results.
+        :param timeout: Seconds per instance.
+        :returns: Dictionary of settings, results and { family: summary }.
+    """
+    summaries = {} # { family: summary }
+
+    for result in results:
+        result["par2"] = par2(result, timeout)
+        summary = summaries.setdefault(result["family"], { "instances": 0, "solved": 0, "par2": 0, "statuses": {} })
+        summary["instances"] += 1
+        summary["solved"] += result["status"] in (SOLVED, UNVERIFIED)
+        summary["par2"] += result["par2"]
+        summary["statuses"][result["status"]] = summary["statuses"].get(result["status"], 0) + 1
+
+    return { "commit": get_commit(), "timeout": timeout, "families": summaries, "results": results }
+
+def get_commit():
+    try:
+        return subprocess.check_output([ "git", "rev-parse", "--short", "HEAD" ],
+                stderr=subprocess.DEVNULL, cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def write_results(report, output_path):
+    with open(output_path + ".json", "w") as f:
+        json.dump(report, f, indent=2)
+
+    with open(output_path + ".csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=[ "instance", "family", "expected", "status", "time", "par2", "message" ])
+        writer.writeheader()
+        writer.writerows(report["results"])
+
+def compare(report, baseline, threshold):
+    """
+    Compares results against a baseline, per instance and per family.
+    Solve times under 0.1s are too noisy to compare, so only instances slower than that are flagged for slowing down.
+        :param report: Results of this run.
+        :param baseline: Results of an earlier run.
+        :param threshold: Slowdown factor flagged as a regression.
+        :returns: List of regression descriptions.
+    """
+    regressions = []
+    baseline_results = { result["instance"]: result for result in baseline["results"] } # { instance: result }
+
+    for result in report["results"]:
+        old = baseline_results.get(result["instance"])
+
+        if old == None:
+            continue
+
+        was_solved = old["status"] in (SOLVED, UNVERIFIED)
+        is_solved = result["status"] in (SOLVED, UNVERIFIED)
+
+        if was_solved and not is_solved:
+            regressions.append("{} was solved in {:.3f}s, now {}".format(result["instance"], old["time"], result["status"]))
+        elif was_solved and result["time"] > 0.1 and result["time"] > threshold * old["time"]:
+            regressions.append("{} slowed from {:.3f}s to {:.3f}s".format(result["instance"], old["time"], result["time"]))
+
+    for family, summary in sorted(report["families"].items()):
+        old = baseline["families"].get(family)
+
+        # par-2 is only comparable over the same instances and time limit
+        if old == None or old["instances"] != summary["instances"] or baseline["timeout"] != report["timeout"]:
+            continue
 
-        assert value == UNSAT
+        if summary["par2"] > threshold * old["par2"]:
+            regressions.append("{} PAR-2 rose from {:.2f} to {:.2f}".format(family, old["par2"], summary["par2"]))
 
-        print("{} passed in {}s".format(unsat_path, str(end_time - start_time)))
+    return regressions
 
-print("All test cases passed")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Defines the decision order over variables used by the VSIDS heuristic.
+"""
+from constants import *
+
+class VariableOrder:
+    def __init__(self, n_vars, mode=EVSIDS, decay=0.95):
+        """
+        Initializes an indexed binary max-heap of variables keyed on their activity.
+            :param n_vars: Number of variables in formula.
+            :param mode: EVSIDS scales the bump increment after every conflict,
+                    LEGACY adds 1 per bump and halves all activities on decay.
+            :param decay: Factor the EVSIDS increment is divided by on every decay.
+        """
+        self.mode = mode
+        self.activity = [ 0 ] * (n_vars + 1) # { variable: activity }
+        self.heap = [] # [ variable ]
+        self.indices = [ -1 ] * (n_vars + 1) # { variable: position in heap }, -1 when not in heap
+
+        # evsids increment grows geometrically, which is equivalent to decaying every activity
+        # activities are rescaled once the increment gets too large to be represented
+        self.increment = 1.0
+        self.decay_factor = 1 / decay
+        self.rescale_limit = 1e100
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, variable):
+        return self.indices[variable] >= 0
+
+    def build(self, variables):
+        """
+        Replaces the heap contents with the given variables in O(n).
+            :param variables: Iterable of variables.
+            :returns: None.
+        """
+        for variable in self.heap:
+            self.indices[variable] = -1
+
+        self.heap = list(variables)
+
+        for position, variable in enumerate(self.heap):
+            self.indices[variable] = position
+
+        for position in range(len(self.heap) // 2 - 1, -1, -1):
+            self.sift_down(position)
+
+    def add_variables(self, count):
+        # new variables start without activity
+        first = len(self.activity)
+        self.activity += [ 0 ] * count
+        self.indices += [ -1 ] * count
+
+        for variable in range(first, first + count):
+            self.insert(variable)
+
+    def insert(self, variable):
+        # lazy reinsertion - variables only return to the heap when unassigned during backtracking
+        if self.indices[variable] >= 0:
+            return
+
+        self.indices[variable] = len(self.heap)
+        self.heap.append(variable)
+        self.sift_up(len(self.heap) - 1)
+
+    def pop(self):
+        """
+        Removes the variable with the highest activity.
+            :returns: Variable with highest activity, None if the heap is empty.
+        """
+        heap = self.heap
+
+        if not heap:
+            return None
+
+        top = heap[0]
+        last = heap.pop()
+        self.indices[top] = -1
+
+        if heap:
+            heap[0] = last
+            self.indices[last] = 0
+            self.sift_down(0)
+
+        return top
+
+    def bump(self, variable):
+        if self.mode == EVSIDS:
+            self.activity[variable] += self.increment
+
+            if self.activity[variable] > self.rescale_limit:
+                self.rescale()
+        else:
+            self.activity[variable] += 1
+
+        if self.indices[variable] >= 0:
+            self.sift_up(self.indices[variable])
+
+    def decay(self):
+        if self.mode == EVSIDS:
+            self.increment *= self.decay_factor
+        else:
+            # right binary shift is monotone, so the heap stays ordered
+            activity = self.activity
+
+            for variable in range(len(activity)):
+                activity[variable] = activity[variable] >> 1
+
+    def rescale(self):
+        # uniform scaling keeps the relative order, so the heap stays ordered
+        activity = self.activity
+
+        for variable in range(len(activity)):
+            activity[variable] *= 1 / self.rescale_limit
+
+        self.increment *= 1 / self.rescale_limit
+
+    def sift_up(self, position):
+        heap = self.heap
+        indices = self.indices
+        activity = self.activity
+        variable = heap[position]
+        key = activity[variable]
+
+        while position > 0:
+            parent = (position - 1) >> 1
+            parent_variable = heap[parent]
+
+            if activity[parent_variable] >= key:
+                break
+
+            heap[position] = parent_variable
+            indices[parent_variable] = position
+            position = parent
+
+        heap[position] = variable
+        indices[variable] = position
+
+    def sift_down(self, position):
+        heap = self.heap
+        indices = self.indices
+        activity = self.activity
+        size = len(heap)
+        variable = heap[position]
+        key = activity[variable]
+
+        while True:
+            child = 2 * position + 1
+
+            if child >= size:
+                break
+
+            if child + 1 < size and activity[heap[child + 1]] > activity[heap[child]]:
+                child += 1
+
+            child_variable = heap[child]
+
+            if activity[child_variable] <= key:
+                break
+
+            heap[position] = child_variable
+            indices[child_variable] = position
+            position = child
+
+        heap[position] = variable
+        indices[variable] = position
@@ -0,0 +1,99 @@
+"""
+Defines a model verifier, which evaluates assignments against a formula independently of the solver.
+"""
+from constants import *
+import numpy as np
+
+class Verifier:
+    def __init__(self, formula, n_vars):
+        """
+        Initializes the formula as numpy arrays in compressed sparse row form, where clause i spans
+        variables[offsets[i]:offsets[i + 1]] and signs holds the value that makes each literal 1.
+        The arrays are built once, so every assignment after the first is checked without a python loop over clauses.
+            :param formula: Iterable of clauses, or a CNF whose flat literal array is used as is.
+            :param n_vars: Number of variables in formula.
+        """
+        self.n_vars = n_vars
+
+        if hasattr(formula, "literals") and hasattr(formula, "offsets"):
+            literals = np.frombuffer(formula.literals, dtype=np.int32).astype(np.int64)
+            offsets = np.frombuffer(formula.offsets, dtype=np.int64).copy()
+        else:
+            clauses = [ list(clause) for clause in formula ]
+            literals = np.array([ literal for clause in clauses for literal in clause ], dtype=np.int64)
+            offsets = np.zeros(len(clauses) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([ len(clause) for clause in clauses ])
+
+        self.variables = np.abs(literals)
+        self.signs = (literals > 0).astype(np.int8)
+        self.offsets = offsets
+        self.n_clauses = len(offsets) - 1
+
+        # reduceat reads the literal at the offset of an empty clause, so only other clauses are reduced
+        # and empty clauses are never satisfied
+        self.is_empty = offsets[1:] == offsets[:-1]
+        self.starts = offsets[:-1][~self.is_empty]
+
+    def to_array(self, assignments):
+        """
+        Converts assignments to an array indexed by variable.
+            :param assignments: Dictionary of { variable: value }, or sequence indexed by variable.
+                    Variables without a value of 0 or 1 satisfy no literal.
+            :returns: Array of { variable: value }.
+        """
+        if isinstance(assignments, dict):
+            values = np.full(self.n_vars + 1, UNASSIGNED, dtype=np.int8)
+
+            for variable, value in assignments.items():
+                if 0 < variable <= self.n_vars:
+                    values[variable] = value
+
+            return values
+
+        return np.asarray(assignments, dtype=np.int8)
+
+    def evaluate(self, values):
+        """
+        Evaluates every clause under a batch of assignments.
+            :param values: Array of shape ( batch size, n_vars + 1 ) of { variable: value }.
+            :returns: Boolean array of shape ( batch size, number of clauses ), True where a clause is satisfied.
+        """
+        is_satisfied = np.zeros((len(values), self.n_clauses), dtype=bool)
+
+        if len(self.starts) > 0:
+            is_true = values[:, self.variables] == self.signs
+            is_satisfied[:, ~self.is_empty] = np.logical_or.reduceat(is_true, self.starts, axis=1)
+
+        return is_satisfied
+
+    def get_unsat_clauses(self, assignments):
+        """
+        Finds the clauses an assignment does not satisfy.
+            :param assignments: Dictionary of { variable: value }, or sequence indexed by variable.
+            :returns: Array of clause indices.
+        """
+        values = self.to_array(assignments)
+        return np.nonzero(~self.evaluate(values[None, :])[0])[0]
+
+    def is_model(self, assignments):
+        return len(self.get_unsat_clauses(assignments)) == 0
+
+    def check_batch(self, values, batch_size=1024):
+        """
+        Counts the clauses each assignment of a batch does not satisfy.
+        Batches are evaluated batch_size assignments at a time, which bounds memory to batch_size times the number of literals.
+            :param values: Array of shape ( number of assignments, n_vars + 1 ) of { variable: value }.
+            :param batch_size: Number of assignments evaluated at once.
+            :returns: Array of the number of unsat clauses of each assignment, which is 0 for models.
+        """
+        values = np.asarray(values, dtype=np.int8)
+        counts = np.zeros(len(values), dtype=np.int64)
+
+        for start in range(0, len(values), batch_size):
+            counts[start:start + batch_size] = (~self.evaluate(values[start:start + batch_size])).sum(axis=1)
+
+        return counts
+
+def is_model(formula, n_vars, assignments):
+    # checks one assignment, a Verifier is faster for checking many assignments of one formula
+    return Verifier(formula, n_vars).is_model(assignments)